@@ -0,0 +1,37 @@
+"""Add ingested_files table for duplicate upload detection
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingested_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('filename', sa.String(255), nullable=True),
+        sa.Column('size_bytes', sa.Integer(), nullable=True),
+        sa.Column('claim_ids', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingested_files_id'), 'ingested_files', ['id'], unique=False)
+    op.create_index(op.f('ix_ingested_files_content_hash'), 'ingested_files', ['content_hash'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ingested_files_content_hash'), table_name='ingested_files')
+    op.drop_index(op.f('ix_ingested_files_id'), table_name='ingested_files')
+    op.drop_table('ingested_files')
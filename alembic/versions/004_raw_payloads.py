@@ -0,0 +1,100 @@
+"""Move raw X12/835 content into the compressed, content-addressed raw_payloads table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import hashlib
+import zlib
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# (table, old text column, new hash column)
+PAYLOAD_COLUMNS = [
+    ('claims', 'raw_x12_data', 'raw_x12_hash'),
+    ('remittances', 'raw_835_data', 'raw_835_hash'),
+]
+
+BATCH_SIZE = 500
+
+
+def _raw_payloads():
+    return sa.table(
+        'raw_payloads',
+        sa.column('content_hash', sa.String),
+        sa.column('size_bytes', sa.Integer),
+        sa.column('data', sa.LargeBinary),
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        'raw_payloads',
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('content_hash')
+    )
+    for table_name, _, hash_column in PAYLOAD_COLUMNS:
+        op.add_column(table_name, sa.Column(hash_column, sa.String(64), nullable=True))
+
+    # Compress each distinct payload once and point the rows at it
+    bind = op.get_bind()
+    payloads = _raw_payloads()
+    stored = set()
+    for table_name, text_column, hash_column in PAYLOAD_COLUMNS:
+        table = sa.table(table_name, sa.column('id', sa.Integer), sa.column(text_column, sa.Text),
+                         sa.column(hash_column, sa.String))
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(table.c.id, table.c[text_column])
+                .where(table.c[text_column].isnot(None), table.c.id > last_id)
+                .order_by(table.c.id).limit(BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+            for row_id, text in rows:
+                data = text.encode('utf-8')
+                content_hash = hashlib.sha256(data).hexdigest()
+                if content_hash not in stored:
+                    bind.execute(payloads.insert().values(
+                        content_hash=content_hash, size_bytes=len(data), data=zlib.compress(data, 6)
+                    ))
+                    stored.add(content_hash)
+                bind.execute(table.update().where(table.c.id == row_id).values({hash_column: content_hash}))
+            last_id = rows[-1][0]
+
+    op.create_index(op.f('ix_claims_raw_x12_hash'), 'claims', ['raw_x12_hash'], unique=False)
+    for table_name, text_column, hash_column in PAYLOAD_COLUMNS:
+        op.create_foreign_key(f'fk_{table_name}_{hash_column}', table_name, 'raw_payloads',
+                              [hash_column], ['content_hash'])
+        op.drop_column(table_name, text_column)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    payloads = _raw_payloads()
+    for table_name, text_column, hash_column in PAYLOAD_COLUMNS:
+        op.add_column(table_name, sa.Column(text_column, sa.Text(), nullable=True))
+        table = sa.table(table_name, sa.column(text_column, sa.Text), sa.column(hash_column, sa.String))
+        hashes = bind.execute(sa.select(table.c[hash_column]).where(table.c[hash_column].isnot(None)).distinct())
+        for (content_hash,) in hashes.fetchall():
+            data = bind.execute(sa.select(payloads.c.data).where(payloads.c.content_hash == content_hash)).scalar()
+            bind.execute(table.update().where(table.c[hash_column] == content_hash).values(
+                {text_column: zlib.decompress(data).decode('utf-8')}
+            ))
+        op.drop_constraint(f'fk_{table_name}_{hash_column}', table_name, type_='foreignkey')
+
+    op.drop_index(op.f('ix_claims_raw_x12_hash'), table_name='claims')
+    for table_name, _, hash_column in PAYLOAD_COLUMNS:
+        op.drop_column(table_name, hash_column)
+    op.drop_table('raw_payloads')
@@ -0,0 +1,47 @@
+"""Add fee_schedule_versions and fee_schedule_entries for per-line repricing
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'fee_schedule_versions',
+        sa.Column('version', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('description', sa.String(255), nullable=True),
+        sa.Column('entry_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('version')
+    )
+    op.create_table(
+        'fee_schedule_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('procedure_code', sa.String(10), nullable=False),
+        sa.Column('modifier', sa.String(2), nullable=False),
+        sa.Column('provider_id', sa.String(50), nullable=False),
+        sa.Column('allowed_amount', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['version'], ['fee_schedule_versions.version']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_fee_schedule_entries_id'), 'fee_schedule_entries', ['id'], unique=False)
+    op.create_index('ix_fee_schedule_entries_version_code', 'fee_schedule_entries',
+                    ['version', 'procedure_code'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_fee_schedule_entries_version_code', table_name='fee_schedule_entries')
+    op.drop_index(op.f('ix_fee_schedule_entries_id'), table_name='fee_schedule_entries')
+    op.drop_table('fee_schedule_entries')
+    op.drop_table('fee_schedule_versions')
@@ -0,0 +1,56 @@
+"""Store claim dates as DATE and add indexes for the list, dashboard and adjudication filters
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+DATE_COLUMNS = ['service_date', 'admission_date', 'discharge_date']
+
+OPEN_CLAIMS = "status NOT IN ('ADJUDICATED', 'PAID', 'DENIED')"
+
+
+def upgrade() -> None:
+    # Empty and malformed values become NULL instead of failing the cast
+    for column in DATE_COLUMNS:
+        op.alter_column(
+            'claims', column,
+            existing_type=sa.String(10),
+            type_=sa.Date(),
+            postgresql_using=(
+                f"CASE WHEN {column} ~ '^\\d{{4}}-\\d{{2}}-\\d{{2}}$' "
+                f"THEN to_date({column}, 'YYYY-MM-DD') END"
+            ),
+        )
+
+    op.create_index('ix_claims_status_created_at', 'claims', ['status', 'created_at'], unique=False)
+    op.create_index('ix_claims_provider_id_status', 'claims', ['provider_id', 'status'], unique=False)
+    op.create_index('ix_claims_service_date', 'claims', ['service_date'], unique=False)
+    op.create_index('ix_claims_open_id', 'claims', ['id'], unique=False,
+                    postgresql_where=sa.text(OPEN_CLAIMS))
+    op.create_index(op.f('ix_remittances_claim_id'), 'remittances', ['claim_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_remittances_claim_id'), table_name='remittances')
+    op.drop_index('ix_claims_open_id', table_name='claims')
+    op.drop_index('ix_claims_service_date', table_name='claims')
+    op.drop_index('ix_claims_provider_id_status', table_name='claims')
+    op.drop_index('ix_claims_status_created_at', table_name='claims')
+
+    for column in DATE_COLUMNS:
+        op.alter_column(
+            'claims', column,
+            existing_type=sa.Date(),
+            type_=sa.String(10),
+            postgresql_using=f"to_char({column}, 'YYYY-MM-DD')",
+        )
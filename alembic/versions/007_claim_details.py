@@ -0,0 +1,88 @@
+"""Add claim_service_lines and claim_diagnoses, backfilled from the claims' JSON
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+# Set-based copies of the JSON arrays; values the parser left unconverted fall back as in ClaimProcessor
+BACKFILL_SERVICE_LINES = r"""
+INSERT INTO claim_service_lines (claim_id, line_number, procedure_code, modifiers, service_date, units, charge_amount)
+SELECT c.id,
+       CASE WHEN line->>'line_number' ~ '^[1-9][0-9]*$' THEN (line->>'line_number')::int ELSE t.n END,
+       LEFT(COALESCE(line->>'procedure_code', ''), 10),
+       LEFT(NULLIF((SELECT string_agg(m, ',') FROM json_array_elements_text(
+           CASE WHEN json_typeof(line->'modifiers') = 'array' THEN line->'modifiers' ELSE '[]'::json END) AS m), ''), 11),
+       CASE WHEN line->>'service_date' ~ '^\d{4}-\d{2}-\d{2}$' THEN to_date(line->>'service_date', 'YYYY-MM-DD') END,
+       CASE WHEN line->>'units' ~ '^-?\d+(\.\d+)?$' THEN (line->>'units')::float ELSE 1.0 END,
+       CASE WHEN line->>'charge_amount' ~ '^-?\d+(\.\d+)?$' THEN (line->>'charge_amount')::float ELSE 0.0 END
+FROM claims c
+CROSS JOIN LATERAL json_array_elements(
+    CASE WHEN json_typeof(c.service_lines) = 'array' THEN c.service_lines ELSE '[]'::json END
+) WITH ORDINALITY AS t(line, n)
+"""
+
+BACKFILL_DIAGNOSES = r"""
+INSERT INTO claim_diagnoses (claim_id, position, code)
+SELECT c.id, t.n, LEFT(t.code, 10)
+FROM claims c
+CROSS JOIN LATERAL json_array_elements_text(
+    CASE WHEN json_typeof(c.diagnosis_codes) = 'array' THEN c.diagnosis_codes ELSE '[]'::json END
+) WITH ORDINALITY AS t(code, n)
+WHERE t.code <> ''
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'claim_service_lines',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('claim_id', sa.Integer(), nullable=False),
+        sa.Column('line_number', sa.Integer(), nullable=False),
+        sa.Column('procedure_code', sa.String(10), nullable=False),
+        sa.Column('modifiers', sa.String(11), nullable=True),
+        sa.Column('service_date', sa.Date(), nullable=True),
+        sa.Column('units', sa.Float(), nullable=True),
+        sa.Column('charge_amount', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['claim_id'], ['claims.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'claim_diagnoses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('claim_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('code', sa.String(10), nullable=False),
+        sa.ForeignKeyConstraint(['claim_id'], ['claims.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Indexes are built after the backfill rather than maintained row by row during it
+    op.execute(BACKFILL_SERVICE_LINES)
+    op.execute(BACKFILL_DIAGNOSES)
+
+    op.create_index(op.f('ix_claim_service_lines_claim_id'), 'claim_service_lines', ['claim_id'], unique=False)
+    op.create_index('ix_claim_service_lines_procedure_code', 'claim_service_lines',
+                    ['procedure_code', 'charge_amount'], unique=False)
+    op.create_index('ix_claim_service_lines_charge_amount', 'claim_service_lines', ['charge_amount'], unique=False)
+    op.create_index(op.f('ix_claim_diagnoses_claim_id'), 'claim_diagnoses', ['claim_id'], unique=False)
+    op.create_index('ix_claim_diagnoses_code', 'claim_diagnoses', ['code', 'claim_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_claim_diagnoses_code', table_name='claim_diagnoses')
+    op.drop_index(op.f('ix_claim_diagnoses_claim_id'), table_name='claim_diagnoses')
+    op.drop_index('ix_claim_service_lines_charge_amount', table_name='claim_service_lines')
+    op.drop_index('ix_claim_service_lines_procedure_code', table_name='claim_service_lines')
+    op.drop_index(op.f('ix_claim_service_lines_claim_id'), table_name='claim_service_lines')
+    op.drop_table('claim_diagnoses')
+    op.drop_table('claim_service_lines')
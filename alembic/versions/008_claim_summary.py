@@ -0,0 +1,48 @@
+"""Add claim_summary, backfilled from claims
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+# One pass over claims; afterwards every write keeps the table current
+BACKFILL_SUMMARY = """
+INSERT INTO claim_summary (provider_id, service_date, status, claim_count, total_charges, paid_amount)
+SELECT COALESCE(provider_id, ''),
+       COALESCE(service_date, DATE '1900-01-01'),
+       status::text,
+       COUNT(*),
+       COALESCE(SUM(total_charges), 0),
+       COALESCE(SUM(paid_amount), 0)
+FROM claims
+GROUP BY 1, 2, 3
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'claim_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('provider_id', sa.String(50), nullable=False),
+        sa.Column('service_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('claim_count', sa.Integer(), nullable=False),
+        sa.Column('total_charges', sa.Float(), nullable=False),
+        sa.Column('paid_amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('provider_id', 'service_date', 'status', name='uq_claim_summary_key')
+    )
+    op.execute(BACKFILL_SUMMARY)
+
+
+def downgrade() -> None:
+    op.drop_table('claim_summary')
@@ -0,0 +1,25 @@
+"""Add owner and heartbeat_at to ingest_jobs
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('ingest_jobs', sa.Column('owner', sa.String(100), nullable=True))
+    op.add_column('ingest_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('ingest_jobs', 'heartbeat_at')
+    op.drop_column('ingest_jobs', 'owner')
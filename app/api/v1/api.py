@@ -1,8 +1,10 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import claims, remittance, health
+from app.api.v1.endpoints import claims, remittance, health, jobs, fee_schedule
 
 api_router = APIRouter()
 
 api_router.include_router(health.router, tags=["health"])
 api_router.include_router(claims.router, prefix="/claims", tags=["claims"])
 api_router.include_router(remittance.router, prefix="/remittance", tags=["remittance"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(fee_schedule.router, prefix="/fee-schedule", tags=["fee-schedule"])
@@ -1,103 +1,409 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, func, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import BinaryIO, List, Optional, Tuple
+from app.core.config import settings
+from app.db.session import get_async_db
 from app.models.claim import Claim, ClaimStatus
+from app.models.claim_detail import ClaimServiceLine, ClaimDiagnosis
+from app.models.remittance import Remittance
 from app.schemas.claim import (
     ClaimResponse, 
+    ClaimUploadResponse,
+    BulkUploadResponse,
     ClaimListResponse, 
+    ClaimCountEnum,
     ClaimUpdate,
-    ClaimAdjudicationRequest
+    ClaimAdjudicationRequest,
+    BatchAdjudicationRequest,
+    BatchAdjudicationResponse,
+    ValidationRuleStats,
+    ClaimStatsGroupByEnum,
+    ClaimStatsResponse
 )
-from app.services.x12_parser import X12Parser
-from app.services.claim_processor import ClaimProcessor
+from app.services.x12_parser import X12Parser, X12StreamParser
+from app.services.claim_processor import AsyncClaimProcessor
+from app.services.batch_adjudicator import BatchAdjudicator
+from app.services.claim_stats import AsyncClaimStatsTracker, claim_stats
+from app.services.rule_engine import rule_engine
+from app.services.pagination import count_rows, encode_cursor, decode_cursor, InvalidCursorError
+from app.services.ingest_cache import parse_cache
+from app.services.response_cache import response_cache
+from app.services.upload_spool import UploadSpool, UploadTooLargeError, NotX12Error
+from app.services.bulk_ingest import AsyncBulkIngestor, iter_upload_entries
+from app.services.parallel_parser import ParallelX12Parser
+from app.services.ingest_queue import IngestQueue, QueueFullError, get_ingest_queue
+from app.api.v1.endpoints.jobs import job_response
+import itertools
+import mmap
+import time
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
 router = APIRouter()
 
-@router.post("/upload", response_model=ClaimResponse, status_code=201)
+# Bytes read from an upload per parser feed
+UPLOAD_CHUNK_SIZE = 65536
+
+# Claims per multi-row INSERT while an upload is parsed
+UPLOAD_FLUSH_SIZE = 1000
+
+@router.post("/upload", response_model=ClaimUploadResponse, status_code=201)
 async def upload_claim_file(
+    response: Response,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    background: bool = Query(False, description="Queue the file and return 202 with a job id"),
+    db: AsyncSession = Depends(get_async_db),
+    queue: IngestQueue = Depends(get_ingest_queue)
 ):
     """
     Upload and parse an X12 837 claim file (institutional or professional)
+    Every CLM loop in the file is stored as its own claim. A file that was
+    already ingested returns its existing claims (200) without parsing or
+    writing anything. With background=true the file is ingested by the job
+    queue instead; poll GET /jobs/{job_id} for the outcome.
     """
     if not file.filename.endswith(('.txt', '.x12', '.edi')):
         raise HTTPException(status_code=400, detail="Invalid file format. Expected .txt, .x12, or .edi")
     
-    # Read file content
-    content = await file.read()
-    content_str = content.decode('utf-8')
+    # Spool the upload chunk by chunk: size limit, content hash and ISA
+    # sniffing all happen as the bytes are copied
+    spool = UploadSpool()
+    try:
+        try:
+            await spool.consume(file, UPLOAD_CHUNK_SIZE)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except NotX12Error as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if background:
+            return await _enqueue(queue, [(file.filename, spool.file)])
+        return await _ingest_spooled(spool, file.filename, response, db)
+    finally:
+        spool.close()
+
+async def _ingest_spooled(spool: UploadSpool, filename: str, response: Response, db: AsyncSession):
+    """Store the claims of a spooled upload, or return its earlier claims"""
+    content_hash = spool.content_hash
+    processor = AsyncClaimProcessor(db)
+    existing_claims = await processor.find_ingested_claims(content_hash)
+    if existing_claims:
+        response.status_code = 200
+        return _upload_response(existing_claims[0], [claim.claim_id for claim in existing_claims], duplicate=True)
+    
+    parsed_claims = []  # Kept for the parse cache while the file stays small enough
+    
+    def remember(claims):
+        nonlocal parsed_claims
+        for claim_data in claims:
+            if parsed_claims is not None:
+                parsed_claims.append(claim_data)
+                if len(parsed_claims) > parse_cache.max_claims:
+                    parsed_claims = None
+            yield claim_data
+    
+    cached_claims = parse_cache.get(content_hash)
+    if cached_claims is not None:
+        claim_source = cached_claims
+    else:
+        # Parse the spool chunk by chunk, inserting claims a batch at a time;
+        # create_claims_bulk pulls each batch from a worker thread
+        claim_source = remember(_iter_spooled_claims(spool))
     
-    # Parse X12 file
-    parser = X12Parser()
+    # Original file content is referenced by each claim; compressed straight from the spool
+    raw_x12_hash = await processor.payloads.put_stream(spool.iter_chunks(UPLOAD_CHUNK_SIZE))
     try:
-        claim_data = parser.parse_837(content_str)
-    except Exception as e:
+        created = await processor.create_claims_bulk(
+            claim_source, batch_size=UPLOAD_FLUSH_SIZE, commit=False, raw_x12_hash=raw_x12_hash
+        )
+        if not created['claim_ids'] and not created['conflicts']:
+            # No CLM loop - keep the single-claim behaviour
+            claim_data = await run_in_threadpool(lambda: X12Parser().parse_837(spool.read_text()))
+            created = await processor.create_claims_bulk([claim_data], commit=False, raw_x12_hash=raw_x12_hash)
+    except ValueError as e:
+        await db.rollback()
         raise HTTPException(status_code=400, detail=f"Failed to parse X12 file: {str(e)}")
     
-    # Process and store claim
-    processor = ClaimProcessor(db)
-    claim = processor.create_claim(claim_data, content_str)
+    # Cache the parse before writing, so a retry after a failed commit skips it
+    if cached_claims is None and parsed_claims:
+        parse_cache.put(content_hash, parsed_claims)
     
-    return claim
+    claim_ids = created['claim_ids']
+    if created['conflicts']:
+        await db.rollback()
+        # Claim IDs taken by a concurrent upload of this file, or by another file
+        existing_claims = await processor.find_ingested_claims(content_hash)
+        if not existing_claims:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Claim IDs already exist: {', '.join(created['conflicts'][:10])}"
+            )
+        response.status_code = 200
+        return _upload_response(existing_claims[0], [claim.claim_id for claim in existing_claims], duplicate=True)
+    
+    try:
+        await processor.record_ingested_file(content_hash, claim_ids, filename, spool.size)
+        await db.commit()
+    except IntegrityError:
+        # The same file was ingested concurrently - return that upload's claims
+        await db.rollback()
+        existing_claims = await processor.find_ingested_claims(content_hash)
+        if not existing_claims:
+            raise
+        response.status_code = 200
+        return _upload_response(existing_claims[0], [claim.claim_id for claim in existing_claims], duplicate=True)
+    
+    first_claim = await db.get(Claim, created['ids'][0])
+    return _upload_response(first_claim, claim_ids)
+
+@router.post("/upload/bulk", response_model=BulkUploadResponse, status_code=201)
+async def upload_claim_files_bulk(
+    files: List[UploadFile] = File(...),
+    reject_invalid: bool = Query(False, description="Skip files that fail X12 envelope validation"),
+    background: bool = Query(False, description="Queue the files and return 202 with a job id"),
+    db: AsyncSession = Depends(get_async_db),
+    queue: IngestQueue = Depends(get_ingest_queue)
+):
+    """
+    Upload many X12 837 files, or zip/tar archives of them, in one request
+    Files are parsed concurrently and their claims stored in batched
+    transactions. Returns a manifest with each file's claim IDs,
+    validation errors and timings, or 202 with a job id when background=true.
+    """
+    if background:
+        return await _enqueue(queue, [(upload.filename, upload.file) for upload in files], reject_invalid)
+    
+    started = time.perf_counter()
+    entries = itertools.chain.from_iterable(
+        iter_upload_entries(upload.filename, upload.file) for upload in files
+    )
+    manifest = await AsyncBulkIngestor(db, reject_invalid=reject_invalid).ingest(entries)
+    
+    return {
+        "files_received": len(manifest),
+        "files_created": sum(1 for result in manifest if result['status'] == 'created'),
+        "claims_created": sum(result['claims_created'] for result in manifest),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "files": manifest
+    }
+
+async def _enqueue(queue: IngestQueue, files: List[Tuple[str, BinaryIO]],
+                   reject_invalid: bool = False) -> JSONResponse:
+    """Copy uploads to the job directory off the event loop and queue an ingestion job"""
+    return await run_in_threadpool(_enqueue_files, queue, files, reject_invalid)
+
+def _enqueue_files(queue: IngestQueue, files: List[Tuple[str, BinaryIO]],
+                   reject_invalid: bool = False) -> JSONResponse:
+    # The queue and its workers use the sync session
+    db = queue.session_factory()
+    try:
+        job = queue.enqueue(db, files, reject_invalid)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    finally:
+        db.close()
+    
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(job_response(job)),
+        headers={"Location": f"{settings.API_V1_PREFIX}/jobs/{job.job_id}"}
+    )
+
+def _iter_spooled_claims(spool: UploadSpool):
+    """
+    Parse the spooled upload, yielding claims as they close
+    Uploads of PARSE_PARALLEL_THRESHOLD bytes or more are memory-mapped and
+    split across the shared parse pool; smaller ones are fed to the stream
+    parser chunk by chunk.
+    """
+    if spool.size >= settings.PARSE_PARALLEL_THRESHOLD:
+        # fileno() moves a spool still held in memory to its temp file first
+        with mmap.mmap(spool.file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from ParallelX12Parser().iter_claims(buffer)
+        return
+    
+    stream_parser = X12StreamParser()
+    for chunk in spool.iter_chunks(UPLOAD_CHUNK_SIZE):
+        yield from stream_parser.feed(chunk)
+    yield from stream_parser.close()
+
+def _upload_response(first_claim: Claim, claim_ids: List[str], duplicate: bool = False) -> ClaimUploadResponse:
+    """First claim of an upload plus every claim ID from the file"""
+    upload_response = ClaimUploadResponse.model_validate(first_claim)
+    upload_response.claims_created = 0 if duplicate else len(claim_ids)
+    upload_response.claim_ids = claim_ids
+    upload_response.duplicate = duplicate
+    return upload_response
+
+def claims_query(status: Optional[ClaimStatus] = None, patient_id: Optional[str] = None,
+                 provider_id: Optional[str] = None, service_date_from: Optional[date] = None,
+                 service_date_to: Optional[date] = None, created_from: Optional[datetime] = None,
+                 created_to: Optional[datetime] = None, procedure_code: Optional[str] = None,
+                 min_line_charge: Optional[float] = None, diagnosis_code: Optional[str] = None):
+    """
+    Claims matching the list filters
+    Each filter is a plain comparison on an indexed column (see the
+    indexes on Claim), so the database can pick the most selective one.
+    """
+    query = select(Claim)
+    if status:
+        query = query.where(Claim.status == status)
+    if patient_id:
+        query = query.where(Claim.patient_id == patient_id)
+    if provider_id:
+        query = query.where(Claim.provider_id == provider_id)
+    if service_date_from:
+        query = query.where(Claim.service_date >= service_date_from)
+    if service_date_to:
+        query = query.where(Claim.service_date <= service_date_to)
+    if created_from:
+        query = query.where(Claim.created_at >= created_from)
+    if created_to:
+        query = query.where(Claim.created_at < created_to)
+    if procedure_code or min_line_charge is not None:
+        # Both conditions apply to the same service line
+        lines = select(ClaimServiceLine.claim_id)
+        if procedure_code:
+            lines = lines.where(ClaimServiceLine.procedure_code == procedure_code)
+        if min_line_charge is not None:
+            lines = lines.where(ClaimServiceLine.charge_amount >= min_line_charge)
+        query = query.where(Claim.id.in_(lines))
+    if diagnosis_code:
+        query = query.where(Claim.id.in_(
+            select(ClaimDiagnosis.claim_id).where(ClaimDiagnosis.code == diagnosis_code)
+        ))
+    return query
 
 @router.get("", response_model=ClaimListResponse)
-def get_claims(
+async def get_claims(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    count: ClaimCountEnum = Query(ClaimCountEnum.EXACT, description="exact, estimate or none"),
     status: Optional[ClaimStatus] = None,
     patient_id: Optional[str] = None,
     provider_id: Optional[str] = None,
-    db: Session = Depends(get_db)
+    service_date_from: Optional[date] = Query(None, description="Inclusive"),
+    service_date_to: Optional[date] = Query(None, description="Inclusive"),
+    created_from: Optional[datetime] = Query(None, description="Inclusive"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive"),
+    procedure_code: Optional[str] = Query(None, description="Claims with a service line for this code"),
+    min_line_charge: Optional[float] = Query(None, ge=0, description="Claims with a service line charging at least this"),
+    diagnosis_code: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all claims with optional filtering and pagination
+    Claims are ordered by id. Follow next_cursor for pages that cost the
+    same however deep they are; skip/limit is kept for compatibility.
+    count=estimate or count=none avoids counting the whole filtered set.
     """
-    query = db.query(Claim)
+    query = claims_query(status, patient_id, provider_id, service_date_from, service_date_to,
+                         created_from, created_to, procedure_code, min_line_charge, diagnosis_code)
+    filtered = query.whereclause is not None
     
-    if status:
-        query = query.filter(Claim.status == status)
-    if patient_id:
-        query = query.filter(Claim.patient_id == patient_id)
-    if provider_id:
-        query = query.filter(Claim.provider_id == provider_id)
+    total, total_is_estimate = await count_rows(db, query, count.value, Claim.__tablename__, filtered)
+    
+    page_query = query.order_by(Claim.id).limit(limit + 1)
+    if cursor:
+        if skip:
+            raise HTTPException(status_code=400, detail="Use either cursor or skip, not both")
+        try:
+            page_query = page_query.where(Claim.id > decode_cursor(cursor))
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        page_query = page_query.offset(skip)
+    claims = (await db.scalars(page_query)).all()
     
-    total = query.count()
-    claims = query.offset(skip).limit(limit).all()
+    # One row past the page tells whether another page exists
+    next_cursor = encode_cursor(claims[limit - 1].id) if len(claims) > limit else None
     
     return {
         "total": total,
-        "claims": claims,
-        "page": skip // limit + 1,
-        "page_size": limit
+        "claims": claims[:limit],
+        "page": None if cursor else skip // limit + 1,
+        "page_size": limit,
+        "next_cursor": next_cursor,
+        "total_is_estimate": total_is_estimate
     }
 
+@router.post("/adjudicate", response_model=BatchAdjudicationResponse)
+async def adjudicate_claims_batch(
+    request: BatchAdjudicationRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Adjudicate every claim matching the given claim IDs and/or filters
+    The decision is applied with set-based UPDATEs, chunk_size claims
+    (ADJUDICATION_CHUNK_SIZE) per statement and commit. Claims already
+    adjudicated, paid or denied are skipped unless their status is selected.
+    """
+    return await BatchAdjudicator(db, request.chunk_size).adjudicate(request)
+
+@router.get("/stats", response_model=ClaimStatsResponse)
+async def get_claim_stats(
+    group_by: Optional[ClaimStatsGroupByEnum] = None,
+    provider_id: Optional[str] = None,
+    service_date_from: Optional[date] = None,
+    service_date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Claim counts by status and charge/paid totals, optionally per provider
+    or service date. Read from the claim_summary table, which every write
+    path keeps up to date, so the cost does not grow with the claims table.
+    """
+    return await claim_stats(db, group_by.value if group_by else None, provider_id,
+                             service_date_from, service_date_to)
+
+@router.get("/validation/rules", response_model=List[ValidationRuleStats])
+async def get_validation_rule_stats(reset: bool = False):
+    """
+    Hits and evaluation time of each validation rule in this process,
+    most expensive first. With reset=true the counters start over.
+    """
+    stats = rule_engine.report()
+    if reset:
+        rule_engine.reset_stats()
+    return stats
+
 @router.get("/{claim_id}", response_model=ClaimResponse)
-def get_claim(claim_id: str, db: Session = Depends(get_db)):
+async def get_claim(claim_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get detailed information for a specific claim
+    Served from the response cache until the claim is next written.
     """
-    claim = db.query(Claim).filter(Claim.claim_id == claim_id).first()
-    if not claim:
-        raise HTTPException(status_code=404, detail="Claim not found")
-    return claim
+    body = response_cache.get('claim', claim_id)
+    if body is None:
+        claim = await db.scalar(select(Claim).where(Claim.claim_id == claim_id))
+        if not claim:
+            raise HTTPException(status_code=404, detail="Claim not found")
+        body = ClaimResponse.model_validate(claim).model_dump_json().encode()
+        response_cache.set('claim', claim_id, body)
+    return Response(content=body, media_type="application/json")
 
 @router.patch("/{claim_id}/status", response_model=ClaimResponse)
-def update_claim_status(
+async def update_claim_status(
     claim_id: str,
     claim_update: ClaimUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update claim status and details
     """
-    claim = db.query(Claim).filter(Claim.claim_id == claim_id).first()
+    claim = await db.scalar(select(Claim).where(Claim.claim_id == claim_id))
     if not claim:
         raise HTTPException(status_code=404, detail="Claim not found")
     
+    stats = AsyncClaimStatsTracker(db)
+    before = stats.snapshot(claim)
+
     # Update fields
     if claim_update.status:
         claim.status = claim_update.status
@@ -110,39 +416,49 @@ def update_claim_status(
     if claim_update.paid_amount is not None:
         claim.paid_amount = claim_update.paid_amount
     
-    db.commit()
-    db.refresh(claim)
+    stats.change(before, claim)
+    await stats.flush()
+    await db.commit()
+    response_cache.invalidate([claim_id])
+    await db.refresh(claim)
     
     return claim
 
 @router.post("/{claim_id}/adjudicate", response_model=ClaimResponse)
-def adjudicate_claim(
+async def adjudicate_claim(
     claim_id: str,
     adjudication: ClaimAdjudicationRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Simulate claim adjudication process
     """
-    claim = db.query(Claim).filter(Claim.claim_id == claim_id).first()
+    claim = await db.scalar(select(Claim).where(Claim.claim_id == claim_id))
     if not claim:
         raise HTTPException(status_code=404, detail="Claim not found")
     
-    processor = ClaimProcessor(db)
-    adjudicated_claim = processor.adjudicate_claim(claim, adjudication)
+    processor = AsyncClaimProcessor(db)
+    adjudicated_claim = await processor.adjudicate_claim(claim, adjudication)
+    response_cache.invalidate([claim_id])
     
     return adjudicated_claim
 
 @router.delete("/{claim_id}", status_code=204)
-def delete_claim(claim_id: str, db: Session = Depends(get_db)):
+async def delete_claim(claim_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a claim (soft delete)
     """
-    claim = db.query(Claim).filter(Claim.claim_id == claim_id).first()
+    claim = await db.scalar(select(Claim).where(Claim.claim_id == claim_id))
     if not claim:
         raise HTTPException(status_code=404, detail="Claim not found")
     
-    db.delete(claim)
-    db.commit()
+    stats = AsyncClaimStatsTracker(db)
+    stats.remove(claim)
+    await stats.flush()
+    # Service lines and diagnoses cascade in the database; remittances do not
+    await db.execute(delete(Remittance).where(Remittance.claim_id == claim_id))
+    await db.delete(claim)
+    await db.commit()
+    response_cache.invalidate([claim_id])
     
     return None
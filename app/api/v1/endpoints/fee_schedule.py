@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
+from app.models.fee_schedule import FeeScheduleVersion
+from app.schemas.fee_schedule import FeeSchedulePublishRequest, FeeScheduleVersionResponse
+from app.services.fee_schedule import fee_schedule_cache
+
+router = APIRouter()
+
+@router.post("", response_model=FeeScheduleVersionResponse, status_code=201)
+async def publish_fee_schedule(request: FeeSchedulePublishRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Publish a complete fee schedule as the next version
+    Adjudication in this process uses it immediately; other workers pick it
+    up within FEE_SCHEDULE_CHECK_INTERVAL seconds.
+    """
+    try:
+        return await fee_schedule_cache.publish(
+            db, [entry.model_dump() for entry in request.entries], request.description
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Another fee schedule was published concurrently; retry")
+
+@router.get("", response_model=FeeScheduleVersionResponse)
+async def get_fee_schedule(db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the fee schedule version currently in force
+    """
+    version = await db.scalar(select(FeeScheduleVersion).order_by(FeeScheduleVersion.version.desc()).limit(1))
+    if not version:
+        raise HTTPException(status_code=404, detail="No fee schedule published")
+    return version
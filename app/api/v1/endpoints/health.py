@@ -1,19 +1,20 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.core.config import settings
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
 @router.get("/health")
-def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """
     Comprehensive health check endpoint
     """
     try:
         # Test database connection
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         db_status = "healthy"
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
@@ -25,3 +26,14 @@ def health_check(db: Session = Depends(get_db)):
         "environment": settings.ENVIRONMENT,
         "database": db_status
     }
+
+@router.get("/health/cache")
+async def response_cache_stats(reset: bool = False):
+    """
+    Response cache backend, entries, invalidations and hits/misses per
+    response kind in this process. With reset=true the counters start over.
+    """
+    stats = response_cache.report()
+    if reset:
+        response_cache.reset_stats()
+    return stats
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
+from app.models.ingest_job import IngestJob
+from app.schemas.job import IngestJobResponse
+
+router = APIRouter()
+
+def job_response(job: IngestJob) -> IngestJobResponse:
+    """Job row plus the number of files it was queued with"""
+    response = IngestJobResponse.model_validate(job)
+    response.files_received = len(job.files or [])
+    return response
+
+@router.get("/{job_id}", response_model=IngestJobResponse)
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the status, progress counts and per-file results of an ingestion job
+    """
+    job = await db.scalar(select(IngestJob).where(IngestJob.job_id == job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
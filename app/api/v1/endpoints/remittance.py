@@ -1,31 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+from app.db.session import get_async_db
 from app.models.claim import Claim
 from app.models.remittance import Remittance
 from app.schemas.remittance import RemittanceResponse, RemittanceSummary
-from app.services.remittance_generator import RemittanceGenerator
+from app.services.remittance_generator import AsyncRemittanceGenerator
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
 @router.get("/{claim_id}", response_model=RemittanceSummary)
-def get_remittance(claim_id: str, db: Session = Depends(get_db)):
+async def get_remittance(claim_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Generate or retrieve 835 remittance advice for a claim
+    The summary is served from the response cache until the claim is next written.
     """
-    claim = db.query(Claim).filter(Claim.claim_id == claim_id).first()
+    body = response_cache.get('remittance', claim_id)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+
+    claim = await db.scalar(select(Claim).where(Claim.claim_id == claim_id))
     if not claim:
         raise HTTPException(status_code=404, detail="Claim not found")
     
     # Check if remittance already exists
-    existing_remittance = db.query(Remittance).filter(
+    existing_remittance = await db.scalar(select(Remittance).where(
         Remittance.claim_id == claim_id
-    ).first()
+    ))
     
     if existing_remittance:
         # Return existing remittance
-        generator = RemittanceGenerator()
-        return generator.create_summary(claim, existing_remittance)
+        generator = AsyncRemittanceGenerator()
+        return _cached_summary(claim_id, generator.create_summary(claim, existing_remittance))
     
     # Generate new remittance if claim is adjudicated
     if claim.status not in ["ADJUDICATED", "PAID"]:
@@ -34,19 +42,25 @@ def get_remittance(claim_id: str, db: Session = Depends(get_db)):
             detail="Claim must be adjudicated before generating remittance"
         )
     
-    generator = RemittanceGenerator()
-    remittance = generator.generate_remittance(claim, db)
+    generator = AsyncRemittanceGenerator()
+    remittance = await generator.generate_remittance(claim, db)
+    response_cache.invalidate([claim_id])
     
-    return generator.create_summary(claim, remittance)
+    return _cached_summary(claim_id, generator.create_summary(claim, remittance))
+
+def _cached_summary(claim_id: str, summary: RemittanceSummary) -> Response:
+    body = summary.model_dump_json().encode()
+    response_cache.set('remittance', claim_id, body)
+    return Response(content=body, media_type="application/json")
 
 @router.get("/{claim_id}/835", response_model=dict)
-def get_835_file(claim_id: str, db: Session = Depends(get_db)):
+async def get_835_file(claim_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get the raw 835 X12 format remittance data
     """
-    remittance = db.query(Remittance).filter(
+    remittance = await db.scalar(select(Remittance).where(
         Remittance.claim_id == claim_id
-    ).first()
+    ).options(undefer(Remittance.raw_835_payload)))
     
     if not remittance:
         raise HTTPException(status_code=404, detail="Remittance not found for this claim")
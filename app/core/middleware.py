@@ -0,0 +1,47 @@
+from typing import Dict
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+# Allowance for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 65536
+
+class UploadSizeLimitMiddleware:
+    """
+    Enforce a request body limit per upload path while the body arrives
+
+    A declared Content-Length over the limit is refused with 413 before any
+    of the body is read. Otherwise the received bytes are counted and 413
+    is raised as soon as the limit is crossed, so an oversized or
+    unbounded chunked upload is never read, or spooled, past it.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get('path')) if scope['type'] == 'http' and scope['method'] == 'POST' else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Upload exceeds the {limit} byte limit"
+        headers = dict(scope.get('headers') or [])
+        content_length = headers.get(b'content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    # Surfaces through the body parser as a 413 response
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,6 +1,13 @@
 from app.db.session import Base
 from app.models.claim import Claim
 from app.models.remittance import Remittance
+from app.models.ingested_file import IngestedFile
+from app.models.ingest_job import IngestJob
+from app.models.raw_payload import RawPayload
+from app.models.fee_schedule import FeeScheduleVersion, FeeScheduleEntry
+from app.models.claim_detail import ClaimServiceLine, ClaimDiagnosis
+from app.models.claim_summary import ClaimSummary
 
 # Import all models here for Alembic
-__all__ = ["Base", "Claim", "Remittance"]
+__all__ = ["Base", "Claim", "Remittance", "IngestedFile", "IngestJob", "RawPayload", "FeeScheduleVersion", "FeeScheduleEntry",
+           "ClaimServiceLine", "ClaimDiagnosis", "ClaimSummary"]
@@ -1,12 +1,36 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
+# Async drivers used for the sync URLs' backends
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+def enable_sqlite_foreign_keys(engine) -> None:
+    """
+    Turn on FOREIGN KEY enforcement, ON DELETE CASCADE included, for every
+    connection of a SQLite engine; SQLite leaves it off by default
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+# Sync engine - Alembic, scripts, the ingestion CLI and background jobs
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     echo=settings.DEBUG
 )
+enable_sqlite_foreign_keys(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -19,3 +43,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its backend's async driver"""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+def create_app_async_engine(url: str, **kwargs):
+    """Async engine with the app's pool settings (SQLite manages its own pool)"""
+    if not url.startswith('sqlite'):
+        kwargs.setdefault('pool_size', settings.DB_POOL_SIZE)
+        kwargs.setdefault('max_overflow', settings.DB_MAX_OVERFLOW)
+    return create_async_engine(url, pool_pre_ping=True, echo=settings.DEBUG, **kwargs)
+
+# Async engine - request handlers
+async_engine = create_app_async_engine(settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL))
+enable_sqlite_foreign_keys(async_engine.sync_engine)
+
+# Objects stay loaded after commit; lazy loads are not possible on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
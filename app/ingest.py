@@ -0,0 +1,56 @@
+"""
+Drop-folder ingestion - Loads every 837 file or archive waiting in a directory
+
+Processed files are moved to done/ or failed/ under the directory. Safe to
+re-run after a crash: progress is checkpointed in the directory.
+
+Usage:
+    python -m app.ingest [DIR] [--workers 4] [--batch-size 5000] [--reject-invalid] [--quiet]
+
+DIR defaults to UPLOAD_DIR/incoming.
+"""
+from typing import Dict, Any, List, Optional
+import argparse
+import os
+import sys
+
+from app.db.session import SessionLocal
+from app.services.drop_folder import DropFolderIngestor
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    detail = result['error'] or f"{result['claims_created']} claims"
+    print(f"  {result['status']:>9}  {result['filename']}  ({detail})")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('directory', nargs='?', help='drop folder (default: UPLOAD_DIR/incoming)')
+    arg_parser.add_argument('--workers', type=int, help='parse processes (default: PARSE_WORKERS or CPU count)')
+    arg_parser.add_argument('--batch-size', type=int, help='claims per transaction (default: BULK_COMMIT_SIZE)')
+    arg_parser.add_argument('--reject-invalid', action='store_true',
+                            help='move files with X12 validation errors to failed/ without storing them')
+    arg_parser.add_argument('--quiet', action='store_true', help='print the summary only')
+    args = arg_parser.parse_args(argv)
+    if args.directory is not None and not os.path.isdir(args.directory):
+        arg_parser.error(f"not a directory: {args.directory}")
+
+    db = SessionLocal()
+    try:
+        ingestor = DropFolderIngestor(db, args.directory, workers=args.workers,
+                                      batch_size=args.batch_size, reject_invalid=args.reject_invalid)
+        print(f"Ingesting {ingestor.directory}")
+        summary = ingestor.run(progress=None if args.quiet else print_result)
+    finally:
+        db.close()
+
+    print(f"{summary['files']} files ({summary['done']} done, {summary['failed']} failed, "
+          f"{summary['resumed']} resumed from checkpoint), {summary['claims_created']} claims "
+          f"in {summary['seconds']:.2f}s")
+    print(f"{summary['files_per_s']:.1f} files/s, {summary['claims_per_s']:.0f} claims/s, "
+          f"{summary['mb_per_s']:.2f} MB/s")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.middleware import UploadSizeLimitMiddleware, MULTIPART_OVERHEAD
 from app.api.v1.api import api_router
-from app.db.session import engine
+from app.db.session import engine, async_engine
 from app.db.base import Base
+from app.services.ingest_queue import ingest_queue
+from app.services.parallel_parser import shutdown_parse_pool
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -25,9 +28,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Upload size limits, enforced while the request body arrives
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        f"{settings.API_V1_PREFIX}/claims/upload": settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD,
+        f"{settings.API_V1_PREFIX}/claims/upload/bulk": settings.MAX_BULK_UPLOAD_SIZE,
+    }
+)
+
 # Include routers
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
+@app.on_event("startup")
+def resume_ingest_jobs():
+    """Pick up background ingestion jobs interrupted by a restart"""
+    ingest_queue.resume()
+
+@app.on_event("shutdown")
+def stop_ingest_jobs():
+    """Stop taking new jobs; queued ones stay QUEUED for the next start"""
+    ingest_queue.shutdown(wait=False)
+
+@app.on_event("shutdown")
+def stop_parse_pool():
+    """Stop the parse worker processes"""
+    shutdown_parse_pool()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Close the async connection pool"""
+    await async_engine.dispose()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -1,6 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, Text, Enum
+from sqlalchemy import Column, Integer, String, Date, DateTime, JSON, Float, Text, Enum, ForeignKey, Index, select, text, bindparam
+from sqlalchemy.orm import column_property, relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
+from app.models.raw_payload import RawPayload
+from app.models.claim_detail import ClaimServiceLine, ClaimDiagnosis
+from typing import Optional
 import enum
 
 class ClaimStatus(str, enum.Enum):
@@ -16,8 +20,21 @@ class ClaimType(str, enum.Enum):
     INSTITUTIONAL = "837I"
     PROFESSIONAL = "837P"
 
+# Adjudicated, paid and denied claims are done; the rest form the work queue
+FINAL_STATUSES = [ClaimStatus.ADJUDICATED, ClaimStatus.PAID, ClaimStatus.DENIED]
+_OPEN_CLAIMS_SQL = "status NOT IN ('ADJUDICATED', 'PAID', 'DENIED')"
+
 class Claim(Base):
     __tablename__ = "claims"
+    __table_args__ = (
+        # GET /claims?status=... and the dashboard's recent claims by status
+        Index('ix_claims_status_created_at', 'status', 'created_at'),
+        Index('ix_claims_provider_id_status', 'provider_id', 'status'),
+        Index('ix_claims_service_date', 'service_date'),
+        # Only the claims still to be adjudicated
+        Index('ix_claims_open_id', 'id',
+              postgresql_where=text(_OPEN_CLAIMS_SQL), sqlite_where=text(_OPEN_CLAIMS_SQL)),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     claim_id = Column(String(50), unique=True, index=True, nullable=False)
@@ -35,9 +52,9 @@ class Claim(Base):
     provider_npi = Column(String(10))
     
     # Claim Details
-    service_date = Column(String(10))
-    admission_date = Column(String(10))
-    discharge_date = Column(String(10))
+    service_date = Column(Date)
+    admission_date = Column(Date)
+    discharge_date = Column(Date)
     
     # Financial
     total_charges = Column(Float, default=0.0)
@@ -55,9 +72,35 @@ class Claim(Base):
     denial_reason = Column(Text)
     
     # Metadata
-    raw_x12_data = Column(Text)  # Store original X12 file content
+    raw_x12_hash = Column(String(64), ForeignKey("raw_payloads.content_hash"), index=True)  # Original X12 file
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # service_lines and diagnosis_codes as indexed rows; removed with the claim by ON DELETE CASCADE
+    lines = relationship(ClaimServiceLine, order_by=ClaimServiceLine.line_number,
+                         cascade="all, delete-orphan", passive_deletes=True)
+    diagnoses = relationship(ClaimDiagnosis, order_by=ClaimDiagnosis.position,
+                             cascade="all, delete-orphan", passive_deletes=True)
+    
+    # Compressed original file - loaded on first access, or with undefer()
+    raw_x12_payload = column_property(
+        select(RawPayload.data).where(RawPayload.content_hash == raw_x12_hash).scalar_subquery(),
+        deferred=True
+    )
+    
+    @property
+    def raw_x12_data(self) -> Optional[str]:
+        """Original X12 file content"""
+        return RawPayload.decode(self.raw_x12_payload)
+    
+    @classmethod
+    def is_open(cls):
+        """
+        Criterion for claims not yet adjudicated, paid or denied
+        The statuses are rendered into the SQL rather than bound, so the
+        database can match it to the ix_claims_open_id partial index.
+        """
+        return cls.status.notin_(bindparam('final_statuses', FINAL_STATUSES, expanding=True, literal_execute=True))
+    
     def __repr__(self):
         return f"<Claim {self.claim_id} - {self.status}>"
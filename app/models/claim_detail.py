@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, Index
+from app.db.session import Base
+
+class ClaimServiceLine(Base):
+    """One service line of a claim, queryable by procedure code and charge"""
+    __tablename__ = "claim_service_lines"
+    __table_args__ = (
+        Index('ix_claim_service_lines_procedure_code', 'procedure_code', 'charge_amount'),
+        Index('ix_claim_service_lines_charge_amount', 'charge_amount'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    claim_id = Column(Integer, ForeignKey("claims.id", ondelete="CASCADE"), nullable=False, index=True)
+    line_number = Column(Integer, nullable=False)
+    procedure_code = Column(String(10), nullable=False, default='')
+    modifiers = Column(String(11))  # Comma-separated, up to four
+    service_date = Column(Date)
+    units = Column(Float, default=1.0)
+    charge_amount = Column(Float, default=0.0)
+    
+    def __repr__(self):
+        return f"<ClaimServiceLine {self.claim_id}/{self.line_number} {self.procedure_code}>"
+
+class ClaimDiagnosis(Base):
+    """One diagnosis code of a claim, in the order it was reported"""
+    __tablename__ = "claim_diagnoses"
+    __table_args__ = (
+        Index('ix_claim_diagnoses_code', 'code', 'claim_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    claim_id = Column(Integer, ForeignKey("claims.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # 1 = principal diagnosis
+    code = Column(String(10), nullable=False)
+    
+    def __repr__(self):
+        return f"<ClaimDiagnosis {self.claim_id}/{self.position} {self.code}>"
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Date, Float, UniqueConstraint
+from app.db.session import Base
+from datetime import date
+
+# Stands in for a missing service date, since NULLs would not match in the unique key
+UNKNOWN_SERVICE_DATE = date(1900, 1, 1)
+
+class ClaimSummary(Base):
+    """Claim count and amounts per provider, service date and status, kept current on every claim change"""
+    __tablename__ = "claim_summary"
+    __table_args__ = (
+        UniqueConstraint('provider_id', 'service_date', 'status', name='uq_claim_summary_key'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    provider_id = Column(String(50), nullable=False)
+    service_date = Column(Date, nullable=False)
+    status = Column(String(20), nullable=False)
+    claim_count = Column(Integer, nullable=False, default=0)
+    total_charges = Column(Float, nullable=False, default=0.0)
+    paid_amount = Column(Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f"<ClaimSummary {self.provider_id} {self.service_date} {self.status}: {self.claim_count}>"
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class FeeScheduleVersion(Base):
+    """One published fee schedule; the highest version is the one in force"""
+    __tablename__ = "fee_schedule_versions"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String(255))
+    entry_count = Column(Integer, nullable=False, default=0)
+    
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<FeeScheduleVersion {self.version} - {self.entry_count} entries>"
+
+class FeeScheduleEntry(Base):
+    """Allowed amount per unit of a procedure code, optionally for one modifier and/or provider"""
+    __tablename__ = "fee_schedule_entries"
+    __table_args__ = (
+        Index('ix_fee_schedule_entries_version_code', 'version', 'procedure_code'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(Integer, ForeignKey("fee_schedule_versions.version"), nullable=False)
+    procedure_code = Column(String(10), nullable=False)
+    modifier = Column(String(2), nullable=False, default='')  # '' = any modifier
+    provider_id = Column(String(50), nullable=False, default='')  # '' = any provider
+    allowed_amount = Column(Float, nullable=False)
+    
+    def __repr__(self):
+        return f"<FeeScheduleEntry v{self.version} {self.procedure_code} {self.allowed_amount}>"
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Enum, Boolean
+from sqlalchemy.sql import func
+from app.db.session import Base
+import enum
+
+class IngestJobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(50), unique=True, index=True, nullable=False)
+    status = Column(Enum(IngestJobStatus), default=IngestJobStatus.QUEUED, nullable=False, index=True)
+    
+    # Uploaded files spooled under UPLOAD_DIR: [{"filename": ..., "path": ...}]
+    files = Column(JSON, nullable=False)
+    reject_invalid = Column(Boolean, default=False)
+    
+    # Progress
+    files_processed = Column(Integer, default=0)
+    files_failed = Column(Integer, default=0)
+    claims_created = Column(Integer, default=0)
+    results = Column(JSON)  # Per-file manifest, same shape as the bulk upload response
+    error = Column(Text)
+    
+    # Worker that claimed the job ("host:pid:queue") and its last sign of life while RUNNING
+    owner = Column(String(100))
+    heartbeat_at = Column(DateTime(timezone=True))
+    
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    
+    def __repr__(self):
+        return f"<IngestJob {self.job_id} - {self.status}>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class IngestedFile(Base):
+    __tablename__ = "ingested_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 of the normalized file
+    filename = Column(String(255))
+    size_bytes = Column(Integer)
+    
+    # Claims created from the file, in file order
+    claim_ids = Column(JSON, nullable=False)
+    
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<IngestedFile {self.content_hash[:12]} - {len(self.claim_ids or [])} claims>"
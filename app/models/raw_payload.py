@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql import func
+from app.db.session import Base
+from typing import Iterable, Optional, Tuple
+import hashlib
+import zlib
+
+class RawPayload(Base):
+    """Original X12 file or generated 835, zlib-compressed and stored once per content"""
+    __tablename__ = "raw_payloads"
+
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 of the uncompressed UTF-8 bytes
+    size_bytes = Column(Integer, nullable=False)  # Uncompressed size
+    data = deferred(Column(LargeBinary, nullable=False))  # zlib stream
+
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, level: int = 6) -> "RawPayload":
+        return cls(content_hash=cls.hash_bytes(data), size_bytes=len(data), data=zlib.compress(data, level))
+
+    @staticmethod
+    def compress_chunks(chunks: Iterable[bytes], level: int = 6) -> Tuple[str, int, bytes]:
+        """(content hash, size, zlib stream) of content read chunk by chunk"""
+        digest = hashlib.sha256()
+        compressor = zlib.compressobj(level)
+        size = 0
+        parts = []
+        for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            parts.append(compressor.compress(chunk))
+        parts.append(compressor.flush())
+        return digest.hexdigest(), size, b''.join(parts)
+
+    @staticmethod
+    def decode(data: Optional[bytes]) -> Optional[str]:
+        """Compressed payload column -> original text"""
+        return None if data is None else zlib.decompress(data).decode('utf-8')
+
+    def __repr__(self):
+        return f"<RawPayload {self.content_hash[:12]} - {self.size_bytes} bytes>"
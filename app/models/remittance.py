@@ -1,14 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, JSON, select
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, column_property
 from app.db.session import Base
+from app.models.raw_payload import RawPayload
+from typing import Optional
 
 class Remittance(Base):
     __tablename__ = "remittances"
 
     id = Column(Integer, primary_key=True, index=True)
     remittance_id = Column(String(50), unique=True, index=True, nullable=False)
-    claim_id = Column(String(50), ForeignKey("claims.claim_id"), nullable=False)
+    claim_id = Column(String(50), ForeignKey("claims.claim_id"), nullable=False, index=True)
     
     # Payment Information
     payment_amount = Column(Float, nullable=False)
@@ -25,10 +27,21 @@ class Remittance(Base):
     payer_name = Column(String(200))
     
     # 835 Details
-    raw_835_data = Column(Text)  # Generated 835 content
+    raw_835_hash = Column(String(64), ForeignKey("raw_payloads.content_hash"))  # Generated 835 content
     
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Compressed 835 - loaded on first access, or with undefer()
+    raw_835_payload = column_property(
+        select(RawPayload.data).where(RawPayload.content_hash == raw_835_hash).scalar_subquery(),
+        deferred=True
+    )
+    
+    @property
+    def raw_835_data(self) -> Optional[str]:
+        """Generated 835 content"""
+        return RawPayload.decode(self.raw_835_payload)
+    
     def __repr__(self):
         return f"<Remittance {self.remittance_id} for Claim {self.claim_id}>"
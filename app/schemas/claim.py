@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, validator, model_validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
+from app.core.config import settings
 
 class ClaimStatusEnum(str, Enum):
     RECEIVED = "RECEIVED"
@@ -34,9 +35,9 @@ class ClaimBase(BaseModel):
     provider_id: str
     provider_name: str
     provider_npi: Optional[str] = None
-    service_date: Optional[str] = None
-    admission_date: Optional[str] = None
-    discharge_date: Optional[str] = None
+    service_date: Optional[date] = None
+    admission_date: Optional[date] = None
+    discharge_date: Optional[date] = None
     total_charges: float = 0.0
     diagnosis_codes: List[str] = []
     procedure_codes: List[str] = []
@@ -65,14 +66,115 @@ class ClaimResponse(ClaimBase):
     class Config:
         from_attributes = True
 
+class ClaimUploadResponse(ClaimResponse):
+    """First claim in the uploaded file plus the IDs of every claim created"""
+    claims_created: int = 1
+    claim_ids: List[str] = []
+    duplicate: bool = False  # File was already ingested; nothing was created
+
+class BulkUploadFileResult(BaseModel):
+    """Outcome for one file (or archive member) of a bulk upload"""
+    filename: str
+    status: str  # created, duplicate, rejected or failed
+    content_hash: Optional[str] = None
+    claims_created: int = 0
+    claim_ids: List[str] = []
+    validation_errors: List[Dict[str, Any]] = []
+    error: Optional[str] = None
+    parse_ms: float = 0.0
+    persist_ms: float = 0.0
+
+class BulkUploadResponse(BaseModel):
+    files_received: int
+    files_created: int
+    claims_created: int
+    duration_ms: float
+    files: List[BulkUploadFileResult]
+
+class ClaimCountEnum(str, Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"  # Planner statistics where the database has them
+    NONE = "none"
+
 class ClaimListResponse(BaseModel):
-    total: int
+    total: Optional[int]  # None with count=none
     claims: List[ClaimResponse]
-    page: int
+    page: Optional[int]  # None when paging by cursor
     page_size: int
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; None on the last page
+    total_is_estimate: bool = False
 
 class ClaimAdjudicationRequest(BaseModel):
     approve: bool = True
     paid_amount: Optional[float] = None
     denial_reason: Optional[str] = None
     adjustment_codes: Optional[List[str]] = []
+
+class ValidationRuleStats(BaseModel):
+    rule_id: str
+    severity: str
+    message: str
+    hits: int
+    claims_evaluated: int
+    total_ms: float
+    us_per_claim: float
+
+class ClaimStatsGroupByEnum(str, Enum):
+    PROVIDER = "provider"
+    SERVICE_DATE = "service_date"
+
+class ClaimStatusStats(BaseModel):
+    claims: int
+    total_charges: float
+    total_paid: float
+
+class ClaimStatsGroup(BaseModel):
+    key: Optional[Any]  # provider_id or service date; None for claims without a service date
+    total_claims: int
+    total_charges: float
+    total_paid: float
+    by_status: Dict[str, ClaimStatusStats]
+
+class ClaimStatsResponse(BaseModel):
+    total_claims: int
+    total_charges: float
+    total_paid: float
+    by_status: Dict[str, ClaimStatusStats]
+    groups: Optional[List[ClaimStatsGroup]] = None  # Set with group_by
+
+class BatchAdjudicationRequest(BaseModel):
+    """Claims to adjudicate, by ID and/or filter, and the decision applied to all of them"""
+    claim_ids: Optional[List[str]] = None
+    status: Optional[ClaimStatusEnum] = None  # Default: claims not yet adjudicated, paid or denied
+    provider_id: Optional[str] = None
+    service_date_from: Optional[date] = None  # Inclusive
+    service_date_to: Optional[date] = None  # Inclusive
+    approve: bool = True
+    # Share of total charges allowed and paid; DEFAULT_ALLOWED_PERCENTAGE unless given
+    allowed_percentage: float = Field(default_factory=lambda: settings.DEFAULT_ALLOWED_PERCENTAGE, gt=0, le=1)
+    # Reprice each line by the published fee schedule, as single adjudication does; allowed_percentage
+    # covers unlisted lines, and all charges when no schedule is published or this is false
+    use_fee_schedule: bool = True
+    denial_reason: Optional[str] = None
+    adjustment_codes: Optional[List[str]] = []
+    chunk_size: Optional[int] = Field(None, ge=1, le=50000)  # Claims per UPDATE/commit
+
+    @model_validator(mode='after')
+    def require_selection(self):
+        if not (self.claim_ids or self.status or self.provider_id
+                or self.service_date_from or self.service_date_to):
+            raise ValueError("Select claims with claim_ids or at least one filter")
+        return self
+
+class BatchAdjudicationChunk(BaseModel):
+    chunk: int
+    claims_adjudicated: int
+    elapsed_ms: float
+
+class BatchAdjudicationResponse(BaseModel):
+    batch_id: str  # Recorded in each claim's adjudication_result
+    decision: str
+    claims_adjudicated: int
+    duration_ms: float
+    fee_schedule_version: Optional[int] = None  # Set when approved claims were repriced per line
+    chunks: List[BatchAdjudicationChunk]
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+class FeeScheduleEntryCreate(BaseModel):
+    procedure_code: str = Field(..., min_length=1, max_length=10)
+    modifier: Optional[str] = Field(None, max_length=2)  # Omit to match any modifier
+    provider_id: Optional[str] = Field(None, max_length=50)  # Omit to match any provider
+    allowed_amount: float = Field(..., ge=0)  # Per unit
+
+class FeeSchedulePublishRequest(BaseModel):
+    description: Optional[str] = Field(None, max_length=255)
+    entries: List[FeeScheduleEntryCreate] = Field(..., min_length=1)
+
+class FeeScheduleVersionResponse(BaseModel):
+    version: int
+    description: Optional[str] = None
+    entry_count: int
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
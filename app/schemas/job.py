@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+from enum import Enum
+from app.schemas.claim import BulkUploadFileResult
+
+class IngestJobStatusEnum(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: IngestJobStatusEnum
+    files_received: int = 0
+    files_processed: int = 0
+    files_failed: int = 0
+    claims_created: int = 0
+    results: Optional[List[BulkUploadFileResult]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
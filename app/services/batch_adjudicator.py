@@ -0,0 +1,246 @@
+"""
+Batch Adjudicator - Applies one adjudication decision to many claims with set-based UPDATEs
+"""
+from typing import Dict, Any, List, Callable, Optional
+from datetime import datetime
+import time
+import uuid
+
+from sqlalchemy import select, update, bindparam, cast, literal, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.models.claim import Claim, ClaimStatus
+from app.schemas.claim import BatchAdjudicationRequest
+from app.services.fee_schedule import FeeSchedule, fee_schedule_cache
+from app.services.claim_stats import AsyncClaimStatsTracker, summary_key
+from app.services.response_cache import response_cache
+
+class BatchAdjudicator:
+    """
+    Adjudicate every claim selected by a BatchAdjudicationRequest
+
+    The same decisions as ClaimProcessor.adjudicate_claim, computed in the
+    database: allowed_amount and paid_amount from total_charges, and the
+    adjudication_result JSON with the JSON functions of the backend. Claims
+    are walked in id order, `chunk_size` per UPDATE, and each chunk is
+    committed before the next, so a large backlog holds no long transaction
+    and progress is reported as it goes. With use_fee_schedule, each chunk's
+    service lines are read, priced together and written back by primary key
+    and the status they were read with.
+    claim_summary is moved by the chunk's per-group totals in the same commit,
+    and the chunk's cached responses are dropped once it is committed.
+    """
+
+    def __init__(self, db: AsyncSession, chunk_size: Optional[int] = None):
+        self.db = db
+        self.chunk_size = chunk_size or settings.ADJUDICATION_CHUNK_SIZE
+        self.stats = AsyncClaimStatsTracker(db)
+        if self.db.get_bind().dialect.name == 'postgresql':
+            self._json_object, self._json_array = func.json_build_object, func.json_build_array
+        else:
+            # SQLite (JSON1) and MySQL
+            self._json_object, self._json_array = func.json_object, func.json_array
+
+    async def adjudicate(self, request: BatchAdjudicationRequest,
+                         progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Adjudicate the selected claims chunk by chunk; returns per-chunk counts and timings"""
+        started = time.perf_counter()
+        batch_id = f"ADJ-{uuid.uuid4().hex[:12].upper()}"
+        criteria = self._criteria(request)
+        values = self._values(request, batch_id)
+        schedule = None
+        if request.approve and request.use_fee_schedule:
+            schedule = await fee_schedule_cache.get_async(self.db)
+
+        chunks = []
+        last_id = 0
+        while True:
+            chunk_started = time.perf_counter()
+            if schedule is not None:
+                rows = (await self.db.execute(
+                    select(Claim.id, Claim.claim_id, Claim.service_lines, Claim.provider_id, Claim.service_date,
+                           Claim.status, Claim.total_charges, Claim.paid_amount)
+                    .where(Claim.id > last_id, *criteria).order_by(Claim.id).limit(self.chunk_size)
+                )).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                claim_ids = [row.claim_id for row in rows]
+                adjudicated = await self._reprice(rows, schedule, request, batch_id)
+            else:
+                rows = (await self.db.execute(
+                    select(Claim.id, Claim.claim_id)
+                    .where(Claim.id > last_id, *criteria).order_by(Claim.id).limit(self.chunk_size)
+                )).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                claim_ids = [row.claim_id for row in rows]
+
+                # An id range rather than an IN list keeps the parameter count flat
+                chunk_criteria = [Claim.id >= rows[0].id, Claim.id <= last_id, *criteria]
+                await self._move_summary(chunk_criteria, request)
+                result = await self.db.execute(
+                    update(Claim)
+                    .where(*chunk_criteria)
+                    .values(values)
+                    .execution_options(synchronize_session=False)
+                )
+                adjudicated = result.rowcount
+            await self.stats.flush()
+            await self.db.commit()
+            response_cache.invalidate(claim_ids)
+
+            chunk = {
+                'chunk': len(chunks) + 1,
+                'claims_adjudicated': adjudicated,
+                'elapsed_ms': round((time.perf_counter() - chunk_started) * 1000, 3),
+            }
+            chunks.append(chunk)
+            if progress is not None:
+                progress(chunk)
+
+        return {
+            'batch_id': batch_id,
+            'decision': 'APPROVED' if request.approve else 'DENIED',
+            'claims_adjudicated': sum(chunk['claims_adjudicated'] for chunk in chunks),
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            'fee_schedule_version': schedule.version if schedule is not None else None,
+            'chunks': chunks,
+        }
+
+    async def _reprice(self, rows: List[Any], schedule: FeeSchedule,
+                       request: BatchAdjudicationRequest, batch_id: str) -> int:
+        """
+        Price a chunk's service lines in one pass and update each claim by primary key
+        Each UPDATE also requires the status the claim was read with, so a
+        claim adjudicated concurrently since is left alone; only the claims
+        actually updated move claim_summary and are counted.
+        """
+        priced = schedule.price([(row.service_lines, row.provider_id) for row in rows],
+                                request.allowed_percentage)
+        adjudication_date = datetime.now().isoformat()
+        adjustment_codes = request.adjustment_codes or ['CO-45']
+        table = Claim.__table__
+        result = await self.db.execute(
+            update(table).where(table.c.id == bindparam('b_id'), table.c.status == bindparam('b_status')),
+            [
+                {
+                    'b_id': row.id,
+                    'b_status': row.status,
+                    'status': ClaimStatus.ADJUDICATED,
+                    'allowed_amount': pricing['allowed_amount'],
+                    'paid_amount': pricing['allowed_amount'],
+                    'adjudication_result': {
+                        'decision': 'APPROVED',
+                        'adjudication_date': adjudication_date,
+                        'allowed_amount': pricing['allowed_amount'],
+                        'paid_amount': pricing['allowed_amount'],
+                        'adjustment_reason': 'Contractual adjustment',
+                        'adjustment_codes': adjustment_codes,
+                        'batch_id': batch_id,
+                        'fee_schedule_version': schedule.version,
+                        'line_pricing': pricing['line_pricing'],
+                    },
+                }
+                for row, pricing in zip(rows, priced)
+            ]
+        )
+        updated = list(zip(rows, priced))
+        if not (self.db.get_bind().dialect.supports_sane_multi_rowcount and result.rowcount == len(rows)):
+            # Some rows were skipped, or the driver cannot say how many were not
+            stamped = (await self.db.execute(
+                select(Claim.id, Claim.adjudication_result).where(Claim.id.in_([row.id for row in rows]))
+            )).all()
+            ours = {claim_pk for claim_pk, adjudication in stamped
+                    if (adjudication or {}).get('batch_id') == batch_id}
+            updated = [(row, pricing) for row, pricing in updated if row.id in ours]
+
+        for row, pricing in updated:
+            self.stats.remove(dict(row._mapping))
+            self.stats.add_group(summary_key(row.provider_id, row.service_date, ClaimStatus.ADJUDICATED),
+                                 1, row.total_charges or 0.0, pricing['allowed_amount'])
+        return len(updated)
+
+    async def _move_summary(self, criteria: List[Any], request: BatchAdjudicationRequest) -> None:
+        """Summary deltas of a set-based UPDATE, from the affected claims' totals per group"""
+        groups = (await self.db.execute(
+            select(Claim.provider_id, Claim.service_date, Claim.status, func.count(),
+                   func.sum(Claim.total_charges), func.sum(Claim.paid_amount))
+            .where(*criteria)
+            .group_by(Claim.provider_id, Claim.service_date, Claim.status)
+        )).all()
+        status = ClaimStatus.ADJUDICATED if request.approve else ClaimStatus.DENIED
+        for provider_id, service_date, old_status, claims, charges, paid in groups:
+            charges, paid = charges or 0.0, paid or 0.0
+            self.stats.add_group(summary_key(provider_id, service_date, old_status), -claims, -charges, -paid)
+            self.stats.add_group(summary_key(provider_id, service_date, status), claims, charges,
+                                 charges * request.allowed_percentage if request.approve else 0.0)
+
+    def _criteria(self, request: BatchAdjudicationRequest) -> List[Any]:
+        criteria = []
+        if request.claim_ids:
+            criteria.append(Claim.claim_id.in_(request.claim_ids))
+        if request.status:
+            criteria.append(Claim.status == ClaimStatus(request.status.value))
+        else:
+            # Final claims are left alone unless their status is selected explicitly
+            criteria.append(Claim.is_open())
+        if request.provider_id:
+            criteria.append(Claim.provider_id == request.provider_id)
+        if request.service_date_from:
+            criteria.append(Claim.service_date >= request.service_date_from)
+        if request.service_date_to:
+            criteria.append(Claim.service_date <= request.service_date_to)
+        return criteria
+
+    def _values(self, request: BatchAdjudicationRequest, batch_id: str) -> Dict[Any, Any]:
+        """SET clause; amounts and the result JSON are expressions over each row"""
+        adjudication_date = datetime.now().isoformat()
+
+        if request.approve:
+            allowed = Claim.total_charges * request.allowed_percentage
+            return {
+                Claim.status: ClaimStatus.ADJUDICATED,
+                Claim.allowed_amount: allowed,
+                Claim.paid_amount: allowed,
+                Claim.adjudication_result: self._object(
+                    decision='APPROVED',
+                    adjudication_date=adjudication_date,
+                    allowed_amount=allowed,
+                    paid_amount=allowed,
+                    adjustment_reason='Contractual adjustment',
+                    adjustment_codes=self._array(request.adjustment_codes or ['CO-45']),
+                    batch_id=batch_id,
+                ),
+            }
+
+        denial_reason = request.denial_reason or 'Claim denied per policy'
+        return {
+            Claim.status: ClaimStatus.DENIED,
+            Claim.denial_reason: denial_reason,
+            Claim.allowed_amount: 0.0,
+            Claim.paid_amount: 0.0,
+            Claim.adjudication_result: self._object(
+                decision='DENIED',
+                adjudication_date=adjudication_date,
+                denial_reason=denial_reason,
+                denial_codes=self._array(request.adjustment_codes or ['CO-96']),
+                batch_id=batch_id,
+            ),
+        }
+
+    def _object(self, **fields):
+        arguments = []
+        for key, value in fields.items():
+            arguments.extend([self._text(key), self._text(value) if isinstance(value, str) else value])
+        return self._json_object(*arguments)
+
+    def _array(self, values: List[str]):
+        return self._json_array(*[self._text(value) for value in values])
+
+    def _text(self, value: str):
+        # Typed so PostgreSQL can resolve json_build_object's variadic arguments
+        return cast(literal(value), String)
@@ -0,0 +1,449 @@
+"""
+Bulk Ingest - Parses many 837 files (or zip/tar archives of them) concurrently and persists them in batches
+"""
+from collections import deque
+from typing import Dict, List, Any, AsyncIterator, Callable, Iterable, Iterator, NamedTuple, Optional, Tuple, BinaryIO, Union
+import asyncio
+import os
+import tarfile
+import time
+import zipfile
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.claim_normalizer import ClaimNormalizer
+from app.services.claim_processor import AsyncClaimProcessor, ClaimProcessor
+from app.services.ingest_cache import content_hash, file_content_hash
+from app.services.parallel_parser import ParallelX12Parser, get_parse_pool
+from app.services.x12_parser import X12Parser, X12Validator
+
+X12_EXTENSIONS = ('.txt', '.x12', '.edi')
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+# Chunk size for reading a local file into the raw payload store
+FILE_CHUNK_SIZE = 1048576
+
+
+class LocalX12File(NamedTuple):
+    """Entry content for an X12 file on local disk, parsed memory-mapped instead of being read whole"""
+    path: str
+    size: int
+
+
+def iter_upload_entries(filename: str, fileobj: BinaryIO,
+                        max_size: Optional[int] = None) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """
+    Yield (name, content, error) for an uploaded X12 file, or for each X12
+    member of a zip/tar archive. Members over `max_size` bytes or with
+    other extensions are reported with an error instead of being read.
+    """
+    max_size = settings.MAX_UPLOAD_SIZE if max_size is None else max_size
+    lower = filename.lower()
+
+    if lower.endswith('.zip'):
+        with zipfile.ZipFile(fileobj) as archive:
+            for member in archive.infolist():
+                if member.is_dir():
+                    continue
+                name = f"{filename}/{member.filename}"
+                if not member.filename.lower().endswith(X12_EXTENSIONS):
+                    yield name, None, "Unsupported file type"
+                elif member.file_size > max_size:
+                    yield name, None, f"File exceeds {max_size} bytes"
+                else:
+                    yield name, archive.read(member), None
+
+    elif lower.endswith(ARCHIVE_EXTENSIONS):
+        with tarfile.open(fileobj=fileobj, mode='r:*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                name = f"{filename}/{member.name}"
+                if not member.name.lower().endswith(X12_EXTENSIONS):
+                    yield name, None, "Unsupported file type"
+                elif member.size > max_size:
+                    yield name, None, f"File exceeds {max_size} bytes"
+                else:
+                    yield name, archive.extractfile(member).read(), None
+
+    elif lower.endswith(X12_EXTENSIONS):
+        content = fileobj.read(max_size + 1)
+        if len(content) > max_size:
+            yield filename, None, f"File exceeds {max_size} bytes"
+        else:
+            yield filename, content, None
+
+    else:
+        yield filename, None, "Invalid file format. Expected .txt, .x12, .edi, .zip or .tar"
+
+
+def iter_local_entries(filename: str, path: str,
+                       max_size: Optional[int] = None) -> Iterator[Tuple[str, Union[bytes, LocalX12File, None], Optional[str]]]:
+    """
+    iter_upload_entries() for a file already on local disk
+    A plain X12 file is yielded as a LocalX12File, so it is hashed, parsed
+    and stored from disk; archive members are read as usual.
+    """
+    max_size = settings.MAX_UPLOAD_SIZE if max_size is None else max_size
+    if filename.lower().endswith(X12_EXTENSIONS):
+        size = os.path.getsize(path)
+        if size > max_size:
+            yield filename, None, f"File exceeds {max_size} bytes"
+        else:
+            yield filename, LocalX12File(path, size), None
+        return
+
+    with open(path, 'rb') as f:
+        yield from iter_upload_entries(filename, f, max_size)
+
+
+class BulkIngestor:
+    """
+    Ingest a batch of 837 files in one request
+
+    Files are hashed and checked against ingested_files first, so
+    duplicates are never parsed. The rest are decoded once and parsed and
+    validated in the shared parse pool, with at most two files per worker
+    in flight; a LocalX12File is memory-mapped by the worker instead, and
+    its raw payload is compressed from disk. Workers leave dates and
+    amounts raw and convert them in batches with ClaimNormalizer. A file of `parallel_threshold`
+    (PARSE_PARALLEL_THRESHOLD) bytes or more is not given to one worker:
+    once it is next in line, ParallelX12Parser splits it across the pool
+    and a validation-only pass checks its envelopes. Results are
+    persisted in file order, each file inside its own savepoint so one bad
+    file does not undo the others. The transaction is committed every
+    `batch_size` claims.
+    """
+
+    def __init__(self, db: Session, workers: Optional[int] = None, batch_size: Optional[int] = None,
+                 reject_invalid: bool = False, encoding: str = 'utf-8',
+                 parallel_threshold: Optional[int] = None):
+        self.db = db
+        self.processor = ClaimProcessor(db)
+        self.workers = workers or settings.PARSE_WORKERS or os.cpu_count() or 1
+        self.batch_size = batch_size or settings.BULK_COMMIT_SIZE
+        self.reject_invalid = reject_invalid
+        self.encoding = encoding
+        self.parallel_threshold = settings.PARSE_PARALLEL_THRESHOLD if parallel_threshold is None else parallel_threshold
+
+    def ingest(self, entries: Iterable[Tuple[str, Optional[bytes], Optional[str]]],
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+               committed: Optional[Callable[[], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Parse and persist (name, content, error) entries
+        Returns one manifest dict per entry, in order. `progress` is called
+        with each file's result before its batch is committed, `committed`
+        after every commit.
+        """
+        manifest = []
+        uncommitted = 0
+        for entry in self._iter_parsed(entries):
+            result = self._persist(entry)
+            manifest.append(result)
+            if progress is not None:
+                progress(result)
+
+            uncommitted += result['claims_created']
+            if uncommitted >= self.batch_size:
+                self.db.commit()
+                uncommitted = 0
+                if committed is not None:
+                    committed()
+
+        self.db.commit()
+        if committed is not None:
+            committed()
+        return manifest
+
+    def _iter_parsed(self, entries) -> Iterator[Dict[str, Any]]:
+        """Hash, dedupe and parse entries, yielding them in input order"""
+        executor = get_parse_pool() if self.workers > 1 else None
+        pending = deque()
+        try:
+            for name, content, error in entries:
+                entry = self._hash_entry(name, content, error)
+                if entry['content_hash'] is not None:
+                    entry['existing'] = self.processor.find_ingested_claims(entry['content_hash'])
+                    if not entry['existing']:
+                        self._start_parse(entry, content, executor)
+                pending.append(entry)
+
+                while self._next_ready(pending):
+                    yield self._resolve(pending.popleft())
+
+            while pending:
+                yield self._resolve(pending.popleft())
+        finally:
+            self._cancel(pending)
+
+    def _hash_entry(self, name: str, content: Union[bytes, LocalX12File, None],
+                    error: Optional[str]) -> Dict[str, Any]:
+        entry = {'filename': name, 'error': error, 'content_hash': None}
+        if isinstance(content, LocalX12File):
+            entry.update(path=content.path, size=content.size, content_hash=file_content_hash(content.path))
+        elif content is not None:
+            entry.update(size=len(content), content_hash=content_hash(content))
+        return entry
+
+    def _start_parse(self, entry: Dict[str, Any], content: Union[bytes, LocalX12File], executor) -> None:
+        """Parse a new entry inline, mark it for ParallelX12Parser or submit it to the pool"""
+        task = self._parse_task(entry, content)
+        if task is None:
+            return
+        if executor is None:
+            entry.update(task[0](*task[1:]))
+        elif entry['size'] >= self.parallel_threshold:
+            entry['parallel'] = True
+        else:
+            entry['future'] = executor.submit(*task)
+
+    def _next_ready(self, pending: deque) -> bool:
+        """Whether the oldest entry should be resolved before another one is started"""
+        return len(pending) > self.workers * 2 or bool(pending and 'future' not in pending[0])
+
+    def _cancel(self, pending: deque) -> None:
+        for entry in pending:
+            if 'future' in entry:
+                entry['future'].cancel()
+
+    def _parse_task(self, entry: Dict[str, Any], content: Union[bytes, LocalX12File]) -> Optional[Tuple]:
+        """(worker function, *arguments) parsing an entry, or None if it cannot be decoded"""
+        if 'path' in entry:
+            return _parse_file_entry, entry['path'], self.encoding
+        # Decoded once: the text is parsed in the pool and stored as the raw payload
+        try:
+            entry['text'] = content.decode(self.encoding)
+        except UnicodeDecodeError as e:
+            entry['error'] = f"Failed to parse X12 file: {str(e)}"
+            return None
+        return _parse_entry, entry['text']
+
+    def _resolve(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        future = entry.pop('future', None)
+        if future is not None:
+            entry.update(future.result())
+        elif entry.pop('parallel', False):
+            entry.update(self._parse_parallel(entry))
+        return entry
+
+    def _parse_parallel(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse one large file across the shared pool; its envelopes get a validation-only pass"""
+        parallel_parser = ParallelX12Parser(self.workers, threshold=0, encoding=self.encoding)
+        if 'path' in entry:
+            path = entry['path']
+            return _parse(lambda parser, validator: parallel_parser.iter_claims_from_file(path),
+                          lambda parser: parser.parse_837_file(path, self.encoding),
+                          lambda parser: parser.validate_837_file(path, self.encoding))
+        text = entry['text']
+        return _parse(lambda parser, validator: parallel_parser.iter_claims(text),
+                      lambda parser: parser.parse_837(text),
+                      lambda parser: parser.validate_837(text))
+
+    def _persist(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Write one parsed file inside a savepoint and describe the outcome"""
+        result = self._new_result(entry)
+        if result['error']:
+            return result
+
+        started = time.perf_counter()
+
+        # Also catches a file repeated within this bulk upload
+        existing = entry.get('existing') or self.processor.find_ingested_claims(entry['content_hash'])
+        if existing:
+            result.update(status='duplicate', claim_ids=[claim.claim_id for claim in existing])
+        elif self.reject_invalid and result['validation_errors']:
+            result.update(status='rejected', error="File failed X12 validation")
+        else:
+            savepoint = self.db.begin_nested()
+            try:
+                if 'path' in entry:
+                    raw_x12_hash = self.processor.payloads.put_stream(_iter_file_chunks(entry['path']))
+                    created = self.processor.create_claims_bulk(entry['claims'], commit=False, raw_x12_hash=raw_x12_hash)
+                else:
+                    created = self.processor.create_claims_bulk(entry['claims'], entry['text'], commit=False)
+                if created['conflicts']:
+                    # A file is stored whole or not at all
+                    savepoint.rollback()
+                    result['error'] = self._conflict_error(created)
+                else:
+                    claim_ids = created['claim_ids']
+                    self.processor.record_ingested_file(
+                        entry['content_hash'], claim_ids, entry['filename'][:255], entry['size']
+                    )
+                    savepoint.commit()
+                    result.update(status='created', claims_created=len(claim_ids), claim_ids=claim_ids)
+            except (IntegrityError, ValueError) as e:
+                savepoint.rollback()
+                result['error'] = self._store_error(e)
+
+        result['persist_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return result
+
+    def _new_result(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'filename': entry['filename'],
+            'status': 'failed',
+            'content_hash': entry['content_hash'],
+            'claims_created': 0,
+            'claim_ids': [],
+            'validation_errors': entry.get('validation', {}).get('error_details', []),
+            'error': entry['error'] or entry.get('parse_error'),
+            'parse_ms': round(entry.get('parse_seconds', 0.0) * 1000, 3),
+            'persist_ms': 0.0,
+        }
+
+    def _conflict_error(self, created: Dict[str, List]) -> str:
+        return f"Claim IDs already exist: {', '.join(created['conflicts'][:10])}"
+
+    def _store_error(self, e: Exception) -> str:
+        return f"Failed to store claims: {e.__class__.__name__}: {str(e).splitlines()[0]}"
+
+
+class AsyncBulkIngestor(BulkIngestor):
+    """
+    BulkIngestor for request handlers holding an AsyncSession
+    Same pipeline and manifest; reading entries, hashing, waiting on the
+    parse pool and compressing raw payloads run in worker threads, so the
+    event loop only awaits the database.
+    """
+
+    def __init__(self, db: AsyncSession, workers: Optional[int] = None, batch_size: Optional[int] = None,
+                 reject_invalid: bool = False, encoding: str = 'utf-8',
+                 parallel_threshold: Optional[int] = None):
+        super().__init__(db, workers, batch_size, reject_invalid, encoding, parallel_threshold)
+        self.processor = AsyncClaimProcessor(db)
+
+    async def ingest(self, entries: Iterable[Tuple[str, Optional[bytes], Optional[str]]]) -> List[Dict[str, Any]]:
+        """Parse and persist (name, content, error) entries; returns one manifest dict per entry, in order"""
+        manifest = []
+        uncommitted = 0
+        async for entry in self._iter_parsed(entries):
+            result = await self._persist(entry)
+            manifest.append(result)
+
+            uncommitted += result['claims_created']
+            if uncommitted >= self.batch_size:
+                await self.db.commit()
+                uncommitted = 0
+
+        await self.db.commit()
+        return manifest
+
+    async def _iter_parsed(self, entries) -> AsyncIterator[Dict[str, Any]]:
+        executor = get_parse_pool() if self.workers > 1 else None
+        entries = iter(entries)
+        pending = deque()
+        try:
+            while True:
+                # Archive members are read as they are reached
+                item = await asyncio.to_thread(next, entries, None)
+                if item is None:
+                    break
+                name, content, error = item
+                entry = await asyncio.to_thread(self._hash_entry, name, content, error)
+                if entry['content_hash'] is not None:
+                    entry['existing'] = await self.processor.find_ingested_claims(entry['content_hash'])
+                    if not entry['existing']:
+                        await asyncio.to_thread(self._start_parse, entry, content, executor)
+                pending.append(entry)
+
+                while self._next_ready(pending):
+                    yield await asyncio.to_thread(self._resolve, pending.popleft())
+
+            while pending:
+                yield await asyncio.to_thread(self._resolve, pending.popleft())
+        finally:
+            self._cancel(pending)
+
+    async def _persist(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        result = self._new_result(entry)
+        if result['error']:
+            return result
+
+        started = time.perf_counter()
+
+        existing = entry.get('existing') or await self.processor.find_ingested_claims(entry['content_hash'])
+        if existing:
+            result.update(status='duplicate', claim_ids=[claim.claim_id for claim in existing])
+        elif self.reject_invalid and result['validation_errors']:
+            result.update(status='rejected', error="File failed X12 validation")
+        else:
+            savepoint = await self.db.begin_nested()
+            try:
+                # Compressed in a worker thread, from disk for a local file
+                if 'path' in entry:
+                    chunks = _iter_file_chunks(entry['path'])
+                else:
+                    chunks = iter([entry['text'].encode('utf-8')])
+                raw_x12_hash = await self.processor.payloads.put_stream(chunks)
+                created = await self.processor.create_claims_bulk(entry['claims'], commit=False,
+                                                                  raw_x12_hash=raw_x12_hash)
+                if created['conflicts']:
+                    await savepoint.rollback()
+                    result['error'] = self._conflict_error(created)
+                else:
+                    claim_ids = created['claim_ids']
+                    await self.processor.record_ingested_file(
+                        entry['content_hash'], claim_ids, entry['filename'][:255], entry['size']
+                    )
+                    await savepoint.commit()
+                    result.update(status='created', claims_created=len(claim_ids), claim_ids=claim_ids)
+            except (IntegrityError, ValueError) as e:
+                await savepoint.rollback()
+                result['error'] = self._store_error(e)
+
+        result['persist_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return result
+
+
+def _iter_file_chunks(path: str) -> Iterator[bytes]:
+    """Read a local file FILE_CHUNK_SIZE bytes at a time"""
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(FILE_CHUNK_SIZE), b'')
+
+
+def _parse_entry(text: str) -> Dict[str, Any]:
+    """Worker: parse and validate one file in a single pass, normalizing in batches"""
+    return _parse(lambda parser, validator: ClaimNormalizer().iter_normalized(parser.iter_claims(text, validator)),
+                  lambda parser: parser.parse_837(text))
+
+
+def _parse_file_entry(path: str, encoding: str) -> Dict[str, Any]:
+    """Worker: _parse_entry() for a file on local disk, memory-mapped rather than read"""
+    return _parse(lambda parser, validator: ClaimNormalizer().iter_normalized(
+                      parser.iter_claims_from_file(path, encoding, validator)),
+                  lambda parser: parser.parse_837_file(path, encoding))
+
+
+def _parse(iter_claims: Callable[[X12Parser, X12Validator], Iterable[Dict[str, Any]]],
+           parse_single: Callable[[X12Parser], Dict[str, Any]],
+           validate: Optional[Callable[[X12Parser], Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Parse a file, validated in the same pass unless `validate` runs a
+    separate validation-only pass
+    The parser leaves dates and amounts raw; `iter_claims` yields claims
+    already run through ClaimNormalizer.
+    """
+    started = time.perf_counter()
+    try:
+        parser = X12Parser(normalize=False)
+        validator = X12Validator()
+        claims = list(iter_claims(parser, validator))
+        if not claims:
+            # No CLM loop - same single-claim fallback as the upload endpoint
+            claims = [parse_single(parser)]
+            ClaimNormalizer().normalize(claims)
+        return {
+            'claims': claims,
+            'validation': validator.result() if validate is None else validate(X12Parser()),
+            'parse_seconds': time.perf_counter() - started,
+        }
+    except ValueError as e:
+        return {
+            'claims': [],
+            'parse_error': f"Failed to parse X12 file: {str(e)}",
+            'parse_seconds': time.perf_counter() - started,
+        }
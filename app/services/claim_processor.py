@@ -1,25 +1,106 @@
 """
 Claim Processor - Handles claim creation and adjudication logic
 """
+from sqlalchemy import select, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.claim import Claim, ClaimStatus, ClaimType
+from app.models.ingested_file import IngestedFile
+from app.models.claim_detail import ClaimServiceLine, ClaimDiagnosis
 from app.schemas.claim import ClaimAdjudicationRequest
-from typing import Dict, Any
+from app.services.raw_store import RawPayloadStore, AsyncRawPayloadStore
+from app.services.fee_schedule import FeeSchedule, fee_schedule_cache
+from app.services.rule_engine import RuleEngine, rule_engine
+from app.services.claim_stats import ClaimStatsTracker, AsyncClaimStatsTracker
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple
+import asyncio
+import itertools
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 import random
 
 
 class ClaimProcessor:
     """Process and manage healthcare claims"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, rules: Optional[RuleEngine] = None):
         self.db = db
+        self.payloads = RawPayloadStore(db)
+        self.rules = rules or rule_engine
+        self.stats = ClaimStatsTracker(db)
     
-    def create_claim(self, claim_data: Dict[str, Any], raw_x12: str) -> Claim:
+    def create_claim(self, claim_data: Dict[str, Any], raw_x12: Optional[str], commit: bool = True) -> Claim:
         """
         Create a new claim from parsed X12 data
+        With commit=False the claim is only flushed, so several claims from
+        one file can be persisted in a single transaction
         """
+        claim = self.build_claim(claim_data, self.payloads.put(raw_x12))
+        self.db.add(claim)
+        self.stats.add(claim)
+        self.stats.flush()
+        if commit:
+            self.db.commit()
+            self.db.refresh(claim)
+        else:
+            self.db.flush()
+        
+        return claim
+    
+    def build_claim(self, claim_data: Dict[str, Any], raw_x12_hash: Optional[str]) -> Claim:
+        """
+        Claim object for parsed X12 data, validated but not added to a session
+        `raw_x12_hash` references the original file in the raw payload store
+        """
+        claim = self.claim_row(claim_data, raw_x12_hash)
+        lines, diagnoses = self.detail_rows(claim)
+        return Claim(
+            **claim,
+            lines=[ClaimServiceLine(**line) for line in lines],
+            diagnoses=[ClaimDiagnosis(**diagnosis) for diagnosis in diagnoses]
+        )
+    
+    def claim_row(self, claim_data: Dict[str, Any], raw_x12_hash: Optional[str]) -> Dict[str, Any]:
+        """Validated column values of the claim for parsed X12 data"""
+        claim = self._claim_columns(claim_data, raw_x12_hash)
+        self.validate_rows([claim])
+        return claim
+    
+    def detail_rows(self, claim: Dict[str, Any], claim_pk: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        claim_service_lines and claim_diagnoses rows for a claim's column values
+        `claim_pk` is the claims.id they reference, when already known
+        """
+        reference = {} if claim_pk is None else {'claim_id': claim_pk}
+        lines = [
+            {
+                **reference,
+                'line_number': line.get('line_number') or number,
+                'procedure_code': (line.get('procedure_code') or '')[:10],
+                'modifiers': ','.join(line.get('modifiers') or [])[:11] or None,
+                'service_date': self._parse_date(line.get('service_date')),
+                'units': self._parse_amount(line.get('units'), 1.0),
+                'charge_amount': self._parse_amount(line.get('charge_amount'), 0.0),
+            }
+            for number, line in enumerate(claim['service_lines'] or [], start=1)
+        ]
+        diagnoses = [
+            {**reference, 'position': position, 'code': code[:10]}
+            for position, code in enumerate(claim['diagnosis_codes'] or [], start=1) if code
+        ]
+        return lines, diagnoses
+    
+    def validate_rows(self, claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate a batch of claim column dicts, marking the valid ones VALIDATED"""
+        results = self.rules.evaluate(claims)
+        for claim, result in zip(claims, results):
+            if result['valid']:
+                claim['status'] = ClaimStatus.VALIDATED
+        return results
+    
+    def _claim_columns(self, claim_data: Dict[str, Any], raw_x12_hash: Optional[str]) -> Dict[str, Any]:
         patient = claim_data.get('patient', {})
         provider = claim_data.get('provider', {})
         claim_info = claim_data.get('claim', {})
@@ -31,54 +112,179 @@ class ClaimProcessor:
         parsed_type = claim_data.get('claim_type', '837P')
         claim_type = parsed_type if parsed_type in ['837I', '837P'] else '837P'
         
-        # Create claim object
-        claim = Claim(
-            claim_id=claim_id,
-            claim_type=claim_type,
-            patient_id=patient.get('patient_id', ''),
-            patient_name=patient.get('patient_name', ''),
-            patient_dob=patient.get('patient_dob', ''),
-            patient_gender=patient.get('patient_gender', ''),
-            provider_id=provider.get('provider_id', ''),
-            provider_name=provider.get('provider_name', ''),
-            provider_npi=provider.get('provider_npi', ''),
-            service_date=claim_info.get('service_date', ''),
-            admission_date=claim_info.get('admission_date', ''),
-            discharge_date=claim_info.get('discharge_date', ''),
-            total_charges=claim_info.get('total_charges', 0.0),
-            service_lines=claim_data.get('service_lines', []),
-            diagnosis_codes=claim_data.get('diagnosis_codes', []),
-            procedure_codes=[line.get('procedure_code', '') for line in claim_data.get('service_lines', [])],
-            status=ClaimStatus.RECEIVED,
-            raw_x12_data=raw_x12
-        )
+        claim = {
+            'claim_id': claim_id,
+            'claim_type': claim_type,
+            'patient_id': patient.get('patient_id', ''),
+            'patient_name': patient.get('patient_name', ''),
+            'patient_dob': patient.get('patient_dob', ''),
+            'patient_gender': patient.get('patient_gender', ''),
+            'provider_id': provider.get('provider_id', ''),
+            'provider_name': provider.get('provider_name', ''),
+            'provider_npi': provider.get('provider_npi', ''),
+            'service_date': self._parse_date(claim_info.get('service_date')),
+            'admission_date': self._parse_date(claim_info.get('admission_date')),
+            'discharge_date': self._parse_date(claim_info.get('discharge_date')),
+            'total_charges': claim_info.get('total_charges', 0.0),
+            'service_lines': claim_data.get('service_lines', []),
+            'diagnosis_codes': claim_data.get('diagnosis_codes', []),
+            'procedure_codes': [line.get('procedure_code', '') for line in claim_data.get('service_lines', [])],
+            'status': ClaimStatus.RECEIVED,
+            'raw_x12_hash': raw_x12_hash
+        }
         
-        # Validate claim
-        validation_result = self._validate_claim(claim)
-        if validation_result['valid']:
-            claim.status = ClaimStatus.VALIDATED
+        return claim
+    
+    def create_claims_bulk(self, claims_data: Iterable[Dict[str, Any]], raw_x12: Optional[str] = None,
+                           batch_size: Optional[int] = None, commit: bool = True,
+                           raw_x12_hash: Optional[str] = None) -> Dict[str, List]:
+        """
+        Validate and insert many claims with multi-row INSERT statements
+        Claims are sent `batch_size` (BULK_COMMIT_SIZE) at a time and
+        committed after each batch unless commit=False. A claim whose
+        claim_id already exists is skipped by ON CONFLICT DO NOTHING and
+        reported instead of raising. Returns the database ids and claim IDs
+        of the inserted claims, in input order, and the conflicting claim IDs.
+        A payload already stored (put_stream) is referenced by raw_x12_hash.
+        """
+        if raw_x12 is not None:
+            raw_x12_hash = self.payloads.put(raw_x12)
+        self.db.flush()  # The payload row must exist before claims reference it
+        result = {'ids': [], 'claim_ids': [], 'conflicts': []}
+        statement = self._insert_claims_statement()
+        for rows in self._iter_claim_rows(claims_data, raw_x12_hash, batch_size):
+            returned = self.db.execute(statement, rows).all()
+            inserted = self._collect_inserted(rows, returned, result)
+            for detail_statement, detail_rows in self._insert_details_statements(inserted):
+                self.db.execute(detail_statement, detail_rows)
+            for _, row in inserted:
+                self.stats.add(row)
+            self.stats.flush()
+            if commit:
+                self.db.commit()
+        return result
+    
+    def _iter_claim_rows(self, claims_data: Iterable[Dict[str, Any]], raw_x12_hash: Optional[str],
+                         batch_size: Optional[int]) -> Iterator[List[Dict[str, Any]]]:
+        batch_size = batch_size or settings.BULK_COMMIT_SIZE
+        claims_data = iter(claims_data)
+        while True:
+            rows = [self._claim_columns(claim_data, raw_x12_hash) for claim_data in itertools.islice(claims_data, batch_size)]
+            if not rows:
+                return
+            self.validate_rows(rows)
+            yield rows
+    
+    def _insert_claims_statement(self):
+        """INSERT ... ON CONFLICT (claim_id) DO NOTHING RETURNING id, claim_id for the session's database"""
+        table = Claim.__table__
+        dialect = self.db.get_bind().dialect.name
+        if dialect == 'postgresql':
+            statement = postgresql.insert(table).on_conflict_do_nothing(index_elements=[table.c.claim_id])
+        elif dialect == 'sqlite':
+            statement = sqlite.insert(table).on_conflict_do_nothing(index_elements=[table.c.claim_id])
+        else:
+            statement = insert(table)  # Conflicts raise IntegrityError
+        return statement.returning(table.c.id, table.c.claim_id)
+    
+    def _collect_inserted(self, rows: List[Dict[str, Any]], returned: List[Any],
+                          result: Dict[str, List]) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Match RETURNING rows back to the input order; rows with no match conflicted
+        Returns (id, row) of each inserted claim
+        """
+        returned_ids = {claim_id: row_id for row_id, claim_id in returned}
+        inserted = []
+        for row in rows:
+            row_id = returned_ids.pop(row['claim_id'], None)
+            if row_id is None:
+                # Already in the table, or repeated within this batch
+                result['conflicts'].append(row['claim_id'])
+            else:
+                result['ids'].append(row_id)
+                result['claim_ids'].append(row['claim_id'])
+                inserted.append((row_id, row))
+        return inserted
+    
+    def _insert_details_statements(self, inserted: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[Any, List[Dict[str, Any]]]]:
+        """Executemany INSERTs of the service line and diagnosis rows of inserted claims"""
+        lines, diagnoses = [], []
+        for row_id, row in inserted:
+            claim_lines, claim_diagnoses = self.detail_rows(row, row_id)
+            lines.extend(claim_lines)
+            diagnoses.extend(claim_diagnoses)
+        statements = []
+        if lines:
+            statements.append((insert(ClaimServiceLine.__table__), lines))
+        if diagnoses:
+            statements.append((insert(ClaimDiagnosis.__table__), diagnoses))
+        return statements
+    
+    def find_ingested_claims(self, content_hash: str) -> Optional[List[Claim]]:
+        """
+        Claims already created from a file with this content hash, in file
+        order, or None if the file has not been ingested. A record whose
+        claims have all been deleted is dropped so the file can be ingested again.
+        """
+        ingested = self.db.query(IngestedFile).filter(IngestedFile.content_hash == content_hash).first()
+        if ingested is None:
+            return None
         
-        self.db.add(claim)
-        self.db.commit()
-        self.db.refresh(claim)
+        claims = self.db.query(Claim).filter(Claim.claim_id.in_(ingested.claim_ids)).all()
+        if not claims:
+            self.db.delete(ingested)
+            self.db.flush()
+            return None
         
-        return claim
+        order = {claim_id: index for index, claim_id in enumerate(ingested.claim_ids)}
+        return sorted(claims, key=lambda claim: order[claim.claim_id])
+    
+    def record_ingested_file(self, content_hash: str, claim_ids: List[str],
+                             filename: Optional[str] = None, size_bytes: Optional[int] = None) -> IngestedFile:
+        """Remember which claims a file created; flushed with the claims' transaction"""
+        ingested = IngestedFile(
+            content_hash=content_hash,
+            filename=filename,
+            size_bytes=size_bytes,
+            claim_ids=claim_ids
+        )
+        self.db.add(ingested)
+        self.db.flush()
+        return ingested
     
     def adjudicate_claim(self, claim: Claim, adjudication: ClaimAdjudicationRequest) -> Claim:
         """
         Adjudicate a claim - approve or deny
         """
+        before = self.stats.snapshot(claim)
+        self.apply_adjudication(claim, adjudication, fee_schedule_cache.get(self.db))
+        self.stats.change(before, claim)
+        self.stats.flush()
+        self.db.commit()
+        self.db.refresh(claim)
+        
+        return claim
+    
+    def apply_adjudication(self, claim: Claim, adjudication: ClaimAdjudicationRequest,
+                           schedule: Optional[FeeSchedule] = None) -> None:
+        """Set the decision, amounts and adjudication result on a claim"""
         if adjudication.approve:
             # Approve claim
             claim.status = ClaimStatus.ADJUDICATED
+            pricing = None
             
-            # Calculate allowed amount (simulate some adjustments)
+            # Calculate allowed amount
             if adjudication.paid_amount is not None:
                 claim.paid_amount = adjudication.paid_amount
                 claim.allowed_amount = adjudication.paid_amount
+            elif schedule is not None:
+                # Reprice each service line against the fee schedule
+                pricing = schedule.price([(claim.service_lines, claim.provider_id)])[0]
+                claim.allowed_amount = pricing['allowed_amount']
+                claim.paid_amount = claim.allowed_amount
             else:
-                # Apply typical adjustment (e.g., 80% of charges)
-                claim.allowed_amount = claim.total_charges * 0.80
+                # No fee schedule published: allow a flat share of charges
+                claim.allowed_amount = claim.total_charges * settings.DEFAULT_ALLOWED_PERCENTAGE
                 claim.paid_amount = claim.allowed_amount
             
             # Create adjudication result
@@ -90,6 +296,9 @@ class ClaimProcessor:
                 'adjustment_reason': 'Contractual adjustment',
                 'adjustment_codes': adjudication.adjustment_codes or ['CO-45']
             }
+            if pricing is not None:
+                claim.adjudication_result['fee_schedule_version'] = schedule.version
+                claim.adjudication_result['line_pricing'] = pricing['line_pricing']
         else:
             # Deny claim
             claim.status = ClaimStatus.DENIED
@@ -103,47 +312,28 @@ class ClaimProcessor:
                 'denial_reason': claim.denial_reason,
                 'denial_codes': adjudication.adjustment_codes or ['CO-96']
             }
-        
-        self.db.commit()
-        self.db.refresh(claim)
-        
-        return claim
     
-    def _validate_claim(self, claim: Claim) -> Dict[str, Any]:
+    def _parse_date(self, value: Any) -> Optional[date]:
+        """Parser dates are YYYY-MM-DD strings; empty or malformed dates are stored as NULL"""
+        if isinstance(value, date) or not value:
+            return value or None
+        try:
+            return date.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+    
+    def _parse_amount(self, value: Any, default: float) -> float:
+        """Units and charges are strings when the parser ran without normalization"""
+        try:
+            return float(value) if value not in (None, '') else default
+        except (TypeError, ValueError):
+            return default
+    
+    def _validate_claim(self, claim: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Validate claim data for completeness and business rules
+        Validate claim column values for completeness and business rules
         """
-        errors = []
-        warnings = []
-        
-        # Required fields validation
-        if not claim.patient_id:
-            errors.append("Missing patient ID")
-        
-        if not claim.provider_id:
-            errors.append("Missing provider ID")
-        
-        if not claim.diagnosis_codes or len(claim.diagnosis_codes) == 0:
-            errors.append("Missing diagnosis codes")
-        
-        if not claim.service_lines or len(claim.service_lines) == 0:
-            errors.append("Missing service lines")
-        
-        if claim.total_charges <= 0:
-            errors.append("Total charges must be greater than zero")
-        
-        # Business rules validation
-        if claim.patient_name and len(claim.patient_name) < 3:
-            warnings.append("Patient name seems incomplete")
-        
-        if claim.diagnosis_codes and len(claim.diagnosis_codes) > 12:
-            warnings.append("Unusual number of diagnosis codes (>12)")
-        
-        return {
-            'valid': len(errors) == 0,
-            'errors': errors,
-            'warnings': warnings
-        }
+        return self.rules.evaluate([claim])[0]
     
     def calculate_claim_totals(self, claim: Claim) -> Dict[str, float]:
         """
@@ -158,3 +348,97 @@ class ClaimProcessor:
             'total_charges': total_charges,
             'line_count': len(claim.service_lines)
         }
+
+
+class AsyncClaimProcessor(ClaimProcessor):
+    """
+    ClaimProcessor for request handlers holding an AsyncSession
+    Same rules and results; every method that touches the database is a
+    coroutine. create_claim(commit=False) only adds the claim - the session
+    flushes all of a file's claims in one round trip when it commits.
+    """
+    
+    def __init__(self, db: AsyncSession, rules: Optional[RuleEngine] = None):
+        self.db = db
+        self.payloads = AsyncRawPayloadStore(db)
+        self.rules = rules or rule_engine
+        self.stats = AsyncClaimStatsTracker(db)
+    
+    async def create_claim(self, claim_data: Dict[str, Any], raw_x12: Optional[str], commit: bool = True) -> Claim:
+        """Create a new claim from parsed X12 data"""
+        claim = self.build_claim(claim_data, await self.payloads.put(raw_x12))
+        self.db.add(claim)
+        self.stats.add(claim)
+        await self.stats.flush()
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(claim)
+        return claim
+    
+    async def create_claims_bulk(self, claims_data: Iterable[Dict[str, Any]], raw_x12: Optional[str] = None,
+                                 batch_size: Optional[int] = None, commit: bool = True,
+                                 raw_x12_hash: Optional[str] = None) -> Dict[str, List]:
+        """
+        Validate and insert many claims with multi-row INSERT statements
+        Each batch is pulled from `claims_data` - typically a lazy parse -
+        turned into rows and validated in a worker thread, so the event loop
+        only awaits the INSERTs.
+        """
+        if raw_x12 is not None:
+            raw_x12_hash = await self.payloads.put(raw_x12)
+        await self.db.flush()
+        result = {'ids': [], 'claim_ids': [], 'conflicts': []}
+        statement = self._insert_claims_statement()
+        batches = self._iter_claim_rows(claims_data, raw_x12_hash, batch_size)
+        while True:
+            rows = await asyncio.to_thread(next, batches, None)
+            if rows is None:
+                break
+            returned = (await self.db.execute(statement, rows)).all()
+            inserted = self._collect_inserted(rows, returned, result)
+            for detail_statement, detail_rows in self._insert_details_statements(inserted):
+                await self.db.execute(detail_statement, detail_rows)
+            for _, row in inserted:
+                self.stats.add(row)
+            await self.stats.flush()
+            if commit:
+                await self.db.commit()
+        return result
+    
+    async def find_ingested_claims(self, content_hash: str) -> Optional[List[Claim]]:
+        """Claims already created from a file with this content hash, in file order"""
+        ingested = await self.db.scalar(select(IngestedFile).where(IngestedFile.content_hash == content_hash))
+        if ingested is None:
+            return None
+        
+        claims = (await self.db.scalars(select(Claim).where(Claim.claim_id.in_(ingested.claim_ids)))).all()
+        if not claims:
+            await self.db.delete(ingested)
+            await self.db.flush()
+            return None
+        
+        order = {claim_id: index for index, claim_id in enumerate(ingested.claim_ids)}
+        return sorted(claims, key=lambda claim: order[claim.claim_id])
+    
+    async def record_ingested_file(self, content_hash: str, claim_ids: List[str],
+                                   filename: Optional[str] = None, size_bytes: Optional[int] = None) -> IngestedFile:
+        """Remember which claims a file created; flushed with the claims' transaction"""
+        ingested = IngestedFile(
+            content_hash=content_hash,
+            filename=filename,
+            size_bytes=size_bytes,
+            claim_ids=claim_ids
+        )
+        self.db.add(ingested)
+        await self.db.flush()
+        return ingested
+    
+    async def adjudicate_claim(self, claim: Claim, adjudication: ClaimAdjudicationRequest) -> Claim:
+        """Adjudicate a claim - approve or deny"""
+        before = self.stats.snapshot(claim)
+        self.apply_adjudication(claim, adjudication, await fee_schedule_cache.get_async(self.db))
+        self.stats.change(before, claim)
+        await self.stats.flush()
+        await self.db.commit()
+        await self.db.refresh(claim)
+        return claim
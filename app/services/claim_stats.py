@@ -0,0 +1,170 @@
+"""
+Claim Stats - Incrementally maintained claim counts and amounts behind GET /claims/stats
+"""
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.claim_summary import ClaimSummary, UNKNOWN_SERVICE_DATE
+
+# (provider_id, service_date, status) of a claim_summary row
+SummaryKey = Tuple[str, date, str]
+
+# Columns GET /claims/stats can group by
+GROUP_COLUMNS = {
+    'provider': ClaimSummary.provider_id,
+    'service_date': ClaimSummary.service_date,
+}
+
+
+# Claim columns a summary row depends on
+SNAPSHOT_FIELDS = ['provider_id', 'service_date', 'status', 'total_charges', 'paid_amount']
+
+
+def summary_key(provider_id: Optional[str], service_date: Optional[date], status: Any) -> SummaryKey:
+    return (provider_id or '', service_date or UNKNOWN_SERVICE_DATE, getattr(status, 'value', status))
+
+
+class ClaimStatsTracker:
+    """
+    Collect changes to claims and apply them to claim_summary
+
+    Callers record a claim as it is created (add), deleted (remove) or
+    changed (snapshot before, change after). flush() writes the net
+    change per summary row as one upsert in the caller's transaction, so
+    the summary commits or rolls back together with the claims.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._deltas: Dict[SummaryKey, List[float]] = {}
+
+    def add(self, claim: Any, sign: int = 1) -> None:
+        """Count a claim (a Claim or a dict of its column values); sign=-1 uncounts it"""
+        key, charges, paid = self.snapshot(claim)
+        self.add_group(key, sign, sign * charges, sign * paid)
+
+    def remove(self, claim: Any) -> None:
+        self.add(claim, -1)
+
+    def snapshot(self, claim: Any) -> Tuple[SummaryKey, float, float]:
+        """The summary key and amounts a claim counts towards right now"""
+        values = claim if isinstance(claim, dict) else {name: getattr(claim, name) for name in SNAPSHOT_FIELDS}
+        key = summary_key(values.get('provider_id'), values.get('service_date'), values.get('status'))
+        return key, values.get('total_charges') or 0.0, values.get('paid_amount') or 0.0
+
+    def change(self, before: Tuple[SummaryKey, float, float], claim: Any) -> None:
+        """Move a claim from its snapshot() taken before an update to its current values"""
+        key, charges, paid = before
+        self.add_group(key, -1, -charges, -paid)
+        self.add(claim)
+
+    def add_group(self, key: SummaryKey, claims: int, charges: float, paid: float) -> None:
+        delta = self._deltas.setdefault(key, [0, 0.0, 0.0])
+        delta[0] += claims
+        delta[1] += charges
+        delta[2] += paid
+
+    def flush(self) -> None:
+        rows = self._pending()
+        if rows:
+            self.db.execute(self._upsert_statement(), rows)
+
+    def _pending(self) -> List[Dict[str, Any]]:
+        rows = [
+            {
+                'provider_id': provider_id,
+                'service_date': service_date,
+                'status': status,
+                'claim_count': claims,
+                'total_charges': charges,
+                'paid_amount': paid,
+            }
+            for (provider_id, service_date, status), (claims, charges, paid) in self._deltas.items()
+            if claims or charges or paid
+        ]
+        self._deltas = {}
+        return rows
+
+    def _upsert_statement(self):
+        """INSERT ... ON CONFLICT (key) DO UPDATE adding the deltas"""
+        table = ClaimSummary.__table__
+        dialect = sqlite if self.db.get_bind().dialect.name == 'sqlite' else postgresql
+        statement = dialect.insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=[table.c.provider_id, table.c.service_date, table.c.status],
+            set_={
+                'claim_count': table.c.claim_count + statement.excluded.claim_count,
+                'total_charges': table.c.total_charges + statement.excluded.total_charges,
+                'paid_amount': table.c.paid_amount + statement.excluded.paid_amount,
+            }
+        )
+
+
+class AsyncClaimStatsTracker(ClaimStatsTracker):
+    """ClaimStatsTracker for an AsyncSession"""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db)
+
+    async def flush(self) -> None:
+        rows = self._pending()
+        if rows:
+            await self.db.execute(self._upsert_statement(), rows)
+
+
+async def claim_stats(db: AsyncSession, group_by: Optional[str] = None, provider_id: Optional[str] = None,
+                      service_date_from: Optional[date] = None,
+                      service_date_to: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Counts by status and charge/paid totals from claim_summary
+    The work is proportional to the number of summary rows selected
+    (providers x service dates x statuses), not to the number of claims.
+    """
+    group_column = GROUP_COLUMNS[group_by] if group_by else None
+    columns = [ClaimSummary.status, func.sum(ClaimSummary.claim_count),
+               func.sum(ClaimSummary.total_charges), func.sum(ClaimSummary.paid_amount)]
+    query = select(*([group_column] if group_column is not None else []), *columns)
+    if provider_id:
+        query = query.where(ClaimSummary.provider_id == provider_id)
+    if service_date_from:
+        query = query.where(ClaimSummary.service_date >= service_date_from)
+    if service_date_to:
+        query = query.where(ClaimSummary.service_date <= service_date_to)
+    group_columns = ([group_column] if group_column is not None else []) + [ClaimSummary.status]
+    query = query.group_by(*group_columns).order_by(*group_columns)
+
+    overall = _empty_stats()
+    groups: Dict[Any, Dict[str, Any]] = {}
+    for row in (await db.execute(query)).all():
+        if group_column is not None:
+            key, status, claims, charges, paid = row
+            if key == UNKNOWN_SERVICE_DATE:
+                key = None
+            stats = groups.setdefault(key, _empty_stats())
+            _count(stats, status, claims, charges, paid)
+        else:
+            status, claims, charges, paid = row
+        _count(overall, status, claims, charges, paid)
+
+    if group_column is not None:
+        overall['groups'] = [{'key': key, **stats} for key, stats in groups.items() if stats['total_claims']]
+    return overall
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return {'total_claims': 0, 'total_charges': 0.0, 'total_paid': 0.0, 'by_status': {}}
+
+
+def _count(stats: Dict[str, Any], status: str, claims: int, charges: float, paid: float) -> None:
+    if not claims:
+        return
+    charges, paid = round(charges or 0.0, 2), round(paid or 0.0, 2)
+    stats['by_status'][status] = {'claims': claims, 'total_charges': charges, 'total_paid': paid}
+    stats['total_claims'] += claims
+    stats['total_charges'] = round(stats['total_charges'] + charges, 2)
+    stats['total_paid'] = round(stats['total_paid'] + paid, 2)
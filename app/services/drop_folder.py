@@ -0,0 +1,188 @@
+"""
+Drop Folder - Batch ingestion of 837 files dropped into a directory (e.g. by SFTP)
+"""
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+import json
+import os
+import tarfile
+import time
+import zipfile
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.bulk_ingest import BulkIngestor, iter_local_entries, X12_EXTENSIONS, ARCHIVE_EXTENSIONS
+
+CHECKPOINT_NAME = '.ingest-checkpoint.jsonl'
+DONE_DIR = 'done'
+FAILED_DIR = 'failed'
+
+
+class DropFolderIngestor:
+    """
+    Ingest every X12 file or archive in a drop folder
+
+    Files are parsed in BulkIngestor's process pool and persisted in
+    batches. Once the batch holding a file's last claims is committed, the
+    file is appended to a checkpoint in the folder and moved to done/, or
+    to failed/ if any of its entries failed or was rejected. A run that
+    dies between a commit and the moves finishes them from the checkpoint
+    on the next run; uncommitted files are simply parsed again, and content
+    hashes keep partly committed archives from being stored twice. Files
+    with other extensions (e.g. SFTP .part files) are left alone.
+    """
+
+    def __init__(self, db: Session, directory: Optional[str] = None, workers: Optional[int] = None,
+                 batch_size: Optional[int] = None, reject_invalid: bool = False,
+                 max_size: Optional[int] = None):
+        self.db = db
+        if directory is None:
+            directory = os.path.join(settings.UPLOAD_DIR, 'incoming')
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.reject_invalid = reject_invalid
+        # Dropped files do not pass through the upload endpoint, so the bulk limit applies
+        self.max_size = settings.MAX_BULK_UPLOAD_SIZE if max_size is None else max_size
+        self.checkpoint_path = os.path.join(self.directory, CHECKPOINT_NAME)
+
+    def scan(self) -> List[str]:
+        """Names of the files waiting in the folder, in name order"""
+        return sorted(
+            entry.name for entry in os.scandir(self.directory)
+            if entry.is_file() and not entry.name.startswith('.')
+            and entry.name.lower().endswith(X12_EXTENSIONS + ARCHIVE_EXTENSIONS)
+        )
+
+    def run(self, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Ingest and move every waiting file
+        Returns counts and throughput for the run. `progress` is called with
+        each entry's BulkIngestor result.
+        """
+        started = time.perf_counter()
+        summary = {'files': 0, 'done': 0, 'failed': 0, 'resumed': 0, 'entries': 0,
+                   'claims_created': 0, 'bytes': 0}
+
+        checkpoint = self._load_checkpoint()
+        sources = {}
+        for name in self.scan():
+            stat = os.stat(os.path.join(self.directory, name))
+            recorded = checkpoint.get((name, stat.st_size, stat.st_mtime_ns))
+            if recorded is not None:
+                # Committed by an earlier run that stopped before moving it
+                self._move(name, recorded['status'])
+                summary['resumed'] += 1
+                continue
+            sources[name] = {'file': name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'results': []}
+
+        finished = []  # Sources whose entries are all persisted, awaiting a commit
+        current = None
+
+        def on_result(result: Dict[str, Any]) -> None:
+            nonlocal current
+            source = sources[result['filename'].split('/', 1)[0]]
+            if current is not None and source is not current:
+                finished.append(current)
+            current = source
+            source['results'].append(result)
+            if progress is not None:
+                progress(result)
+
+        def on_commit() -> None:
+            self._finish(finished, summary)
+            finished.clear()
+
+        ingestor = BulkIngestor(self.db, workers=self.workers, batch_size=self.batch_size,
+                                reject_invalid=self.reject_invalid)
+        ingestor.ingest(self._iter_entries(sources), on_result, on_commit)
+        if current is not None:
+            self._finish([current], summary)
+
+        if os.path.exists(self.checkpoint_path):
+            # Every recorded file has been moved
+            os.unlink(self.checkpoint_path)
+
+        elapsed = time.perf_counter() - started
+        summary.update(
+            seconds=round(elapsed, 3),
+            files_per_s=round(summary['files'] / elapsed, 1),
+            claims_per_s=round(summary['claims_created'] / elapsed, 1),
+            mb_per_s=round(summary['bytes'] / elapsed / 1e6, 3),
+        )
+        return summary
+
+    def _iter_entries(self, sources: Dict[str, Dict[str, Any]]) -> Iterator[Tuple[str, Any, Optional[str]]]:
+        """BulkIngestor entries for each source; every source yields at least one"""
+        for name in sources:
+            count = 0
+            try:
+                # Plain X12 files are parsed in place, never read into memory whole
+                for entry in iter_local_entries(name, os.path.join(self.directory, name), self.max_size):
+                    count += 1
+                    yield entry
+            except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+                count += 1
+                yield name, None, f"Unreadable archive: {str(e)}"
+            if not count:
+                yield name, None, "No X12 files found in archive"
+
+    def _finish(self, sources: List[Dict[str, Any]], summary: Dict[str, Any]) -> None:
+        """Checkpoint committed sources, then move them out of the folder"""
+        if not sources:
+            return
+        records = []
+        for source in sources:
+            failed = any(result['status'] in ('failed', 'rejected') for result in source['results'])
+            records.append({
+                'file': source['file'],
+                'size': source['size'],
+                'mtime_ns': source['mtime_ns'],
+                'status': FAILED_DIR if failed else DONE_DIR,
+                'claims_created': sum(result['claims_created'] for result in source['results']),
+                'errors': [
+                    f"{result['filename']}: {result['error']}"
+                    for result in source['results'] if result['error']
+                ],
+            })
+
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        for source, record in zip(sources, records):
+            self._move(record['file'], record['status'])
+            summary['files'] += 1
+            summary[record['status']] += 1
+            summary['entries'] += len(source['results'])
+            summary['claims_created'] += record['claims_created']
+            summary['bytes'] += record['size']
+
+    def _load_checkpoint(self) -> Dict[Tuple[str, int, int], Dict[str, Any]]:
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        records = {}
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line of a crashed write
+                records[(record['file'], record['size'], record['mtime_ns'])] = record
+        return records
+
+    def _move(self, name: str, status: str) -> str:
+        """Move a file into done/ or failed/ without overwriting an earlier one"""
+        target_dir = os.path.join(self.directory, status)
+        os.makedirs(target_dir, exist_ok=True)
+        root, ext = os.path.splitext(name)
+        target = os.path.join(target_dir, name)
+        suffix = 1
+        while os.path.exists(target):
+            target = os.path.join(target_dir, f"{root}.{suffix}{ext}")
+            suffix += 1
+        os.replace(os.path.join(self.directory, name), target)
+        return target
@@ -0,0 +1,191 @@
+"""
+Fee Schedule - Per-line repricing of service lines against the published fee schedule
+"""
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+import time
+
+import numpy as np
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.models.fee_schedule import FeeScheduleVersion, FeeScheduleEntry
+
+# (procedure_code, modifier, provider_id, allowed_amount per unit)
+EntryRow = Tuple[str, str, str, float]
+
+
+class FeeSchedule:
+    """
+    One version of the fee schedule, indexed for lookup by line
+
+    A line is priced by the most specific entry for its procedure code:
+    code + modifier + provider, code + modifier, code + provider, then the
+    code alone. The allowed amount is the rate times the units, capped at
+    the line charge; lines with no entry are allowed a share of their charge.
+    """
+
+    def __init__(self, version: int, entries: Iterable[EntryRow]):
+        self.version = version
+        self._rates: Dict[Tuple[str, str, str], float] = {
+            (code, modifier or '', provider_id or ''): float(amount)
+            for code, modifier, provider_id, amount in entries
+        }
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+    def rate(self, procedure_code: str, modifier: str = '', provider_id: str = '') -> Optional[float]:
+        """Allowed amount per unit from the most specific matching entry"""
+        for key in ((procedure_code, modifier, provider_id), (procedure_code, modifier, ''),
+                    (procedure_code, '', provider_id), (procedure_code, '', '')):
+            rate = self._rates.get(key)
+            if rate is not None:
+                return rate
+        return None
+
+    def price(self, claims: List[Tuple[List[Dict[str, Any]], Optional[str]]],
+              default_percentage: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Price the service lines of many claims in one pass
+        `claims` holds (service_lines, provider_id) pairs; returns one
+        {'allowed_amount', 'line_pricing'} per claim, in the same order.
+        """
+        if default_percentage is None:
+            default_percentage = settings.DEFAULT_ALLOWED_PERCENTAGE
+
+        claim_index, rates, units, charges, codes = [], [], [], [], []
+        for index, (service_lines, provider_id) in enumerate(claims):
+            provider_id = provider_id or ''
+            for line in service_lines or []:
+                code = line.get('procedure_code') or ''
+                modifiers = line.get('modifiers') or ['']
+                rate = self.rate(code, modifiers[0], provider_id)
+                claim_index.append(index)
+                rates.append(np.nan if rate is None else rate)
+                units.append(_number(line.get('units'), 1.0))
+                charges.append(_number(line.get('charge_amount'), 0.0))
+                codes.append(code)
+
+        rates = np.array(rates, dtype=float)
+        charges = np.array(charges, dtype=float)
+        scheduled = ~np.isnan(rates)
+        allowed = np.where(
+            scheduled,
+            np.minimum(charges, np.nan_to_num(rates) * np.array(units, dtype=float)),
+            charges * default_percentage,
+        ).round(2)
+        totals = np.bincount(np.array(claim_index, dtype=int), weights=allowed, minlength=len(claims)).round(2)
+
+        results = [{'allowed_amount': float(total), 'line_pricing': []} for total in totals]
+        for index, code, charge, line_allowed, from_schedule in zip(
+                claim_index, codes, charges.tolist(), allowed.tolist(), scheduled.tolist()):
+            results[index]['line_pricing'].append({
+                'procedure_code': code,
+                'charge_amount': charge,
+                'allowed_amount': line_allowed,
+                'source': 'fee_schedule' if from_schedule else 'default',
+            })
+        return results
+
+
+class FeeScheduleCache:
+    """
+    The current FeeSchedule, held in process
+
+    get() serves the cached schedule and, at most every `check_interval`
+    seconds, asks the database for the latest version, reloading the
+    entries only when it has changed. publish() writes a new version and
+    invalidates the cache so this process picks it up on its next get();
+    other processes see it within one check interval.
+    """
+
+    def __init__(self, check_interval: Optional[float] = None):
+        self.check_interval = settings.FEE_SCHEDULE_CHECK_INTERVAL if check_interval is None else check_interval
+        self._schedule: Optional[FeeSchedule] = None
+        self._checked_at: Optional[float] = None
+
+    def invalidate(self) -> None:
+        self._schedule = None
+        self._checked_at = None
+
+    def get(self, db: Session) -> Optional[FeeSchedule]:
+        """The latest published schedule, or None if none has been published"""
+        if self._fresh():
+            return self._schedule
+        version = db.scalar(self._latest_version())
+        if not self._current(version):
+            entries = db.execute(self._entries(version)).all() if version is not None else []
+            self._load(version, entries)
+        return self._schedule
+
+    async def get_async(self, db: AsyncSession) -> Optional[FeeSchedule]:
+        """get() for an AsyncSession"""
+        if self._fresh():
+            return self._schedule
+        version = await db.scalar(self._latest_version())
+        if not self._current(version):
+            entries = (await db.execute(self._entries(version))).all() if version is not None else []
+            self._load(version, entries)
+        return self._schedule
+
+    async def publish(self, db: AsyncSession, entries: List[Dict[str, Any]],
+                      description: Optional[str] = None) -> FeeScheduleVersion:
+        """
+        Store entries as the next schedule version and make it current
+        The version row is the primary key, so of two concurrent publishes
+        one fails with an IntegrityError instead of both taking the number.
+        """
+        version = (await db.scalar(self._latest_version()) or 0) + 1
+        published = FeeScheduleVersion(version=version, description=description, entry_count=len(entries))
+        db.add(published)
+        await db.flush()
+        if entries:
+            await db.execute(insert(FeeScheduleEntry), [
+                {
+                    'version': version,
+                    'procedure_code': entry['procedure_code'],
+                    'modifier': entry.get('modifier') or '',
+                    'provider_id': entry.get('provider_id') or '',
+                    'allowed_amount': entry['allowed_amount'],
+                }
+                for entry in entries
+            ])
+        await db.commit()
+        self.invalidate()
+        return published
+
+    def _fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    def _current(self, version: Optional[int]) -> bool:
+        self._checked_at = time.monotonic()
+        loaded = self._schedule.version if self._schedule is not None else None
+        return version == loaded
+
+    def _load(self, version: Optional[int], entries: Iterable[EntryRow]) -> None:
+        self._schedule = FeeSchedule(version, entries) if version is not None else None
+
+    def _latest_version(self):
+        return select(func.max(FeeScheduleVersion.version))
+
+    def _entries(self, version: int):
+        return select(
+            FeeScheduleEntry.procedure_code,
+            FeeScheduleEntry.modifier,
+            FeeScheduleEntry.provider_id,
+            FeeScheduleEntry.allowed_amount,
+        ).where(FeeScheduleEntry.version == version)
+
+
+def _number(value: Any, default: float) -> float:
+    """Units and charges may be unparsed strings when the parser ran without normalization"""
+    try:
+        return float(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return default
+
+
+fee_schedule_cache = FeeScheduleCache()
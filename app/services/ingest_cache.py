@@ -0,0 +1,114 @@
+"""
+Ingest Cache - Content hashing and parse-result caching for duplicate uploads
+"""
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+import hashlib
+import threading
+
+from app.core.config import settings
+from app.services.x12_parser import ISA_SEGMENT_LENGTH
+
+
+class X12ContentHasher:
+    """
+    Incremental SHA-256 of an X12 file's normalized bytes
+
+    Line breaks between segments are dropped before hashing, so the same
+    interchange resent with CRLF, LF or no line endings hashes identically.
+    When the ISA header declares CR or LF as the segment terminator the
+    bytes are hashed unchanged.
+    """
+
+    LINE_BREAKS = b'\r\n'
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self._head = b''  # Bytes held back until the ISA header is complete
+        self._strip_line_breaks = None
+        self.size = 0
+
+    def update(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self._strip_line_breaks is None:
+            self._head += chunk
+            if len(self._head) < ISA_SEGMENT_LENGTH:
+                return
+            chunk, self._head = self._head, b''
+            self._strip_line_breaks = self._detect(chunk)
+        self._digest(chunk)
+
+    def hexdigest(self) -> str:
+        if self._strip_line_breaks is None:
+            # Shorter than an ISA header - hash what arrived
+            head, self._head = self._head, b''
+            self._strip_line_breaks = self._detect(head)
+            self._digest(head)
+        return self._hash.hexdigest()
+
+    def _digest(self, chunk: bytes) -> None:
+        self._hash.update(chunk.translate(None, self.LINE_BREAKS) if self._strip_line_breaks else chunk)
+
+    def _detect(self, head: bytes) -> bool:
+        """Whether line breaks are formatting rather than the segment terminator"""
+        if not head.startswith(b'ISA'):
+            return False
+        return len(head) < ISA_SEGMENT_LENGTH or head[ISA_SEGMENT_LENGTH - 1:ISA_SEGMENT_LENGTH] not in (b'\r', b'\n')
+
+
+def content_hash(content: bytes) -> str:
+    """Normalized SHA-256 of a whole file held in memory"""
+    hasher = X12ContentHasher()
+    hasher.update(content)
+    return hasher.hexdigest()
+
+
+def file_content_hash(path: str, chunk_size: int = 1048576) -> str:
+    """Normalized SHA-256 of a file on local disk, read chunk by chunk"""
+    hasher = X12ContentHasher()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ParseCache:
+    """
+    Bounded, thread-safe LRU of parsed claims keyed by content hash
+
+    Files with more than `max_claims` claims are not cached, so one large
+    interchange cannot evict everything else or pin its claims in memory.
+    """
+
+    def __init__(self, maxsize: int = 128, max_claims: int = 10000):
+        self.maxsize = maxsize
+        self.max_claims = max_claims
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is not None:
+                self._entries.move_to_end(key)
+            return claims
+
+    def put(self, key: str, claims: List[Dict[str, Any]]) -> None:
+        if self.maxsize <= 0 or len(claims) > self.max_claims:
+            return
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Process-wide cache shared by the upload endpoints
+parse_cache = ParseCache(settings.PARSE_CACHE_SIZE, settings.PARSE_CACHE_MAX_CLAIMS)
@@ -0,0 +1,288 @@
+"""
+Ingest Queue - Background ingestion jobs backed by the ingest_jobs table
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, BinaryIO, Optional, Tuple
+import itertools
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+from sqlalchemy import select, update, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.ingest_job import IngestJob, IngestJobStatus
+from app.services.bulk_ingest import BulkIngestor, iter_local_entries
+
+
+class QueueFullError(Exception):
+    """Raised when INGEST_MAX_QUEUED jobs are already waiting"""
+
+
+class IngestQueue:
+    """
+    Local job queue for uploads that should not be ingested inside the request
+
+    enqueue() spools the uploaded files under UPLOAD_DIR/jobs/<job_id>/ and
+    inserts a QUEUED row; the table is the queue, no broker is involved. A
+    bounded thread pool runs each job through BulkIngestor (whose parsing
+    happens in the shared parse pool), updating the row's counts, in a
+    session of their own, each time a batch of claims is committed. A job
+    is claimed by one queue at a time, which stamps it with its owner and
+    refreshes heartbeat_at while it runs. resume() re-submits QUEUED jobs
+    and RUNNING jobs whose heartbeat has gone stale, i.e. whose process
+    died; the heartbeat thread repeats that sweep, so jobs of a process
+    that restarted before they went stale are taken over later. Files
+    already ingested are skipped as duplicates.
+    """
+
+    # Minimum seconds between progress commits of a running job
+    PROGRESS_INTERVAL = 1.0
+
+    def __init__(self, session_factory=SessionLocal, workers: Optional[int] = None,
+                 max_queued: Optional[int] = None, upload_dir: Optional[str] = None,
+                 heartbeat_interval: Optional[float] = None, stale_after: Optional[float] = None):
+        self.session_factory = session_factory
+        self.workers = workers or settings.INGEST_WORKERS
+        self.max_queued = settings.INGEST_MAX_QUEUED if max_queued is None else max_queued
+        self.upload_dir = os.path.join(upload_dir or settings.UPLOAD_DIR, 'jobs')
+        self.heartbeat_interval = heartbeat_interval or settings.INGEST_HEARTBEAT_INTERVAL
+        self.stale_after = stale_after or settings.INGEST_STALE_AFTER
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = None
+        self._heartbeat = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def enqueue(self, db: Session, uploads: List[Tuple[str, BinaryIO]],
+                reject_invalid: bool = False) -> IngestJob:
+        """Store (filename, file object) uploads and queue a job for them"""
+        if self.max_queued and db.query(IngestJob).filter(
+            IngestJob.status == IngestJobStatus.QUEUED
+        ).count() >= self.max_queued:
+            raise QueueFullError(f"{self.max_queued} ingestion jobs are already queued")
+
+        job_id = f"JOB-{uuid.uuid4().hex[:12].upper()}"
+        job_dir = os.path.join(self.upload_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        files = []
+        for index, (filename, fileobj) in enumerate(uploads):
+            path = os.path.join(job_dir, f"{index:05d}_{os.path.basename(filename)}")
+            with open(path, 'wb') as f:
+                shutil.copyfileobj(fileobj, f)
+            files.append({'filename': filename, 'path': path})
+
+        job = IngestJob(
+            job_id=job_id,
+            status=IngestJobStatus.QUEUED,
+            files=files,
+            reject_invalid=reject_invalid,
+            files_processed=0,
+            files_failed=0,
+            claims_created=0
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self.submit(job_id)
+        return job
+
+    def submit(self, job_id: str):
+        """Hand a queued job to the worker pool"""
+        with self._lock:
+            self._start()
+            return self._executor.submit(self.run, job_id)
+
+    def _start(self) -> None:
+        """Start the worker pool and heartbeat thread; the caller holds _lock"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ingest')
+            self._stopped.clear()
+            self._heartbeat = threading.Thread(target=self._beat, name='ingest-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def resume(self) -> int:
+        """
+        Re-submit queued jobs and jobs left RUNNING by a dead process; returns how many
+        A RUNNING job whose owner still sends heartbeats is left to it. The
+        heartbeat thread is started even when there is nothing to resume,
+        so later stale jobs are still swept.
+        """
+        with self._lock:
+            self._start()
+        self.requeue_stale()
+        db = self.session_factory()
+        try:
+            job_ids = db.scalars(
+                select(IngestJob.job_id).where(IngestJob.status == IngestJobStatus.QUEUED).order_by(IngestJob.id)
+            ).all()
+        finally:
+            db.close()
+
+        for job_id in job_ids:
+            self.submit(job_id)
+        return len(job_ids)
+
+    def requeue_stale(self) -> List[str]:
+        """
+        Move RUNNING jobs whose heartbeat has gone stale back to QUEUED
+        Each row is moved by a conditional UPDATE, so when several processes
+        sweep at once only one of them gets a job back; returns its job IDs.
+        """
+        stale = or_(IngestJob.heartbeat_at.is_(None),
+                    IngestJob.heartbeat_at < datetime.now(timezone.utc) - timedelta(seconds=self.stale_after))
+        db = self.session_factory()
+        try:
+            job_ids = db.scalars(
+                select(IngestJob.job_id).where(IngestJob.status == IngestJobStatus.RUNNING, stale)
+                .order_by(IngestJob.id)
+            ).all()
+            requeued = [
+                job_id for job_id in job_ids
+                if db.execute(
+                    update(IngestJob)
+                    .where(IngestJob.job_id == job_id, IngestJob.status == IngestJobStatus.RUNNING, stale)
+                    .values(status=IngestJobStatus.QUEUED, owner=None)
+                    .execution_options(synchronize_session=False)
+                ).rowcount == 1
+            ]
+            db.commit()
+            return requeued
+        except SQLAlchemyError:
+            # e.g. SQLite busy with an ingest transaction; the next beat retries
+            db.rollback()
+            return []
+        finally:
+            db.close()
+
+    def run(self, job_id: str) -> None:
+        """Worker: ingest every file of a job, recording progress on its row"""
+        db = self.session_factory()
+        try:
+            if not self._claim(db, job_id):
+                return
+            job = db.query(IngestJob).filter(IngestJob.job_id == job_id).one()
+
+            try:
+                self._ingest(db, job)
+                job.status = IngestJobStatus.COMPLETED
+            except Exception as e:
+                db.rollback()
+                job.status = IngestJobStatus.FAILED
+                job.error = f"{e.__class__.__name__}: {str(e)}"
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+
+            if job.status == IngestJobStatus.COMPLETED and job.files:
+                # Spooled uploads are kept for failed jobs only
+                shutil.rmtree(os.path.dirname(job.files[0]['path']), ignore_errors=True)
+        finally:
+            db.close()
+
+    def _claim(self, db: Session, job_id: str) -> bool:
+        """
+        Move a job from QUEUED to RUNNING in one conditional UPDATE
+        Only one worker, in any process, sees a row count of 1 for a job.
+        """
+        result = db.execute(
+            update(IngestJob)
+            .where(IngestJob.job_id == job_id, IngestJob.status == IngestJobStatus.QUEUED)
+            .values(status=IngestJobStatus.RUNNING, owner=self.owner, started_at=datetime.now(timezone.utc),
+                    heartbeat_at=datetime.now(timezone.utc), files_processed=0, files_failed=0, claims_created=0)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    def _ingest(self, db: Session, job: IngestJob) -> None:
+        results = []
+        counts = {'files_processed': 0, 'files_failed': 0, 'claims_created': 0}
+        last_saved = time.monotonic()
+
+        def progress(result: Dict[str, Any]) -> None:
+            results.append(result)
+            counts['files_processed'] += 1
+            counts['files_failed'] += result['status'] == 'failed'
+            counts['claims_created'] += result['claims_created']
+
+        def committed() -> None:
+            # Every result reported so far is committed; db itself is never committed mid-batch
+            nonlocal last_saved
+            if time.monotonic() - last_saved >= self.PROGRESS_INTERVAL:
+                self._save_progress(job.job_id, counts)
+                last_saved = time.monotonic()
+
+        # Spooled uploads are on local disk, so plain X12 files are parsed in place
+        entries = itertools.chain.from_iterable(
+            iter_local_entries(stored['filename'], stored['path']) for stored in job.files
+        )
+        BulkIngestor(db, reject_invalid=bool(job.reject_invalid)).ingest(entries, progress, committed)
+        job.results = results
+        for name, value in counts.items():
+            setattr(job, name, value)
+
+    def _save_progress(self, job_id: str, counts: Dict[str, int]) -> None:
+        """Write a running job's counts through a short-lived session of their own"""
+        progress_db = self.session_factory()
+        try:
+            progress_db.execute(
+                update(IngestJob)
+                .where(IngestJob.job_id == job_id)
+                .values(heartbeat_at=datetime.now(timezone.utc), **counts)
+                .execution_options(synchronize_session=False)
+            )
+            progress_db.commit()
+        finally:
+            progress_db.close()
+
+    def heartbeat(self) -> None:
+        """Mark this queue's running jobs as alive"""
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(IngestJob)
+                .where(IngestJob.owner == self.owner, IngestJob.status == IngestJobStatus.RUNNING)
+                .values(heartbeat_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except SQLAlchemyError:
+            # e.g. SQLite busy with an ingest transaction; the next beat retries
+            db.rollback()
+        finally:
+            db.close()
+
+    def _beat(self) -> None:
+        while not self._stopped.wait(self.heartbeat_interval):
+            self.heartbeat()
+            for job_id in self.requeue_stale():
+                if self._stopped.is_set():
+                    # Left QUEUED for the next resume()
+                    break
+                self.submit(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+                self._stopped.set()
+                self._heartbeat = None
+
+
+# Process-wide queue used by the upload endpoints
+ingest_queue = IngestQueue()
+
+
+def get_ingest_queue() -> IngestQueue:
+    """Dependency to get the ingestion queue"""
+    return ingest_queue
@@ -0,0 +1,72 @@
+"""
+Pagination - Opaque keyset cursors and exact or estimated row counts for list endpoints
+"""
+from typing import Optional, Tuple
+import base64
+import json
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select, func
+
+# Count modes accepted by list endpoints
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+
+
+class InvalidCursorError(ValueError):
+    """A cursor that was not issued by encode_cursor"""
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor continuing after the row with this id"""
+    payload = json.dumps({'id': last_id}, separators=(',', ':')).encode('ascii')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """The id a cursor continues after"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['id']
+    except (ValueError, KeyError, TypeError, UnicodeEncodeError):
+        raise InvalidCursorError("Invalid cursor")
+    if not isinstance(last_id, int):
+        raise InvalidCursorError("Invalid cursor")
+    return last_id
+
+
+async def count_rows(db: AsyncSession, query: Select, mode: str = COUNT_EXACT,
+                     table_name: Optional[str] = None, filtered: bool = True) -> Tuple[Optional[int], bool]:
+    """
+    Rows `query` returns, as (count, is_estimate)
+    `estimate` uses PostgreSQL's planner statistics - pg_class.reltuples for
+    an unfiltered table, the plan's row estimate otherwise - and falls back
+    to an exact count where there are none (other databases, a table never
+    analyzed). `none` skips counting.
+    """
+    if mode == COUNT_NONE:
+        return None, False
+    if mode == COUNT_ESTIMATE and db.get_bind().dialect.name == 'postgresql':
+        estimate = await _planner_estimate(db, query, None if filtered else table_name)
+        if estimate is not None:
+            return estimate, True
+    return await db.scalar(select(func.count()).select_from(query.order_by(None).subquery())), False
+
+
+async def _planner_estimate(db: AsyncSession, query: Select, table_name: Optional[str]) -> Optional[int]:
+    if table_name is not None:
+        reltuples = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :name"), {'name': table_name}
+        )
+        # -1 (PostgreSQL 14+) or 0 until the table is first vacuumed/analyzed
+        return reltuples if reltuples and reltuples > 0 else None
+
+    # Values are rendered by SQLAlchemy's literal processors, which quote and escape them
+    compiled = query.order_by(None).compile(dialect=db.get_bind().dialect, compile_kwargs={'literal_binds': True})
+    connection = await db.connection()
+    plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,191 @@
+"""
+Parallel X12 Parser - Parses large 837 interchanges across a process pool
+"""
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
+import itertools
+import mmap
+import os
+import re
+import threading
+
+from app.core.config import settings
+from app.services.claim_normalizer import ClaimNormalizer
+from app.services.x12_parser import X12Parser, ISA_SEGMENT_LENGTH
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    The process pool shared by every parse in this process
+    PARSE_WORKERS (or CPU count) processes, started on first use, however
+    many uploads are being parsed at once
+    """
+    global _pool
+    with _pool_lock:
+        # A pool whose worker died cannot take new tasks
+        if _pool is None or _pool._broken:
+            _pool = ProcessPoolExecutor(max_workers=settings.PARSE_WORKERS or os.cpu_count() or 1)
+        return _pool
+
+
+def shutdown_parse_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+class ParallelX12Parser:
+    """
+    Split an 837 interchange on ST/SE transaction set boundaries and parse
+    the pieces in a process pool
+
+    Transaction sets do not share HL context, so each one can be parsed on
+    its own. One cheap scan indexes the ST (and GS, for the claim type)
+    positions; contiguous runs of transaction sets are sent to the workers
+    as byte ranges to the shared parse pool and the claims are yielded back
+    in file order. Workers parse raw values and convert each range's dates
+    and amounts with ClaimNormalizer. Inputs smaller than the threshold are
+    parsed in-process.
+    """
+
+    # Transaction set ranges are grouped into about this many tasks per worker
+    TASKS_PER_WORKER = 4
+
+    def __init__(self, workers: Optional[int] = None, threshold: Optional[int] = None,
+                 encoding: str = 'utf-8'):
+        self.workers = workers or settings.PARSE_WORKERS or os.cpu_count() or 1
+        self.threshold = settings.PARSE_PARALLEL_THRESHOLD if threshold is None else threshold
+        self.encoding = encoding
+
+    def iter_claims_from_file(self, path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every claim in a file on local disk
+        Workers memory-map the file themselves, so only offsets are shipped
+        """
+        if os.path.getsize(path) < self.threshold or self.workers < 2:
+            yield from X12Parser().iter_claims_from_file(path, self.encoding)
+            return
+
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                delimiters, ranges = self._index(buffer)
+
+        if not ranges:
+            yield from X12Parser().iter_claims_from_file(path, self.encoding)
+            return
+
+        yield from self._map(_parse_file_range, path, delimiters, ranges)
+
+    def iter_claims(self, content: Union[bytes, str, mmap.mmap]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every claim in an in-memory interchange
+        An mmap works too, e.g. of a spooled upload that has no path
+        """
+        if isinstance(content, str):
+            content = content.encode(self.encoding)
+
+        if len(content) < self.threshold or self.workers < 2:
+            yield from X12Parser().iter_claims(content[:].decode(self.encoding))
+            return
+
+        delimiters, ranges = self._index(content)
+        if not ranges:
+            yield from X12Parser().iter_claims(content[:].decode(self.encoding))
+            return
+
+        # Each task ships its own slice of the interchange
+        tasks = ((content[start:stop], claim_type) for start, stop, claim_type in ranges)
+        yield from self._map(_parse_bytes_range, None, delimiters, tasks)
+
+    def _index(self, buffer) -> Tuple[Tuple[str, str], List[Tuple[int, int, str]]]:
+        """
+        Find the transaction set boundaries in one scan
+        Returns the delimiters and (start, stop, claim_type) ranges, each
+        covering a contiguous run of ST/SE sets
+        """
+        parser = X12Parser()
+        parser._detect_delimiters(buffer[:ISA_SEGMENT_LENGTH].decode('latin-1'))
+        segment_delimiter = parser.segment_delimiter.encode(self.encoding)
+        element_delimiter = parser.element_delimiter.encode(self.encoding)
+        pattern = re.compile(
+            re.escape(segment_delimiter) + rb'\s*(GS|ST)' + re.escape(element_delimiter)
+        )
+
+        # (start, claim_type) of every transaction set
+        sets = []
+        claim_type = '837P'
+        for match in pattern.finditer(buffer):
+            if match.group(1) == b'GS':
+                end = buffer.find(segment_delimiter, match.end())
+                segment = buffer[match.start(1):end if end != -1 else len(buffer)]
+                elements = segment.decode(self.encoding).split(parser.element_delimiter)
+                claim_type = parser._claim_type_from_gs(elements) or '837P'
+            else:
+                sets.append((match.start(1), claim_type))
+
+        # Group consecutive sets of the same claim type into similarly sized tasks
+        target_size = max(len(buffer) // (self.workers * self.TASKS_PER_WORKER), 1)
+        ranges = []
+        for index, (start, claim_type) in enumerate(sets):
+            stop = sets[index + 1][0] if index + 1 < len(sets) else len(buffer)
+            if ranges and ranges[-1][2] == claim_type and ranges[-1][1] - ranges[-1][0] < target_size:
+                ranges[-1] = (ranges[-1][0], stop, claim_type)
+            else:
+                ranges.append((start, stop, claim_type))
+
+        delimiters = (parser.segment_delimiter, parser.element_delimiter)
+        return delimiters, ranges
+
+    def _map(self, worker, source, delimiters, tasks) -> Iterator[Dict[str, Any]]:
+        """
+        Run tasks in the shared pool, yielding results in submission order
+        At most two tasks per worker are in flight, so finished results do
+        not pile up ahead of a slow consumer
+        """
+        executor = get_parse_pool()
+        tasks = iter(tasks)
+        pending = deque(
+            executor.submit(worker, source, delimiters, task, self.encoding)
+            for task in itertools.islice(tasks, self.workers * 2)
+        )
+        try:
+            while pending:
+                claims = pending.popleft().result()
+                task = next(tasks, None)
+                if task is not None:
+                    pending.append(executor.submit(worker, source, delimiters, task, self.encoding))
+                yield from claims
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _range_parser(delimiters: Tuple[str, str]) -> X12Parser:
+    """Raw-value X12Parser preset with the interchange's delimiters"""
+    parser = X12Parser(normalize=False)
+    parser.segment_delimiter, parser.element_delimiter = delimiters
+    return parser
+
+
+def _parse_file_range(path: str, delimiters: Tuple[str, str], task: Tuple[int, int, str],
+                      encoding: str) -> List[Dict[str, Any]]:
+    """Worker: parse one byte range of a memory-mapped file"""
+    start, stop, claim_type = task
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            claims = _range_parser(delimiters)._iter_range_claims(buffer, start, stop, claim_type, encoding)
+            return list(ClaimNormalizer().iter_normalized(claims))
+
+
+def _parse_bytes_range(source: None, delimiters: Tuple[str, str], task: Tuple[bytes, str],
+                       encoding: str) -> List[Dict[str, Any]]:
+    """Worker: parse one shipped slice of an in-memory interchange"""
+    content, claim_type = task
+    claims = _range_parser(delimiters)._iter_range_claims(content, 0, len(content), claim_type, encoding)
+    return list(ClaimNormalizer().iter_normalized(claims))
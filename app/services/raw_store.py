@@ -0,0 +1,115 @@
+"""
+Raw Store - Content-addressed, compressed storage of original X12 files and generated 835s
+"""
+from typing import Iterable, Optional
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.raw_payload import RawPayload
+
+
+class RawPayloadStore:
+    """
+    Store payloads in raw_payloads, keyed by SHA-256 of their content
+
+    put() returns the hash that claims and remittances reference. Content
+    already stored (by any claim) is not written again, and putting the
+    same string object repeatedly - every claim of one file - hashes it
+    once. put_stream() stores content read chunk by chunk, such as a
+    spooled upload, without holding it uncompressed in memory. New rows
+    are flushed at once - claims and remittances reference them by a bare
+    foreign key, which the unit of work does not order inserts by - and
+    committed with the caller's session.
+    """
+
+    def __init__(self, db: Session, level: Optional[int] = None):
+        self.db = db
+        self.level = settings.RAW_PAYLOAD_COMPRESSION_LEVEL if level is None else level
+        self._last = (None, None)  # (text, RawPayload) of the previous put
+
+    def put(self, text: Optional[str]) -> Optional[str]:
+        """Store a payload if it is new; returns its content hash"""
+        if text is None:
+            return None
+        cached = self._reuse(text)
+        if cached is not None:
+            return cached
+
+        data = text.encode('utf-8')
+        content_hash = RawPayload.hash_bytes(data)
+        # Flushed first so a payload added earlier in this transaction is found
+        self.db.flush()
+        payload = self.db.get(RawPayload, content_hash)
+        if payload is None:
+            payload = RawPayload.from_bytes(data, self.level)
+            self.db.add(payload)
+            self.db.flush()
+        self._last = (text, payload)
+        return content_hash
+
+    def put_stream(self, chunks: Iterable[bytes]) -> str:
+        """Hash and compress content chunk by chunk and store it if it is new; returns its content hash"""
+        content_hash, size, data = RawPayload.compress_chunks(chunks, self.level)
+        self.db.flush()
+        if self.db.get(RawPayload, content_hash) is None:
+            self.db.add(RawPayload(content_hash=content_hash, size_bytes=size, data=data))
+            self.db.flush()
+        return content_hash
+
+    def get(self, content_hash: str) -> Optional[str]:
+        payload = self.db.get(RawPayload, content_hash)
+        return None if payload is None else RawPayload.decode(payload.data)
+
+    def _reuse(self, text: str) -> Optional[str]:
+        """Hash of the previous put if it was this very string and its row is still in the session"""
+        last_text, last_payload = self._last
+        if text is last_text and last_payload in self.db:
+            return last_payload.content_hash
+        return None
+
+
+class AsyncRawPayloadStore(RawPayloadStore):
+    """RawPayloadStore for an AsyncSession"""
+
+    def __init__(self, db: AsyncSession, level: Optional[int] = None):
+        super().__init__(db, level)
+
+    async def put(self, text: Optional[str]) -> Optional[str]:
+        """Store a payload if it is new; returns its content hash"""
+        if text is None:
+            return None
+        cached = self._reuse(text)
+        if cached is not None:
+            return cached
+
+        data = text.encode('utf-8')
+        content_hash = RawPayload.hash_bytes(data)
+        await self.db.flush()
+        payload = await self.db.get(RawPayload, content_hash)
+        if payload is None:
+            payload = RawPayload.from_bytes(data, self.level)
+            self.db.add(payload)
+            await self.db.flush()
+        self._last = (text, payload)
+        return content_hash
+
+    async def put_stream(self, chunks: Iterable[bytes]) -> str:
+        """
+        Hash and compress content chunk by chunk and store it if it is new; returns its content hash
+        Reading and compressing run in a worker thread, off the event loop.
+        """
+        content_hash, size, data = await asyncio.to_thread(RawPayload.compress_chunks, chunks, self.level)
+        await self.db.flush()
+        if await self.db.get(RawPayload, content_hash) is None:
+            self.db.add(RawPayload(content_hash=content_hash, size_bytes=size, data=data))
+            await self.db.flush()
+        return content_hash
+
+    async def get(self, content_hash: str) -> Optional[str]:
+        payload = await self.db.get(RawPayload, content_hash)
+        if payload is None:
+            return None
+        await self.db.refresh(payload, ['data'])
+        return RawPayload.decode(payload.data)
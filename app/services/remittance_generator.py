@@ -1,10 +1,12 @@
 """
 Remittance Generator - Creates 835 remittance advice files
 """
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.claim import Claim
 from app.models.remittance import Remittance
 from app.schemas.remittance import RemittanceSummary, AdjustmentCode
+from app.services.raw_store import RawPayloadStore, AsyncRawPayloadStore
 from typing import Dict, Any, List
 import uuid
 from datetime import datetime, date
@@ -22,6 +24,16 @@ class RemittanceGenerator:
         """
         Generate a new remittance for an adjudicated claim
         """
+        remittance = self.build_remittance(claim)
+        remittance.raw_835_hash = RawPayloadStore(db).put(self._generate_835_x12(claim, remittance.remittance_id))
+        db.add(remittance)
+        db.commit()
+        db.refresh(remittance)
+        
+        return remittance
+    
+    def build_remittance(self, claim: Claim) -> Remittance:
+        """Remittance record for a claim, without its 835 content, not yet added to a session"""
         # Generate remittance ID
         remittance_id = f"RMT-{uuid.uuid4().hex[:12].upper()}"
         
@@ -46,9 +58,6 @@ class RemittanceGenerator:
                 })
                 adjustment_amounts.append(adjustment_amount)
         
-        # Generate 835 X12 content
-        raw_835 = self._generate_835_x12(claim, remittance_id)
-        
         # Create remittance record
         remittance = Remittance(
             remittance_id=remittance_id,
@@ -60,14 +69,9 @@ class RemittanceGenerator:
             adjustment_codes=adjustment_codes,
             adjustment_amounts=adjustment_amounts,
             payer_id="PAYER001",
-            payer_name="Sample Insurance Co",
-            raw_835_data=raw_835
+            payer_name="Sample Insurance Co"
         )
         
-        db.add(remittance)
-        db.commit()
-        db.refresh(remittance)
-        
         return remittance
     
     def create_summary(self, claim: Claim, remittance: Remittance) -> RemittanceSummary:
@@ -162,7 +166,7 @@ class RemittanceGenerator:
         nm1_patient = f"NM1*QC*1*{last_name}*{first_name}****MI*{claim.patient_id}"
         
         # DTM - Service Date
-        dtm_service = f"DTM*232*{claim.service_date.replace('-', '')}" if claim.service_date else ""
+        dtm_service = f"DTM*232*{claim.service_date.strftime('%Y%m%d')}" if claim.service_date else ""
         
         # SE - Transaction Set Trailer
         segment_count = 15 + len(cas_segments)  # Approximate count
@@ -204,3 +208,21 @@ class RemittanceGenerator:
             'PR-3': 'Co-payment amount',
             'OA-23': 'Expenses incurred after coverage termination'
         }
+
+
+class AsyncRemittanceGenerator(RemittanceGenerator):
+    """RemittanceGenerator for request handlers holding an AsyncSession"""
+    
+    async def generate_remittance(self, claim: Claim, db: AsyncSession) -> Remittance:
+        """
+        Generate a new remittance for an adjudicated claim
+        """
+        remittance = self.build_remittance(claim)
+        remittance.raw_835_hash = await AsyncRawPayloadStore(db).put(
+            self._generate_835_x12(claim, remittance.remittance_id)
+        )
+        db.add(remittance)
+        await db.commit()
+        await db.refresh(remittance)
+        
+        return remittance
@@ -0,0 +1,235 @@
+"""
+Response Cache - Read-through cache of serialized claim and remittance responses
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional, Tuple
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+
+# Response kinds cached per claim; a write to a claim drops all of them
+NAMESPACES = ('claim', 'remittance')
+
+
+class CacheBackend(ABC):
+    """Storage for cached responses: bytes by string key, each with a time to live"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, keys: Iterable[str]) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Bounded, thread-safe LRU with per-entry expiry, private to the process"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache in a local SQLite file, shared by every worker process on the host
+
+    An invalidation in one worker is seen by all of them. Expired entries
+    are skipped on read and purged, together with the least recently
+    written entries beyond `maxsize`, every `PURGE_EVERY` writes.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, written_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM response_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, written_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._purge(now)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM response_cache WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+    def _purge(self, now: float) -> None:
+        self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM response_cache WHERE key IN "
+            "(SELECT key FROM response_cache ORDER BY written_at DESC LIMIT -1 OFFSET ?)", (self.maxsize,)
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Serialized responses per (namespace, claim ID), with hit/miss counters
+
+    Endpoints read through it: a hit returns the stored JSON body without
+    touching the database, a miss builds the response and stores it. Every
+    write to a claim calls invalidate() after its commit. A read that raced
+    the write can still store the old body; `ttl` bounds how long it lives.
+    Counters are per process.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float = 30.0):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None and self.ttl > 0
+
+    def get(self, namespace: str, claim_id: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        value = self.backend.get(self._key(namespace, claim_id))
+        self._count(namespace, 'hits' if value is not None else 'misses')
+        return value
+
+    def set(self, namespace: str, claim_id: str, value: bytes) -> None:
+        if self.enabled:
+            self.backend.set(self._key(namespace, claim_id), value, self.ttl)
+
+    def invalidate(self, claim_ids: Iterable[str]) -> None:
+        """Drop every cached response of these claims"""
+        if not self.enabled:
+            return
+        claim_ids = list(claim_ids)
+        if not claim_ids:
+            return
+        self.backend.delete([self._key(namespace, claim_id) for claim_id in claim_ids for namespace in NAMESPACES])
+        with self._lock:
+            self._invalidations += len(claim_ids)
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {
+                namespace: {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                }
+                for namespace, (hits, misses) in self._stats.items()
+            }
+            invalidations = self._invalidations
+        return {
+            'backend': type(self.backend).__name__ if self.backend is not None else None,
+            'ttl': self.ttl,
+            'entries': len(self.backend) if self.backend is not None else 0,
+            'invalidations': invalidations,
+            'namespaces': namespaces,
+        }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = {namespace: (0, 0) for namespace in NAMESPACES}
+            self._invalidations = 0
+
+    def _count(self, namespace: str, outcome: str) -> None:
+        with self._lock:
+            hits, misses = self._stats[namespace]
+            self._stats[namespace] = (hits + 1, misses) if outcome == 'hits' else (hits, misses + 1)
+
+    def _key(self, namespace: str, claim_id: str) -> str:
+        return f"{namespace}:{claim_id}"
+
+
+def create_backend(name: Optional[str] = None) -> Optional[CacheBackend]:
+    """The backend named by RESPONSE_CACHE_BACKEND: memory, sqlite or none"""
+    name = (settings.RESPONSE_CACHE_BACKEND if name is None else name).lower()
+    if name == 'memory':
+        return MemoryCacheBackend(settings.RESPONSE_CACHE_SIZE)
+    if name == 'sqlite':
+        return SQLiteCacheBackend(settings.RESPONSE_CACHE_PATH, settings.RESPONSE_CACHE_SIZE)
+    if name in ('', 'none'):
+        return None
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND {name!r}; use memory, sqlite or none")
+
+
+# Process-wide cache used by the claim and remittance endpoints
+response_cache = ResponseCache(create_backend(), settings.RESPONSE_CACHE_TTL)
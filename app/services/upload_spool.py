@@ -0,0 +1,96 @@
+"""
+Upload Spool - Copies an upload into a size-limited temp file under UPLOAD_DIR
+"""
+from typing import Iterator, Optional, Tuple
+import tempfile
+
+from app.core.config import settings
+from app.services.ingest_cache import X12ContentHasher
+from app.services.x12_parser import X12Parser, ISA_SEGMENT_LENGTH
+
+
+class UploadTooLargeError(Exception):
+    """Raised as soon as an upload crosses its size limit"""
+
+
+class NotX12Error(Exception):
+    """Raised as soon as an upload's first bytes are not an ISA header"""
+
+
+class UploadSpool:
+    """
+    Chunk-by-chunk copy of an upload into a SpooledTemporaryFile
+
+    Small uploads stay in memory and larger ones roll over to a temp file
+    in UPLOAD_DIR, so a burst of large uploads holds at most
+    UPLOAD_SPOOL_SIZE bytes of each in memory. While the bytes are copied
+    the size limit is enforced, the normalized content hash is computed,
+    and the ISA header is sniffed for the interchange's delimiters.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, spool_size: Optional[int] = None,
+                 directory: Optional[str] = None):
+        self.max_size = settings.MAX_UPLOAD_SIZE if max_size is None else max_size
+        self.file = tempfile.SpooledTemporaryFile(
+            max_size=settings.UPLOAD_SPOOL_SIZE if spool_size is None else spool_size,
+            dir=directory or settings.UPLOAD_DIR,
+            prefix='upload-'
+        )
+        self.hasher = X12ContentHasher()
+        self.size = 0
+        self.delimiters = None  # (segment, element) once the ISA header has arrived
+        self._head = b''
+
+    def write(self, chunk: bytes) -> None:
+        """Add the next chunk, enforcing the limit and sniffing the header"""
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise UploadTooLargeError(f"Upload exceeds the {self.max_size} byte limit")
+
+        if self.delimiters is None and len(self._head) < ISA_SEGMENT_LENGTH:
+            self._head += chunk[:ISA_SEGMENT_LENGTH - len(self._head)]
+            if not b'ISA'.startswith(self._head[:3]):
+                raise NotX12Error("Not an X12 interchange - missing ISA header")
+            if len(self._head) == ISA_SEGMENT_LENGTH:
+                self.delimiters = self._sniff()
+
+        self.hasher.update(chunk)
+        self.file.write(chunk)
+
+    async def consume(self, upload, chunk_size: int = 65536) -> None:
+        """Read an UploadFile (or any async reader) to the end"""
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            self.write(chunk)
+        self.finish()
+
+    def finish(self) -> None:
+        """End of upload: check a header shorter than a full ISA segment"""
+        if self.delimiters is None:
+            if not self._head.startswith(b'ISA'):
+                raise NotX12Error("Not an X12 interchange - missing ISA header")
+            self.delimiters = self._sniff()
+        self.file.seek(0)
+
+    @property
+    def content_hash(self) -> str:
+        return self.hasher.hexdigest()
+
+    def iter_chunks(self, chunk_size: int = 65536) -> Iterator[bytes]:
+        """Read the spooled upload back from the start"""
+        self.file.seek(0)
+        return iter(lambda: self.file.read(chunk_size), b'')
+
+    def read_text(self, encoding: str = 'utf-8') -> str:
+        self.file.seek(0)
+        return self.file.read().decode(encoding)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def _sniff(self) -> Tuple[str, str]:
+        parser = X12Parser()
+        parser._detect_delimiters(self._head.decode('latin-1'))
+        return parser.segment_delimiter, parser.element_delimiter
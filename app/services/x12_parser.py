@@ -1,213 +1,541 @@
 """
 X12 837 Parser - Parses institutional (837I) and professional (837P) claim files
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Iterator, AsyncIterator
+import codecs
+import itertools
+import mmap
+import os
 import re
 from datetime import datetime
 
+# The ISA segment is fixed width; ISA03 gives the element delimiter and the
+# character right after it (position 105) terminates the segment
+ISA_SEGMENT_LENGTH = 106
+
 
 class X12Parser:
     """Parse X12 837 healthcare claim files"""
-    
-    def __init__(self):
+
+    # Segment ID -> handler method. Each segment is split once and routed here;
+    # segments without a handler (N3, N4, REF, ...) are skipped.
+    SEGMENT_HANDLERS = {
+        'ISA': '_handle_isa',
+        'IEA': '_handle_iea',
+        'GS': '_handle_gs',
+        'GE': '_handle_ge',
+        'ST': '_handle_st',
+        'SE': '_handle_se',
+        'HL': '_handle_hl',
+        'NM1': '_handle_nm1',
+        'DMG': '_handle_dmg',
+        'CLM': '_handle_clm',
+        'DTP': '_handle_dtp',
+        'LX': '_handle_lx',
+        'SV1': '_handle_sv',
+        'SV2': '_handle_sv',
+        'HI': '_handle_hi',
+    }
+
+    # Segments visited by a validation-only pass: envelopes, HL and CLM
+    VALIDATION_HANDLERS = {
+        'ISA': '_handle_isa',
+        'IEA': '_handle_iea',
+        'GS': '_handle_gs',
+        'GE': '_handle_ge',
+        'ST': '_handle_st',
+        'SE': '_handle_se',
+        'HL': '_check_hl',
+        'CLM': '_check_clm',
+    }
+
+    # Characters split per block when iterating the segments of a str
+    SPLIT_BLOCK_SIZE = 65536
+
+    # DTP qualifier -> claim field
+    DATE_QUALIFIERS = {
+        '472': 'service_date',
+        '435': 'admission_date',
+        '096': 'discharge_date',
+    }
+
+    def __init__(self, normalize: bool = True):
+        # With normalize=False dates and amounts are left as their raw element
+        # strings, for ClaimNormalizer to convert a whole batch at once
+        self.normalize = normalize
         self.segment_delimiter = '~'
         self.element_delimiter = '*'
         self.subelement_delimiter = ':'
-    
+        self._handlers = {
+            segment_id: getattr(self, handler_name)
+            for segment_id, handler_name in self.SEGMENT_HANDLERS.items()
+        }
+        self._validation_handlers = {
+            segment_id: getattr(self, handler_name)
+            for segment_id, handler_name in self.VALIDATION_HANDLERS.items()
+        }
+        self._scanners = {}
+
     def parse_837(self, content: str) -> Dict[str, Any]:
         """
         Parse 837 X12 file and extract claim data
         Supports both 837I (institutional) and 837P (professional)
+        Returns the first claim in the file; use iter_claims() for all of them
         """
-        # Detect delimiters from ISA segment
+        self._detect_delimiters(content)
+        state = _ParseState()
+        for claim_data in self._iter_buffer_claims(content, state):
+            return claim_data
+
+        # No CLM loop - return whatever patient/provider context was found
+        return self._build_claim(state, self._new_claim_scope())
+
+    def iter_claims(self, content: str,
+                    validator: Optional['X12Validator'] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield one claim dict per CLM loop in an 837 interchange
+
+        Each claim inherits the billing provider (HL level 20) and
+        subscriber/patient (HL levels 22/23) context of its HL parents.
+        Claims are yielded as soon as their loop closes, so memory does not
+        grow with the number of claims in the file. Pass an X12Validator to
+        check the envelope structure in the same pass.
+        """
+        self._detect_delimiters(content)
+        return self._iter_buffer_claims(content, _ParseState(validator))
+
+    def iter_claims_from_file(self, path: str, encoding: str = 'utf-8',
+                              validator: Optional['X12Validator'] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the same claims as iter_claims() for a file on local disk
+
+        The file is memory-mapped and segment/element boundaries are found on
+        the raw bytes. Segments are only decoded when their ID has a handler,
+        so the file is never decoded or copied as a whole.
+        """
+        return self._iter_file_claims(path, encoding, _ParseState(validator))
+
+    def parse_837_file(self, path: str, encoding: str = 'utf-8') -> Dict[str, Any]:
+        """parse_837() for a file on local disk, via the memory-mapped path"""
+        state = _ParseState()
+        for claim_data in self._iter_file_claims(path, encoding, state):
+            return claim_data
+
+        return self._build_claim(state, self._new_claim_scope())
+
+    def _iter_range_claims(self, buffer, start: int, stop: int, claim_type: str,
+                           encoding: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Parse one independent slice of an interchange, e.g. a run of ST/SE
+        transaction sets, whose functional group declared `claim_type`
+        """
+        state = _ParseState()
+        state.claim_type = claim_type
+        return self._iter_buffer_claims(buffer, state, encoding, start, stop)
+
+    def _iter_file_claims(self, path: str, encoding: str, state: '_ParseState') -> Iterator[Dict[str, Any]]:
+        """Memory-map `path` and run the byte-level dispatch loop over it"""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                # The ISA header is ASCII; latin-1 maps each byte to one character
+                self._detect_delimiters(buffer[:ISA_SEGMENT_LENGTH].decode('latin-1'))
+                yield from self._iter_buffer_claims(buffer, state, encoding)
+
+    def _detect_delimiters(self, content: str) -> None:
+        """Detect element/segment delimiters from the fixed-width ISA segment"""
         if content.startswith('ISA'):
-            isa_segment = content[:106] if len(content) >= 106 else content
+            isa_segment = content[:ISA_SEGMENT_LENGTH] if len(content) >= ISA_SEGMENT_LENGTH else content
             self.element_delimiter = isa_segment[3]
             self.segment_delimiter = isa_segment[105] if len(isa_segment) > 105 else '~'
-        
-        # Split into segments
-        segments = [s.strip() for s in content.split(self.segment_delimiter) if s.strip()]
-        
-        # Determine claim type
-        claim_type = self._detect_claim_type(segments)
-        
-        # Extract claim data
-        claim_data = {
-            'claim_type': claim_type,
-            'patient': self._extract_patient_info(segments),
-            'provider': self._extract_provider_info(segments),
-            'claim': self._extract_claim_info(segments),
-            'service_lines': self._extract_service_lines(segments),
-            'diagnosis_codes': self._extract_diagnosis_codes(segments)
+
+    def _iter_buffer_claims(self, buffer, state: '_ParseState', encoding: Optional[str] = None,
+                            start: int = 0, stop: Optional[int] = None,
+                            in_place: Optional[bool] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Parse buffer[start:stop] (all of it by default), then close the last open claim
+
+        A str is split into segments block by block, the fastest way through
+        text already in memory. bytes and mmap buffers are scanned in place by
+        _consume_buffer(), so only the segments with a handler are decoded.
+        `in_place=True` scans a str in place too (the benchmarks compare both).
+        """
+        stop = len(buffer) if stop is None else stop
+        validator = state.validator
+        if in_place is None:
+            in_place = not isinstance(buffer, str)
+        if in_place:
+            yield from self._consume_buffer(buffer, start, stop, state, encoding)
+            if validator is not None:
+                validator.rebase(buffer, stop)
+        else:
+            segments = self._split_segments(buffer, start, stop)
+            if validator is not None:
+                segments = validator.count(segments)
+            yield from self._consume_segments(segments, state)
+
+        self._close_claim(state)
+        yield from state.completed
+        state.completed.clear()
+
+        if validator is not None:
+            validator.finish()
+
+    def _split_segments(self, content: str, start: int, stop: int) -> Iterator[str]:
+        """
+        Lazily yield the stripped, non-empty segments of content[start:stop]
+        Splits one block of SPLIT_BLOCK_SIZE characters at a time so the full
+        segment list is never materialized.
+        """
+        delimiter = self.segment_delimiter
+        while start < stop:
+            block_end = start + self.SPLIT_BLOCK_SIZE
+            if block_end >= stop:
+                end = stop
+            else:
+                # Cut the block at its last segment terminator
+                end = content.rfind(delimiter, start, block_end)
+                if end == -1:
+                    end = content.find(delimiter, block_end, stop)
+                    if end == -1:
+                        end = stop
+
+            for segment in content[start:end].split(delimiter):
+                segment = segment.strip()
+                if segment:
+                    yield segment
+            start = end + 1
+
+    def _consume_segments(self, segments: Iterable[str], state: '_ParseState') -> Iterator[Dict[str, Any]]:
+        """
+        Single pass over the segments: tokenize each segment once and dispatch
+        it by segment ID to its handler, yielding claims as their loops close
+        """
+        handlers = self._handlers
+        element_delimiter = self.element_delimiter
+        completed = state.completed
+        for segment in segments:
+            elements = segment.split(element_delimiter)
+            handler = handlers.get(elements[0])
+            if handler is not None:
+                handler(state, elements)
+                if completed:
+                    yield from completed
+                    completed.clear()
+
+    def _consume_buffer(self, buffer, start: int, stop: int, state: '_ParseState',
+                        encoding: Optional[str] = None, validating: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Single pass over buffer[start:stop] by offsets, yielding claims as their loops close
+
+        `start` must be at a segment boundary. A regex locates the segments
+        whose ID has a handler; everything else is skipped without building a
+        string, and only the located segments are sliced out and split.
+        `buffer` is a str, or bytes/mmap together with the encoding to decode
+        elements with. Used where the input is not one decoded string:
+        memory-mapped files, byte ranges of them and the stream buffer.
+        With `validating` only VALIDATION_HANDLERS segments are visited.
+        """
+        first_pattern, pattern, handlers = self._segment_scanner(encoding, validating)
+        element_delimiter = self.element_delimiter
+        completed = state.completed
+        validator = state.validator
+        if validator is not None:
+            validator.bind(self.segment_delimiter, encoding)
+
+        first = first_pattern.match(buffer, start, stop)
+        matches = pattern.finditer(buffer, start, stop)
+        for match in itertools.chain((first,) if first else (), matches):
+            raw, segment_id = match.group(1, 2)
+            if validator is not None:
+                validator.locate(buffer, match.start(1))
+            raw = raw.rstrip()
+            if encoding is not None:
+                raw = raw.decode(encoding)
+            handlers[segment_id](state, raw.split(element_delimiter))
+            if completed:
+                yield from completed
+                completed.clear()
+
+    def _segment_scanner(self, encoding: Optional[str] = None, validating: bool = False):
+        """
+        Patterns matching a handled segment at the start of the buffer and
+        after each segment delimiter, plus the handler table keyed by segment
+        ID, as str or (given an encoding) bytes. Cached per delimiter set.
+        """
+        key = (self.segment_delimiter, self.element_delimiter, encoding, validating)
+        scanner = self._scanners.get(key)
+        if scanner is None:
+            # Whole segment (group 1) whose ID (group 2), after optional
+            # whitespace, is followed by an element delimiter or the segment end
+            sd = re.escape(self.segment_delimiter)
+            ed = re.escape(self.element_delimiter)
+            handlers = self._validation_handlers if validating else self._handlers
+            ids = '|'.join(map(re.escape, sorted(handlers, key=len, reverse=True)))
+            head = r'\s*((' + ids + r')(?:[' + ed + r'\s][^' + sd + r']*)?)(?=' + sd + r'|\Z)'
+
+            patterns = [head, sd + head]
+            if encoding is not None:
+                patterns = [pattern.encode(encoding) for pattern in patterns]
+                handlers = {segment_id.encode(encoding): handler for segment_id, handler in handlers.items()}
+
+            scanner = (re.compile(patterns[0]), re.compile(patterns[1]), handlers)
+            self._scanners[key] = scanner
+        return scanner
+
+    def _new_claim_scope(self) -> Dict[str, Any]:
+        """Claim-level data collected between a CLM and the end of its loop"""
+        return {
+            'claim': {
+                'claim_id': '',
+                'total_charges': 0.0,
+                'service_date': '',
+                'admission_date': '',
+                'discharge_date': ''
+            },
+            'service_lines': [],
+            'diagnosis_codes': []
+        }
+
+    def _build_claim(self, state: '_ParseState', scope: Dict[str, Any]) -> Dict[str, Any]:
+        """Combine a closed claim scope with its inherited HL context"""
+        return {
+            'claim_type': state.claim_type,
+            'patient': dict(state.context['patient']),
+            'provider': dict(state.context['provider']),
+            'claim': scope['claim'],
+            'service_lines': scope['service_lines'],
+            'diagnosis_codes': scope['diagnosis_codes']
         }
-        
-        return claim_data
-    
+
+    def _close_claim(self, state: '_ParseState') -> None:
+        """Finish the open CLM loop, if any, and queue it for output"""
+        if state.claim is None:
+            return
+
+        if state.current_line:
+            state.claim['service_lines'].append(state.current_line)
+        state.current_line = {}
+
+        state.completed.append(self._build_claim(state, state.claim))
+        state.claim = None
+
     def _detect_claim_type(self, segments: List[str]) -> str:
         """Detect if claim is 837I or 837P"""
         for segment in segments:
             if segment.startswith('GS'):
-                elements = segment.split(self.element_delimiter)
-                if len(elements) > 1:
-                    functional_id = elements[1]
-                    if functional_id == 'HC':
-                        return '837I'  # Institutional
-                    elif functional_id == 'HP':
-                        return '837P'  # Professional
+                claim_type = self._claim_type_from_gs(segment.split(self.element_delimiter))
+                if claim_type:
+                    return claim_type
         return '837P'  # Default to professional
-    
-    def _extract_patient_info(self, segments: List[str]) -> Dict[str, str]:
-        """Extract patient information from NM1 and DMG segments"""
-        patient_info = {
-            'patient_id': '',
-            'patient_name': '',
-            'patient_dob': '',
-            'patient_gender': ''
-        }
-        
-        for i, segment in enumerate(segments):
-            if segment.startswith('NM1'):
-                elements = segment.split(self.element_delimiter)
-                if len(elements) > 2 and elements[1] == 'IL':  # Insured/Patient
-                    patient_info['patient_name'] = f"{elements[3] if len(elements) > 3 else ''} {elements[4] if len(elements) > 4 else ''}".strip()
-                    patient_info['patient_id'] = elements[9] if len(elements) > 9 else ''
-            
-            elif segment.startswith('DMG'):
-                elements = segment.split(self.element_delimiter)
-                if len(elements) > 2:
-                    patient_info['patient_dob'] = self._format_date(elements[2]) if len(elements) > 2 else ''
-                    patient_info['patient_gender'] = elements[3] if len(elements) > 3 else ''
-        
-        return patient_info
-    
-    def _extract_provider_info(self, segments: List[str]) -> Dict[str, str]:
-        """Extract provider information from NM1 segments"""
-        provider_info = {
-            'provider_id': '',
-            'provider_name': '',
-            'provider_npi': ''
+
+    def _claim_type_from_gs(self, elements: List[str]) -> Optional[str]:
+        """Map the GS functional identifier code to a claim type"""
+        if len(elements) > 1:
+            functional_id = elements[1]
+            if functional_id == 'HC':
+                return '837I'  # Institutional
+            elif functional_id == 'HP':
+                return '837P'  # Professional
+        return None
+
+    def _handle_isa(self, state: '_ParseState', elements: List[str]) -> None:
+        """ISA - interchange header, only checked when validating"""
+        if state.validator is not None:
+            state.validator.isa(elements)
+
+    def _handle_iea(self, state: '_ParseState', elements: List[str]) -> None:
+        """IEA - interchange trailer, only checked when validating"""
+        if state.validator is not None:
+            state.validator.iea(elements)
+
+    def _handle_gs(self, state: '_ParseState', elements: List[str]) -> None:
+        """GS - functional group header sets the claim type for its group"""
+        state.claim_type = self._claim_type_from_gs(elements) or '837P'
+        if state.validator is not None:
+            state.validator.gs(elements)
+
+    def _handle_ge(self, state: '_ParseState', elements: List[str]) -> None:
+        """GE - functional group trailer, only checked when validating"""
+        if state.validator is not None:
+            state.validator.ge(elements)
+
+    def _handle_st(self, state: '_ParseState', elements: List[str]) -> None:
+        """ST - a new transaction set starts with an empty HL hierarchy"""
+        self._close_claim(state)
+        state.hl_stack = []
+        state.context = _ParseState.new_context()
+        if state.validator is not None:
+            state.validator.st(elements)
+
+    def _handle_se(self, state: '_ParseState', elements: List[str]) -> None:
+        """SE - transaction set trailer closes the open claim"""
+        self._close_claim(state)
+        if state.validator is not None:
+            state.validator.se(elements)
+
+    def _handle_hl(self, state: '_ParseState', elements: List[str]) -> None:
+        """HL - enter a hierarchical level, inheriting its parent's context"""
+        self._close_claim(state)
+
+        hl_id = elements[1] if len(elements) > 1 else ''
+        parent_id = elements[2] if len(elements) > 2 else ''
+        level_code = elements[3] if len(elements) > 3 else ''
+        if state.validator is not None:
+            state.validator.hl(elements)
+
+        # Unwind to the parent; only the active chain of levels is kept
+        hl_stack = state.hl_stack
+        while hl_stack and hl_stack[-1][0] != parent_id:
+            hl_stack.pop()
+        parent = hl_stack[-1][1] if hl_stack else _ParseState.new_context()
+
+        context = {
+            'patient': dict(parent['patient']),
+            'provider': dict(parent['provider']),
+            'provider_found': parent['provider_found']
         }
-        
-        for segment in segments:
-            if segment.startswith('NM1'):
-                elements = segment.split(self.element_delimiter)
-                # Look for billing provider (NM1*85) or rendering provider (NM1*82)
-                if len(elements) > 1 and elements[1] in ['85', '82']:
-                    provider_info['provider_name'] = f"{elements[3] if len(elements) > 3 else ''}".strip()
-                    provider_info['provider_npi'] = elements[9] if len(elements) > 9 else ''
-                    provider_info['provider_id'] = elements[9] if len(elements) > 9 else ''
-                    break
-        
-        return provider_info
-    
-    def _extract_claim_info(self, segments: List[str]) -> Dict[str, Any]:
-        """Extract claim-level information"""
-        claim_info = {
-            'claim_id': '',
-            'total_charges': 0.0,
+        if level_code == '20':  # Billing provider
+            context['provider'] = _ParseState.new_context()['provider']
+            context['provider_found'] = False
+        elif level_code == '22':  # Subscriber
+            context['patient'] = _ParseState.new_context()['patient']
+
+        hl_stack.append((hl_id, context))
+        state.context = context
+
+    def _check_hl(self, state: '_ParseState', elements: List[str]) -> None:
+        """HL in a validation-only pass: checked, no context is built"""
+        state.validator.hl(elements)
+
+    def _check_clm(self, state: '_ParseState', elements: List[str]) -> None:
+        """CLM in a validation-only pass: counted, no claim is built"""
+        state.validator.claims += 1
+
+    def _handle_nm1(self, state: '_ParseState', elements: List[str]) -> None:
+        """NM1 - subscriber/patient (IL) and billing/rendering provider (85/82)"""
+        entity_code = elements[1] if len(elements) > 1 else ''
+        context = state.context
+
+        if entity_code == 'IL' and len(elements) > 2:  # Insured/Patient
+            patient_info = context['patient']
+            patient_info['patient_name'] = f"{elements[3] if len(elements) > 3 else ''} {elements[4] if len(elements) > 4 else ''}".strip()
+            patient_info['patient_id'] = elements[9] if len(elements) > 9 else ''
+
+        elif entity_code in ('85', '82') and not context['provider_found']:
+            # First billing provider (NM1*85) or rendering provider (NM1*82) in scope
+            provider_info = context['provider']
+            provider_info['provider_name'] = f"{elements[3] if len(elements) > 3 else ''}".strip()
+            provider_info['provider_npi'] = elements[9] if len(elements) > 9 else ''
+            provider_info['provider_id'] = elements[9] if len(elements) > 9 else ''
+            context['provider_found'] = True
+
+    def _handle_dmg(self, state: '_ParseState', elements: List[str]) -> None:
+        """DMG - patient demographics"""
+        if len(elements) > 2:
+            patient_info = state.context['patient']
+            patient_info['patient_dob'] = self._format_date(elements[2]) if self.normalize else elements[2]
+            patient_info['patient_gender'] = elements[3] if len(elements) > 3 else ''
+
+    def _handle_clm(self, state: '_ParseState', elements: List[str]) -> None:
+        """CLM - close the previous claim and open a new one"""
+        self._close_claim(state)
+        state.claim = self._new_claim_scope()
+        if state.validator is not None:
+            state.validator.claims += 1
+
+        claim_info = state.claim['claim']
+        claim_info['claim_id'] = elements[1] if len(elements) > 1 else ''
+        if not self.normalize:
+            claim_info['total_charges'] = elements[2] if len(elements) > 2 else ''
+        else:
+            claim_info['total_charges'] = float(elements[2]) if len(elements) > 2 and elements[2] else 0.0
+
+    def _handle_dtp(self, state: '_ParseState', elements: List[str]) -> None:
+        """DTP - service, admission and discharge dates"""
+        if state.claim is None:
+            return
+
+        if len(elements) > 3:
+            field = self.DATE_QUALIFIERS.get(elements[1])
+            if field:
+                state.claim['claim'][field] = self._format_date(elements[3]) if self.normalize else elements[3]
+
+    def _handle_lx(self, state: '_ParseState', elements: List[str]) -> None:
+        """LX - start a new service line"""
+        if state.claim is None:
+            return
+
+        if state.current_line:
+            state.claim['service_lines'].append(state.current_line)
+
+        state.current_line = {
+            'line_number': int(elements[1]) if len(elements) > 1 else 0,
+            'procedure_code': '',
             'service_date': '',
-            'admission_date': '',
-            'discharge_date': ''
+            'units': 0,
+            'charge_amount': 0.0,
+            'modifiers': []
         }
-        
-        for segment in segments:
-            if segment.startswith('CLM'):
-                elements = segment.split(self.element_delimiter)
-                claim_info['claim_id'] = elements[1] if len(elements) > 1 else ''
-                claim_info['total_charges'] = float(elements[2]) if len(elements) > 2 and elements[2] else 0.0
-            
-            elif segment.startswith('DTP'):
-                elements = segment.split(self.element_delimiter)
-                if len(elements) > 3:
-                    date_qualifier = elements[1]
-                    date_value = self._format_date(elements[3])
-                    
-                    if date_qualifier == '472':  # Service date
-                        claim_info['service_date'] = date_value
-                    elif date_qualifier == '435':  # Admission date
-                        claim_info['admission_date'] = date_value
-                    elif date_qualifier == '096':  # Discharge date
-                        claim_info['discharge_date'] = date_value
-        
-        return claim_info
-    
-    def _extract_service_lines(self, segments: List[str]) -> List[Dict[str, Any]]:
-        """Extract service line items from LX/SV1/SV2 segments"""
-        service_lines = []
-        current_line = {}
-        
-        for i, segment in enumerate(segments):
-            if segment.startswith('LX'):
-                # Start new service line
-                if current_line:
-                    service_lines.append(current_line)
-                
-                elements = segment.split(self.element_delimiter)
-                current_line = {
-                    'line_number': int(elements[1]) if len(elements) > 1 else 0,
-                    'procedure_code': '',
-                    'service_date': '',
-                    'units': 0,
-                    'charge_amount': 0.0,
-                    'modifiers': []
-                }
-            
-            elif segment.startswith('SV1') or segment.startswith('SV2'):
-                # Professional (SV1) or Institutional (SV2) service line
-                elements = segment.split(self.element_delimiter)
-                if len(elements) > 1:
-                    # Parse composite procedure code
-                    proc_elements = elements[1].split(self.subelement_delimiter) if self.subelement_delimiter in elements[1] else [elements[1]]
-                    current_line['procedure_code'] = proc_elements[1] if len(proc_elements) > 1 else proc_elements[0]
-                    
-                    # Modifiers
-                    if len(proc_elements) > 2:
-                        current_line['modifiers'] = [m for m in proc_elements[2:] if m]
-                
-                # Safely parse charge amount and units
-                try:
-                    current_line['charge_amount'] = float(elements[2]) if len(elements) > 2 and elements[2] else 0.0
-                except (ValueError, TypeError):
-                    current_line['charge_amount'] = 0.0
-                
-                try:
-                    current_line['units'] = float(elements[4]) if len(elements) > 4 and elements[4] else 1.0
-                except (ValueError, TypeError):
-                    current_line['units'] = 1.0
-        
-        if current_line:
-            service_lines.append(current_line)
-        
-        return service_lines
-    
-    def _extract_diagnosis_codes(self, segments: List[str]) -> List[str]:
-        """Extract diagnosis codes from HI segment"""
-        diagnosis_codes = []
-        
-        for segment in segments:
-            if segment.startswith('HI'):
-                elements = segment.split(self.element_delimiter)
-                for element in elements[1:]:
-                    # Parse composite diagnosis code (e.g., "ABK:I10")
-                    if self.subelement_delimiter in element:
-                        code_parts = element.split(self.subelement_delimiter)
-                        if len(code_parts) > 1:
-                            diagnosis_codes.append(code_parts[1])
-                    else:
-                        # Handle non-composite format
-                        if len(element) > 3:
-                            diagnosis_codes.append(element[3:])
-        
-        return diagnosis_codes
-    
+
+    def _handle_sv(self, state: '_ParseState', elements: List[str]) -> None:
+        """SV1/SV2 - professional or institutional service line"""
+        if state.claim is None:
+            return
+
+        current_line = state.current_line
+        if len(elements) > 1:
+            # Parse composite procedure code
+            proc_elements = elements[1].split(self.subelement_delimiter) if self.subelement_delimiter in elements[1] else [elements[1]]
+            current_line['procedure_code'] = proc_elements[1] if len(proc_elements) > 1 else proc_elements[0]
+
+            # Modifiers
+            if len(proc_elements) > 2:
+                current_line['modifiers'] = [m for m in proc_elements[2:] if m]
+
+        if not self.normalize:
+            current_line['charge_amount'] = elements[2] if len(elements) > 2 else ''
+            current_line['units'] = elements[4] if len(elements) > 4 else ''
+            return
+
+        # Safely parse charge amount and units
+        try:
+            current_line['charge_amount'] = float(elements[2]) if len(elements) > 2 and elements[2] else 0.0
+        except (ValueError, TypeError):
+            current_line['charge_amount'] = 0.0
+
+        try:
+            current_line['units'] = float(elements[4]) if len(elements) > 4 and elements[4] else 1.0
+        except (ValueError, TypeError):
+            current_line['units'] = 1.0
+
+    def _handle_hi(self, state: '_ParseState', elements: List[str]) -> None:
+        """HI - diagnosis codes"""
+        if state.claim is None:
+            return
+
+        diagnosis_codes = state.claim['diagnosis_codes']
+        for element in elements[1:]:
+            # Parse composite diagnosis code (e.g., "ABK:I10")
+            if self.subelement_delimiter in element:
+                code_parts = element.split(self.subelement_delimiter)
+                if len(code_parts) > 1:
+                    diagnosis_codes.append(code_parts[1])
+            else:
+                # Handle non-composite format
+                if len(element) > 3:
+                    diagnosis_codes.append(element[3:])
+
     def _format_date(self, date_str: str) -> str:
         """Format X12 date (CCYYMMDD or YYMMDD) to YYYY-MM-DD"""
         if not date_str:
             return ''
-        
+
         # Remove any non-numeric characters
         date_str = re.sub(r'\D', '', date_str)
-        
+
         try:
             if len(date_str) == 8:
                 # CCYYMMDD format
@@ -219,34 +547,323 @@ class X12Parser:
                 return f"{century}{date_str[0:2]}-{date_str[2:4]}-{date_str[4:6]}"
         except:
             pass
-        
+
         return date_str
-    
+
     def validate_837(self, content: str) -> Dict[str, Any]:
         """
         Validate X12 837 file structure
         Returns validation results with errors/warnings
+        Only the envelope, HL and CLM segments are visited and no claims are
+        built; pass an X12Validator to iter_claims() to validate while parsing.
         """
-        errors = []
-        warnings = []
-        
-        # Check for ISA segment
-        if not content.startswith('ISA'):
-            errors.append("Missing ISA segment - invalid X12 file")
-        
-        # Check for required segments
-        required_segments = ['ISA', 'GS', 'ST', 'CLM', 'SE', 'GE', 'IEA']
-        for req_seg in required_segments:
-            if req_seg not in content:
-                errors.append(f"Missing required segment: {req_seg}")
-        
-        # Basic structure validation
-        segments = content.split(self.segment_delimiter)
-        if len(segments) < 10:
-            warnings.append("File appears to have very few segments")
-        
+        self._detect_delimiters(content)
+        return self._validate_buffer(content)
+
+    def validate_837_file(self, path: str, encoding: str = 'utf-8') -> Dict[str, Any]:
+        """validate_837() for a file on local disk, memory-mapped"""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self._validate_buffer(b'', encoding)
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                self._detect_delimiters(buffer[:ISA_SEGMENT_LENGTH].decode('latin-1'))
+                return self._validate_buffer(buffer, encoding)
+
+    def _validate_buffer(self, buffer, encoding: Optional[str] = None) -> Dict[str, Any]:
+        validator = X12Validator()
+        for _ in self._consume_buffer(buffer, 0, len(buffer), _ParseState(validator), encoding, validating=True):
+            pass
+        validator.rebase(buffer, len(buffer))
+        validator.finish()
+        return validator.result()
+
+
+class X12StreamParser:
+    """
+    Push-style 837 parser fed byte chunks
+
+    Delimiters are detected from the ISA header once enough bytes have
+    arrived, segments that straddle chunk boundaries are carried over to the
+    next chunk, and claims are returned as soon as their loops close. Only
+    the unfinished tail of the stream is buffered.
+    """
+
+    def __init__(self, parser: Optional[X12Parser] = None, encoding: str = 'utf-8',
+                 validator: Optional['X12Validator'] = None):
+        self.parser = parser or X12Parser()
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ''
+        self._delimiters_detected = False
+        self._state = _ParseState(validator)
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """Feed the next chunk of the file; returns the claims it completed"""
+        self._buffer += self._decoder.decode(chunk)
+
+        if not self._delimiters_detected:
+            if len(self._buffer) < ISA_SEGMENT_LENGTH:
+                return []
+            self.parser._detect_delimiters(self._buffer)
+            self._delimiters_detected = True
+
+        # Parse up to the last complete segment, keep the partial one
+        end = self._buffer.rfind(self.parser.segment_delimiter)
+        if end == -1:
+            return []
+        claims = list(self.parser._consume_buffer(self._buffer, 0, end, self._state))
+        if self._state.validator is not None:
+            self._state.validator.rebase(self._buffer, end + 1)
+        self._buffer = self._buffer[end + 1:]
+        return claims
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Signal end of input; returns the remaining claims"""
+        self._buffer += self._decoder.decode(b'', final=True)
+        if not self._delimiters_detected:
+            self.parser._detect_delimiters(self._buffer)
+            self._delimiters_detected = True
+
+        claims = list(self.parser._iter_buffer_claims(self._buffer, self._state))
+        self._buffer = ''
+        return claims
+
+    async def aiter_claims(self, reader, chunk_size: int = 65536) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Read an async file-like object (UploadFile, aiofiles) chunk by chunk
+        and yield claims as they close
+        """
+        while True:
+            chunk = await reader.read(chunk_size)
+            if not chunk:
+                break
+            for claim_data in self.feed(chunk):
+                yield claim_data
+
+        for claim_data in self.close():
+            yield claim_data
+
+
+class X12Validator:
+    """
+    Envelope and hierarchy checks run by the parser as it dispatches segments
+
+    Checks ISA13/IEA02 and GS06/GE02 control numbers, IEA01/GE01 group and
+    transaction set counts, ST/SE pairing and SE01 segment counts, and that
+    every HL points at an earlier HL of the right level in its transaction
+    set. Errors carry the 1-based segment position in the file: split
+    segments are numbered as they pass, segments scanned in place by the
+    delimiters before them. Pass one validator per file to iter_claims(),
+    iter_claims_from_file() or X12StreamParser, then read result() once
+    parsing finishes.
+    """
+
+    # HL03 level code -> level codes its HL02 parent may have
+    HL_PARENT_LEVELS = {
+        '20': (None,),
+        '22': ('20',),
+        '23': ('22',),
+    }
+
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+        self.claims = 0
+        self.segments = 0  # Segments counted so far (before `mark` when scanning in place)
+        self.mark = 0
+        self.position = 0  # Position of the segment being checked
+        self.delimiter = '~'
+        self.interchange = None  # (position, ISA13, group count) of the open ISA
+        self.group = None  # (position, GS06, transaction set count) of the open GS
+        self.transaction = None  # (position, ST02) of the open ST
+        self.hl_levels = {}  # HL01 -> HL03 within the open transaction set
+        self.interchanges = 0
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Validation results, same shape as validate_837(): errors/warnings
+        are message strings, error_details/warning_details the same entries
+        as {'position', 'segment_id', 'message'} dicts
+        """
+        return {
+            'valid': len(self.errors) == 0,
+            'errors': [error['message'] for error in self.errors],
+            'warnings': [warning['message'] for warning in self.warnings],
+            'error_details': self.errors,
+            'warning_details': self.warnings
+        }
+
+    def error(self, position: Optional[int], segment_id: str, message: str) -> None:
+        self.errors.append({'position': position, 'segment_id': segment_id, 'message': message})
+
+    def warning(self, position: Optional[int], segment_id: str, message: str) -> None:
+        self.warnings.append({'position': position, 'segment_id': segment_id, 'message': message})
+
+    def bind(self, segment_delimiter: str, encoding: Optional[str] = None) -> None:
+        """Use the buffer's segment delimiter (as bytes for byte buffers)"""
+        self.delimiter = segment_delimiter.encode(encoding) if encoding is not None else segment_delimiter
+
+    def count(self, segments: Iterable[str]) -> Iterator[str]:
+        """Pass split segments through, numbering them as they go by"""
+        for segment in segments:
+            self.segments += 1
+            self.position = self.segments
+            yield segment
+
+    def locate(self, buffer, start: int) -> None:
+        """Number the segment at offset `start` of a buffer scanned in place"""
+        self.segments += buffer[self.mark:start].count(self.delimiter)
+        self.mark = start
+        self.position = self.segments + 1
+
+    def rebase(self, buffer, end: int) -> None:
+        """Count the segments up to `end`; the next buffer starts there"""
+        self.segments += buffer[self.mark:end].count(self.delimiter)
+        self.mark = 0
+
+    def isa(self, elements: List[str]) -> None:
+        position = self.position
+        if self.interchange is not None:
+            self.error(position, 'ISA', f"ISA before IEA closed the interchange at segment {self.interchange[0]}")
+        elif not self.interchanges and position != 1:
+            self.error(position, 'ISA', "ISA must be the first segment")
+        self.interchange = (position, elements[13] if len(elements) > 13 else '', 0)
+        self.interchanges += 1
+
+    def iea(self, elements: List[str]) -> None:
+        position = self.position
+        if self.interchange is None:
+            self.error(position, 'IEA', "IEA without a matching ISA")
+            return
+        if self.group is not None:
+            self.error(position, 'IEA', f"GS at segment {self.group[0]} has no GE")
+            self.group = None
+
+        _, control_number, group_count = self.interchange
+        declared_count = elements[1] if len(elements) > 1 else ''
+        if declared_count != str(group_count):
+            self.error(position, 'IEA', f"IEA01 group count {declared_count!r} does not match {group_count} functional groups")
+        if (elements[2] if len(elements) > 2 else '') != control_number:
+            self.error(position, 'IEA', f"IEA02 control number does not match ISA13 {control_number!r}")
+        self.interchange = None
+
+    def gs(self, elements: List[str]) -> None:
+        position = self.position
+        if self.group is not None:
+            self.error(position, 'GS', f"GS before GE closed the functional group at segment {self.group[0]}")
+        if self.interchange is None:
+            self.error(position, 'GS', "GS outside of an ISA/IEA interchange")
+        else:
+            start, control_number, group_count = self.interchange
+            self.interchange = (start, control_number, group_count + 1)
+        self.group = (position, elements[6] if len(elements) > 6 else '', 0)
+
+    def ge(self, elements: List[str]) -> None:
+        position = self.position
+        if self.group is None:
+            self.error(position, 'GE', "GE without a matching GS")
+            return
+        if self.transaction is not None:
+            self.error(position, 'GE', f"ST at segment {self.transaction[0]} has no SE")
+            self.transaction = None
+
+        _, control_number, transaction_count = self.group
+        declared_count = elements[1] if len(elements) > 1 else ''
+        if declared_count != str(transaction_count):
+            self.error(position, 'GE', f"GE01 transaction set count {declared_count!r} does not match {transaction_count} transaction sets")
+        if (elements[2] if len(elements) > 2 else '') != control_number:
+            self.error(position, 'GE', f"GE02 control number does not match GS06 {control_number!r}")
+        self.group = None
+
+    def st(self, elements: List[str]) -> None:
+        position = self.position
+        if self.transaction is not None:
+            self.error(position, 'ST', f"ST before SE closed the transaction set at segment {self.transaction[0]}")
+        if self.group is None:
+            self.error(position, 'ST', "ST outside of a GS/GE functional group")
+        else:
+            start, control_number, transaction_count = self.group
+            self.group = (start, control_number, transaction_count + 1)
+        self.transaction = (position, elements[2] if len(elements) > 2 else '')
+        self.hl_levels = {}
+
+    def se(self, elements: List[str]) -> None:
+        position = self.position
+        if self.transaction is None:
+            self.error(position, 'SE', "SE without a matching ST")
+            return
+
+        start, control_number = self.transaction
+        segment_count = position - start + 1
+        declared_count = elements[1] if len(elements) > 1 else ''
+        if declared_count != str(segment_count):
+            self.error(position, 'SE', f"SE01 segment count {declared_count!r} does not match {segment_count} segments")
+        if (elements[2] if len(elements) > 2 else '') != control_number:
+            self.error(position, 'SE', f"SE02 control number does not match ST02 {control_number!r}")
+        self.transaction = None
+
+    def hl(self, elements: List[str]) -> None:
+        position = self.position
+        hl_id = elements[1] if len(elements) > 1 else ''
+        parent_id = elements[2] if len(elements) > 2 else ''
+        level_code = elements[3] if len(elements) > 3 else ''
+        if self.transaction is None:
+            self.error(position, 'HL', "HL outside of an ST/SE transaction set")
+        if hl_id in self.hl_levels:
+            self.error(position, 'HL', f"HL01 {hl_id!r} is already used in this transaction set")
+
+        if parent_id and parent_id not in self.hl_levels:
+            self.error(position, 'HL', f"HL02 parent {parent_id!r} does not refer to an earlier HL")
+        else:
+            parent_level = self.hl_levels.get(parent_id) if parent_id else None
+            allowed = self.HL_PARENT_LEVELS.get(level_code)
+            if allowed is not None and parent_level not in allowed:
+                parent = f"level {parent_level}" if parent_level else "no parent"
+                self.error(position, 'HL', f"HL level {level_code} cannot have {parent}")
+        self.hl_levels[hl_id] = level_code
+
+    def finish(self) -> None:
+        """End of input: report unclosed envelopes and missing content"""
+        if self.transaction is not None:
+            self.error(self.transaction[0], 'ST', "ST has no matching SE")
+        if self.group is not None:
+            self.error(self.group[0], 'GS', "GS has no matching GE")
+        if self.interchange is not None:
+            self.error(self.interchange[0], 'ISA', "ISA has no matching IEA")
+        if not self.interchanges:
+            self.error(None, 'ISA', "Missing ISA segment - invalid X12 file")
+        if not self.claims:
+            self.error(None, 'CLM', "Missing required segment: CLM")
+        if self.segments < 10:
+            self.warning(None, '', "File appears to have very few segments")
+
+
+class _ParseState:
+    """Mutable state for one pass over an 837 interchange"""
+
+    def __init__(self, validator: Optional[X12Validator] = None):
+        self.claim_type = '837P'
+        self.validator = validator
+        self.hl_stack = []  # (HL id, context) for the active chain of levels
+        self.context = self.new_context()
+        self.claim = None  # Claim scope opened by the current CLM
+        self.current_line = {}
+        self.completed = []  # Claims closed by the last segment
+
+    @staticmethod
+    def new_context() -> Dict[str, Any]:
+        """Patient/provider context inherited down the HL hierarchy"""
         return {
-            'valid': len(errors) == 0,
-            'errors': errors,
-            'warnings': warnings
+            'patient': {
+                'patient_id': '',
+                'patient_name': '',
+                'patient_dob': '',
+                'patient_gender': ''
+            },
+            'provider': {
+                'provider_id': '',
+                'provider_name': '',
+                'provider_npi': ''
+            },
+            'provider_found': False
         }
@@ -1,14 +1,28 @@
+import atexit
+import os
+import shutil
+import tempfile
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.db.session import Base, get_db
+from app.db.session import Base, get_db, get_async_db, enable_sqlite_foreign_keys
+from app.services.ingest_queue import IngestQueue, get_ingest_queue
+from app.services.fee_schedule import fee_schedule_cache
+from app.services.ingest_cache import parse_cache
+from app.services.response_cache import response_cache
 
-# Test database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+# Test database, in a temporary directory rather than the working tree
+TEST_DB_DIR = tempfile.mkdtemp(prefix='fastval-tests-')
+atexit.register(shutil.rmtree, TEST_DB_DIR, ignore_errors=True)
+TEST_DB_PATH = os.path.join(TEST_DB_DIR, 'test.db')
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+enable_sqlite_foreign_keys(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def override_get_db():
@@ -18,14 +32,53 @@ def override_get_db():
     finally:
         db.close()
 
+# TestClient runs each request on its own event loop, so async connections are not pooled
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+enable_sqlite_foreign_keys(async_engine.sync_engine)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture()
 def test_db():
     Base.metadata.create_all(bind=engine)
+    # Each test starts from an empty database, so no cached schedule, parse or response carries over
+    fee_schedule_cache.invalidate()
+    parse_cache.clear()
+    response_cache.clear()
+    response_cache.reset_stats()
     yield
     Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture()
 def client(test_db):
     return TestClient(app)
+
+@pytest.fixture()
+def db(test_db):
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture()
+def session_factory(test_db):
+    return TestingSessionLocal
+
+@pytest.fixture()
+def async_session_factory(test_db):
+    return TestingAsyncSessionLocal
+
+@pytest.fixture()
+def ingest_queue(test_db, tmp_path):
+    queue = IngestQueue(TestingSessionLocal, workers=1, upload_dir=str(tmp_path))
+    app.dependency_overrides[get_ingest_queue] = lambda: queue
+    yield queue
+    queue.shutdown()
+    del app.dependency_overrides[get_ingest_queue]
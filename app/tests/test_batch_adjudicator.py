@@ -0,0 +1,109 @@
+import copy
+import os
+from app.core.config import settings
+from app.models.claim import Claim, ClaimStatus
+from app.schemas.claim import BatchAdjudicationRequest
+from app.services.claim_processor import ClaimProcessor
+from app.services.x12_parser import X12Parser
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _create_claims(db, specs):
+    """Store copies of the 837P sample with the given (claim_id, provider_id, service_date)"""
+    with open(os.path.join(SAMPLE_DIR, '837P_sample.txt'), encoding='utf-8') as f:
+        template = X12Parser().parse_837(f.read())
+    claims_data = []
+    for claim_id, provider_id, service_date in specs:
+        claim_data = copy.deepcopy(template)
+        claim_data['claim'].update(claim_id=claim_id, service_date=service_date)
+        claim_data['provider']['provider_id'] = provider_id
+        claims_data.append(claim_data)
+    ClaimProcessor(db).create_claims_bulk(claims_data)
+
+def test_batch_adjudication_by_filter_in_chunks(client, db):
+    """Test that a provider/date filter approves matching claims chunk by chunk with SQL amounts"""
+    _create_claims(db, [
+        ('A1', 'PRV1', '2026-01-05'),
+        ('A2', 'PRV1', '2026-01-20'),
+        ('A3', 'PRV1', '2026-02-01'),
+        ('A4', 'PRV2', '2026-01-10'),
+        ('A5', 'PRV1', '2026-01-15'),
+    ])
+    
+    response = client.post("/api/v1/claims/adjudicate", json={
+        "provider_id": "PRV1",
+        "service_date_from": "2026-01-01",
+        "service_date_to": "2026-01-31",
+        "allowed_percentage": 0.5,
+        "chunk_size": 2
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["decision"] == "APPROVED"
+    assert data["claims_adjudicated"] == 3
+    assert [chunk["claims_adjudicated"] for chunk in data["chunks"]] == [2, 1]
+    
+    claims = {claim.claim_id: claim for claim in db.query(Claim).all()}
+    assert {claim_id for claim_id, claim in claims.items() if claim.status == ClaimStatus.ADJUDICATED} == {'A1', 'A2', 'A5'}
+    claim = claims['A1']
+    assert claim.paid_amount == claim.allowed_amount == claim.total_charges * 0.5
+    assert claim.adjudication_result['decision'] == 'APPROVED'
+    assert claim.adjudication_result['allowed_amount'] == claim.allowed_amount
+    assert claim.adjudication_result['adjustment_codes'] == ['CO-45']
+    assert claim.adjudication_result['batch_id'] == data["batch_id"]
+    
+    # Already adjudicated claims are skipped on a second pass
+    response = client.post("/api/v1/claims/adjudicate", json={"provider_id": "PRV1"})
+    assert response.json()["claims_adjudicated"] == 1
+
+def test_batch_denial_by_claim_ids(client, db):
+    """Test denying a list of claims, and that an empty selection is rejected"""
+    _create_claims(db, [('D1', 'PRV1', '2026-01-05'), ('D2', 'PRV1', '2026-01-06')])
+    
+    response = client.post("/api/v1/claims/adjudicate", json={
+        "claim_ids": ["D2", "NOPE"],
+        "approve": False,
+        "denial_reason": "Not covered",
+        "adjustment_codes": ["CO-96", "PR-1"]
+    })
+    assert response.json()["claims_adjudicated"] == 1
+    
+    claim = client.get("/api/v1/claims/D2").json()
+    assert claim["status"] == "DENIED"
+    assert claim["paid_amount"] == 0.0
+    assert claim["adjudication_result"]["denial_codes"] == ["CO-96", "PR-1"]
+    assert claim["adjudication_result"]["denial_reason"] == "Not covered"
+    assert client.get("/api/v1/claims/D1").json()["status"] == "VALIDATED"
+    
+    assert client.post("/api/v1/claims/adjudicate", json={"approve": True}).status_code == 422
+
+def test_batch_default_percentage_follows_setting(monkeypatch):
+    """Test that an omitted allowed_percentage comes from DEFAULT_ALLOWED_PERCENTAGE"""
+    monkeypatch.setattr(settings, 'DEFAULT_ALLOWED_PERCENTAGE', 0.65)
+    assert BatchAdjudicationRequest(provider_id='PRV1').allowed_percentage == 0.65
+    assert BatchAdjudicationRequest(provider_id='PRV1', allowed_percentage=0.5).allowed_percentage == 0.5
+
+def test_repricing_skips_claims_changed_since_read(client, db, monkeypatch):
+    """Test that a claim adjudicated between the chunk's read and its UPDATE is neither overwritten nor counted"""
+    from app.schemas.claim import ClaimAdjudicationRequest
+    from app.services.fee_schedule import FeeSchedule
+    _create_claims(db, [('R1', 'PRV1', '2026-01-05'), ('R2', 'PRV1', '2026-01-06')])
+    client.post("/api/v1/fee-schedule", json={"entries": [{"procedure_code": "99213", "allowed_amount": 50.0}]})
+    
+    price = FeeSchedule.price
+    def price_after_concurrent_denial(self, claims, allowed_percentage):
+        claim = db.query(Claim).filter(Claim.claim_id == 'R2').one()
+        ClaimProcessor(db).adjudicate_claim(claim, ClaimAdjudicationRequest(approve=False))
+        return price(self, claims, allowed_percentage)
+    monkeypatch.setattr(FeeSchedule, 'price', price_after_concurrent_denial)
+    
+    data = client.post("/api/v1/claims/adjudicate", json={"provider_id": "PRV1", "use_fee_schedule": True}).json()
+    assert data["claims_adjudicated"] == 1
+    
+    db.expire_all()
+    claims = {claim.claim_id: claim for claim in db.query(Claim).all()}
+    assert claims['R1'].status == ClaimStatus.ADJUDICATED
+    assert claims['R2'].status == ClaimStatus.DENIED
+    assert 'batch_id' not in claims['R2'].adjudication_result
+    by_status = client.get("/api/v1/claims/stats").json()['by_status']
+    assert {status: group['claims'] for status, group in by_status.items() if group['claims']} == {'ADJUDICATED': 1, 'DENIED': 1}
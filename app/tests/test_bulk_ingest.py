@@ -0,0 +1,150 @@
+import io
+import pytest
+import os
+import tarfile
+from app.models.claim import Claim
+from app.services.bulk_ingest import BulkIngestor, LocalX12File, _parse_entry, iter_local_entries, iter_upload_entries
+from app.services.parallel_parser import get_parse_pool
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _read_sample(name):
+    with open(os.path.join(SAMPLE_DIR, name), 'rb') as f:
+        return f.read()
+
+def test_iter_upload_entries_tar():
+    """Test reading X12 members from a tar.gz archive with a size limit"""
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode='w:gz') as tf:
+        for name, content in (('a.txt', b'ISA*small~'), ('big.edi', b'x' * 100)):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tf.addfile(info, io.BytesIO(content))
+    archive.seek(0)
+    
+    entries = list(iter_upload_entries('load.tgz', archive, max_size=50))
+    assert entries == [
+        ('load.tgz/a.txt', b'ISA*small~', None),
+        ('load.tgz/big.edi', None, 'File exceeds 50 bytes'),
+    ]
+
+def test_bulk_ingest_process_pool(db):
+    """Test that pool-parsed files keep their order and a bad file does not undo the rest"""
+    samples = [_read_sample('837I_sample.txt'), _read_sample('837P_sample.txt')]
+    conflicting = samples[0].replace(b'000000001', b'000000009')  # same CLM001, different hash
+    entries = [
+        ('i.txt', samples[0], None),
+        ('conflict.txt', conflicting, None),
+        ('p.txt', samples[1], None),
+    ]
+    
+    manifest = BulkIngestor(db, workers=2, batch_size=1).ingest(entries)
+    
+    assert [result['filename'] for result in manifest] == ['i.txt', 'conflict.txt', 'p.txt']
+    assert [result['status'] for result in manifest] == ['created', 'failed', 'created']
+    assert manifest[1]['error'] == 'Claim IDs already exist: CLM001'
+    assert manifest[2]['claim_ids'] == ['CLM002']
+    assert manifest[0]['parse_ms'] > 0
+
+def test_bulk_ingest_shares_one_parse_pool(db):
+    """Test that ingests reuse the module's parse pool and report undecodable files"""
+    pool = get_parse_pool()
+    entries = [('p.txt', _read_sample('837P_sample.txt'), None), ('bad.txt', b'ISA*\xff\xfe~', None)]
+    manifest = BulkIngestor(db, workers=2).ingest(entries)
+
+    assert [result['status'] for result in manifest] == ['created', 'failed']
+    assert manifest[1]['error'].startswith('Failed to parse X12 file')
+    assert get_parse_pool() is pool
+
+def test_bulk_ingest_local_files_in_place(db, tmp_path):
+    """Test that plain files on disk are parsed memory-mapped and stored from disk, like read bytes"""
+    content = _read_sample('837P_sample.txt')
+    path = tmp_path / 'p.txt'
+    path.write_bytes(content)
+
+    entries = list(iter_local_entries('p.txt', str(path)))
+    assert entries == [('p.txt', LocalX12File(str(path), len(content)), None)]
+    assert list(iter_local_entries('p.txt', str(path), max_size=10)) == [('p.txt', None, 'File exceeds 10 bytes')]
+
+    manifest = BulkIngestor(db, workers=2).ingest(entries)
+    assert manifest[0]['status'] == 'created'
+    assert db.query(Claim).one().raw_x12_data == content.decode('utf-8')
+
+    # The same content as bytes is recognised as a duplicate by its hash
+    manifest = BulkIngestor(db, workers=1).ingest([('copy.txt', content, None)])
+    assert manifest[0]['status'] == 'duplicate'
+
+def test_bulk_ingest_splits_large_files_across_the_pool(db, tmp_path, monkeypatch):
+    """Test that files over the parallel threshold go through ParallelX12Parser, in memory and on disk"""
+    from app.services.parallel_parser import ParallelX12Parser
+    calls = []
+    original_map = ParallelX12Parser._map
+    def spy_map(self, worker, *args):
+        calls.append(worker.__name__)
+        return original_map(self, worker, *args)
+    monkeypatch.setattr(ParallelX12Parser, '_map', spy_map)
+
+    institutional = _read_sample('837I_sample.txt')
+    path = tmp_path / 'p.txt'
+    path.write_bytes(_read_sample('837P_sample.txt'))
+    entries = [('i.txt', institutional, None)] + list(iter_local_entries('p.txt', str(path)))
+    manifest = BulkIngestor(db, workers=2, parallel_threshold=0).ingest(entries)
+
+    assert calls == ['_parse_bytes_range', '_parse_file_range']
+    assert [result['status'] for result in manifest] == ['created', 'created']
+    assert manifest[0]['claim_ids'] == ['CLM001']
+    assert manifest[1]['claim_ids'] == ['CLM002']
+    # The validation-only pass reports what the single-pass worker does
+    assert manifest[0]['validation_errors'] == _parse_entry(institutional.decode('utf-8'))['validation']['error_details']
+    assert manifest[0]['validation_errors'][0]['segment_id'] == 'SE'
+    assert db.query(Claim).count() == 2
+
+def test_bulk_ingest_normalizes_in_batches(db, monkeypatch):
+    """Test that bulk parse workers leave values raw and ClaimNormalizer converts them"""
+    from app.services.claim_normalizer import ClaimNormalizer
+    from app.services.x12_parser import X12Parser
+    batches = []
+    normalize = ClaimNormalizer.normalize
+    def recording_normalize(self, claims):
+        batches.append([claim['claim']['total_charges'] for claim in claims])
+        return normalize(self, claims)
+    monkeypatch.setattr(ClaimNormalizer, 'normalize', recording_normalize)
+    monkeypatch.setattr(X12Parser, '_format_date', lambda self, value: pytest.fail('scalar date parse'))
+
+    content = _read_sample('837P_sample.txt')
+    manifest = BulkIngestor(db, workers=1).ingest([('p.txt', content, None)])
+
+    assert manifest[0]['status'] == 'created'
+    assert batches == [['350']]
+    claim = db.query(Claim).one()
+    assert claim.total_charges == 350.0
+    assert str(claim.patient_dob) == '1975-03-20'
+
+def test_async_bulk_ingest_matches_sync(db, async_session_factory, tmp_path):
+    """Test that AsyncBulkIngestor stores files, local ones included, and reports conflicts like BulkIngestor"""
+    import asyncio
+    from app.models.raw_payload import RawPayload
+    from app.services.bulk_ingest import AsyncBulkIngestor
+
+    institutional = _read_sample('837I_sample.txt')
+    path = tmp_path / 'p.txt'
+    path.write_bytes(_read_sample('837P_sample.txt'))
+    entries = [
+        ('i.txt', institutional, None),
+        ('conflict.txt', institutional.replace(b'000000001', b'000000009'), None),
+        ('copy.txt', institutional, None),
+    ] + list(iter_local_entries('p.txt', str(path)))
+
+    async def ingest():
+        async with async_session_factory() as session:
+            return await AsyncBulkIngestor(session, workers=2, batch_size=1).ingest(entries)
+    manifest = asyncio.run(ingest())
+
+    assert [result['status'] for result in manifest] == ['created', 'failed', 'duplicate', 'created']
+    assert manifest[1]['error'] == 'Claim IDs already exist: CLM001'
+    assert manifest[2]['claim_ids'] == ['CLM001']
+    assert manifest[3]['claim_ids'] == ['CLM002']
+    claims = {claim.claim_id: claim for claim in db.query(Claim).all()}
+    assert claims['CLM001'].raw_x12_data == institutional.decode('utf-8')
+    assert claims['CLM002'].raw_x12_data == path.read_text(encoding='utf-8')
+    assert db.query(RawPayload).count() == 2
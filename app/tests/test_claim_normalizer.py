@@ -0,0 +1,43 @@
+import os
+from app.services.claim_normalizer import ClaimNormalizer
+from app.services.x12_parser import X12Parser
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _read_sample(name):
+    with open(os.path.join(SAMPLE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+def test_batch_normalization_matches_scalar_parse():
+    """Test that raw parsing plus batch normalization gives the scalar parser's claims"""
+    normalizer = ClaimNormalizer()
+    for name in ('837I_sample.txt', '837P_sample.txt'):
+        content = _read_sample(name)
+        raw_claims = X12Parser(normalize=False).iter_claims(content)
+        assert list(normalizer.iter_normalized(raw_claims, batch_size=1)) == list(X12Parser().iter_claims(content))
+
+def test_normalize_dates():
+    """Test vectorized date formatting, the scalar fallback and the invalid mask"""
+    values = ['20231110', '231110', '751110', '', '2023-11-10', '20231301', '1231']
+    dates, invalid = ClaimNormalizer().normalize_dates(values)
+    
+    assert dates.tolist() == [X12Parser()._format_date(value) for value in values]
+    assert dates.tolist()[:3] == ['2023-11-10', '2023-11-10', '1975-11-10']
+    assert invalid.tolist() == [False, False, False, False, False, True, True]
+
+def test_normalize_amounts_flags_invalid():
+    """Test that bad amounts take the default and are masked instead of raising"""
+    amounts, invalid = ClaimNormalizer().normalize_amounts(['150', '', 'HC:99213', '25.50', 'nan'], 1.0)
+    assert amounts.tolist() == [150.0, 1.0, 1.0, 25.5, 1.0]
+    assert invalid.tolist() == [False, False, True, False, True]
+
+def test_normalize_claim_batch_masks():
+    """Test that an unparseable CLM02 is masked rather than failing the batch"""
+    content = _read_sample('837P_sample.txt').replace('CLM*CLM002*350*', 'CLM*CLM002*3x0*')
+    claims = list(X12Parser(normalize=False).iter_claims(content))
+    masks = ClaimNormalizer().normalize(claims)
+    
+    assert claims[0]['claim']['total_charges'] == 0.0
+    assert masks['total_charges'].tolist() == [True]
+    assert masks['charge_amount'].tolist() == [False, False, False]
+    assert claims[0]['patient']['patient_dob'] == '1975-03-20'
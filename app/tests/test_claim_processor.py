@@ -0,0 +1,79 @@
+import copy
+import os
+from app.models.claim import Claim, ClaimStatus
+from app.models.claim_detail import ClaimServiceLine, ClaimDiagnosis
+from app.models.remittance import Remittance
+from app.services.claim_processor import ClaimProcessor
+from app.services.x12_parser import X12Parser
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def test_create_claims_bulk_skips_conflicts(db):
+    """Test that bulk insert returns ids in input order and reports claim ID conflicts"""
+    with open(os.path.join(SAMPLE_DIR, '837P_sample.txt'), encoding='utf-8') as f:
+        content = f.read()
+    template = X12Parser().parse_837(content)
+    claims_data = []
+    for claim_id in ('B1', 'B2', 'B1', 'B3'):
+        claim_data = copy.deepcopy(template)
+        claim_data['claim']['claim_id'] = claim_id
+        claims_data.append(claim_data)
+    
+    processor = ClaimProcessor(db)
+    processor.create_claim(claims_data[3], None)
+    created = processor.create_claims_bulk(iter(claims_data), content, batch_size=2)
+    
+    assert created['claim_ids'] == ['B1', 'B2']
+    assert created['conflicts'] == ['B1', 'B3']
+    stored = {claim.claim_id: claim for claim in db.query(Claim).all()}
+    assert [stored[claim_id].id for claim_id in created['claim_ids']] == created['ids']
+    assert stored['B2'].status == ClaimStatus.VALIDATED
+    assert stored['B2'].raw_x12_data == content
+
+def test_claims_store_lines_and_diagnoses_as_rows(client, db):
+    """Test that single and bulk creation fill the detail tables and the list filters use them"""
+    with open(os.path.join(SAMPLE_DIR, '837P_sample.txt'), encoding='utf-8') as f:
+        template = X12Parser().parse_837(f.read())
+    claims_data = []
+    for claim_id, charge in (('L1', 150.0), ('L2', 900.0), ('L3', 150.0)):
+        claim_data = copy.deepcopy(template)
+        claim_data['claim']['claim_id'] = claim_id
+        claim_data['service_lines'][0]['charge_amount'] = charge
+        claims_data.append(claim_data)
+    claims_data[2]['diagnosis_codes'] = ['R69']
+    
+    processor = ClaimProcessor(db)
+    single = processor.create_claim(claims_data[0], None)
+    processor.create_claims_bulk(claims_data[1:])
+    
+    lines = db.query(ClaimServiceLine).filter(ClaimServiceLine.claim_id == single.id).order_by(ClaimServiceLine.line_number).all()
+    assert [line.procedure_code for line in lines] == [line['procedure_code'] for line in template['service_lines']]
+    assert db.query(ClaimDiagnosis).count() == 2 * len(template['diagnosis_codes']) + 1
+    
+    def claim_ids(**params):
+        return sorted(claim['claim_id'] for claim in client.get("/api/v1/claims", params=params).json()['claims'])
+    
+    code = template['service_lines'][0]['procedure_code']
+    assert claim_ids(procedure_code=code) == ['L1', 'L2', 'L3']
+    assert claim_ids(procedure_code=code, min_line_charge=500) == ['L2']
+    assert claim_ids(procedure_code='00000') == []
+    assert claim_ids(diagnosis_code='R69') == ['L3']
+    assert claim_ids(diagnosis_code=template['diagnosis_codes'][0]) == ['L1', 'L2']
+
+def test_deleting_a_claim_removes_its_detail_rows(client, db):
+    """Test that deleting an adjudicated claim leaves no service lines, diagnoses or remittances behind"""
+    with open(os.path.join(SAMPLE_DIR, '837P_sample.txt'), encoding='utf-8') as f:
+        content = f.read()
+    claim = ClaimProcessor(db).create_claim(X12Parser().parse_837(content), content)
+    claim_id, row_id = claim.claim_id, claim.id
+    assert db.query(ClaimServiceLine).filter(ClaimServiceLine.claim_id == row_id).count() > 0
+    assert client.post(f"/api/v1/claims/{claim_id}/adjudicate", json={"approve": True}).status_code == 200
+    assert client.get(f"/api/v1/remittance/{claim_id}").status_code == 200
+    assert db.query(Remittance).filter(Remittance.claim_id == claim_id).count() == 1
+    
+    assert client.delete(f"/api/v1/claims/{claim_id}").status_code == 204
+    db.expire_all()
+    assert db.query(Claim).filter(Claim.id == row_id).count() == 0
+    assert db.query(ClaimServiceLine).filter(ClaimServiceLine.claim_id == row_id).count() == 0
+    assert db.query(ClaimDiagnosis).filter(ClaimDiagnosis.claim_id == row_id).count() == 0
+    assert db.query(Remittance).filter(Remittance.claim_id == claim_id).count() == 0
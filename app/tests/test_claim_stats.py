@@ -0,0 +1,85 @@
+import copy
+import os
+from sqlalchemy import func
+from app.models.claim import Claim
+from app.services.claim_processor import ClaimProcessor
+from app.services.x12_parser import X12Parser
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _create_claims(db):
+    with open(os.path.join(SAMPLE_DIR, '837P_sample.txt'), encoding='utf-8') as f:
+        content = f.read()
+    template = X12Parser().parse_837(content)
+    claims_data = []
+    for index in range(6):
+        claim_data = copy.deepcopy(template)
+        claim_data['claim']['claim_id'] = f'S{index}'
+        claim_data['claim']['total_charges'] = 100.0 * (index + 1)
+        claim_data['provider']['provider_id'] = f'PRV{index % 2}'
+        if index == 5:
+            claim_data['claim']['service_date'] = None
+        claims_data.append(claim_data)
+    processor = ClaimProcessor(db)
+    processor.create_claim(claims_data[0], content)
+    processor.create_claims_bulk(claims_data[1:], content, batch_size=2)
+
+def _expected(db):
+    """Totals aggregated straight from the claims table"""
+    expected = {'total_claims': 0, 'total_charges': 0.0, 'total_paid': 0.0, 'by_status': {}}
+    rows = db.query(Claim.status, func.count(), func.sum(Claim.total_charges), func.sum(Claim.paid_amount)) \
+        .group_by(Claim.status).all()
+    for status, claims, charges, paid in rows:
+        expected['by_status'][status.value] = {'claims': claims, 'total_charges': round(charges, 2),
+                                               'total_paid': round(paid, 2)}
+        expected['total_claims'] += claims
+        expected['total_charges'] = round(expected['total_charges'] + charges, 2)
+        expected['total_paid'] = round(expected['total_paid'] + paid, 2)
+    return expected
+
+def _stats(client, **params):
+    response = client.get("/api/v1/claims/stats", params=params)
+    assert response.status_code == 200
+    data = response.json()
+    data.pop('groups')
+    return data
+
+def test_stats_follow_every_write_path(client, db):
+    """Test that the summary matches a direct aggregate after create, adjudicate, batch, PATCH and delete"""
+    assert _stats(client)['total_claims'] == 0
+    _create_claims(db)
+    assert _stats(client) == _expected(db)
+    assert _stats(client)['total_claims'] == 6
+
+    client.post("/api/v1/claims/S0/adjudicate", json={"approve": True})
+    client.post("/api/v1/claims/S1/adjudicate", json={"approve": False})
+    assert _stats(client) == _expected(db)
+
+    client.post("/api/v1/claims/adjudicate", json={"provider_id": "PRV0", "allowed_percentage": 0.5, "chunk_size": 1})
+    client.post("/api/v1/claims/adjudicate", json={"claim_ids": ["S3"], "approve": False})
+    db.expire_all()
+    assert _stats(client) == _expected(db)
+
+    client.patch("/api/v1/claims/S2/status", json={"status": "PAID", "paid_amount": 12.5})
+    client.delete("/api/v1/claims/S5")
+    db.expire_all()
+    assert _stats(client) == _expected(db)
+    assert _stats(client)['by_status']['PAID'] == {'claims': 1, 'total_charges': 300.0, 'total_paid': 12.5}
+
+def test_stats_group_by_and_filters(client, db):
+    """Test grouping by provider and service date, and the provider and date filters"""
+    _create_claims(db)
+    service_date = db.query(Claim).filter(Claim.claim_id == 'S0').one().service_date
+
+    data = client.get("/api/v1/claims/stats", params={"group_by": "provider"}).json()
+    assert [(group['key'], group['total_claims']) for group in data['groups']] == [('PRV0', 3), ('PRV1', 3)]
+
+    data = client.get("/api/v1/claims/stats", params={"group_by": "service_date"}).json()
+    assert {group['key']: group['total_claims'] for group in data['groups']} == {service_date.isoformat(): 5, None: 1}
+
+    data = client.get("/api/v1/claims/stats", params={
+        "provider_id": "PRV1", "service_date_from": service_date.isoformat(),
+        "service_date_to": service_date.isoformat()}).json()
+    assert data['total_claims'] == 2
+    assert data['total_charges'] == 200.0 + 400.0
+    assert client.get("/api/v1/claims/stats", params={"group_by": "patient"}).status_code == 422
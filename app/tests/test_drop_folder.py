@@ -0,0 +1,40 @@
+import json
+import os
+import shutil
+from app.models.claim import Claim
+from app.services.drop_folder import DropFolderIngestor, CHECKPOINT_NAME
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def test_drop_folder_moves_processed_files(db, tmp_path):
+    """Test that ingested files move to done/, bad ones to failed/ and others stay put"""
+    shutil.copy(os.path.join(SAMPLE_DIR, '837I_sample.txt'), tmp_path / 'a_837i.txt')
+    shutil.copy(os.path.join(SAMPLE_DIR, '837P_sample.txt'), tmp_path / 'b_837p.x12')
+    (tmp_path / 'c_broken.zip').write_bytes(b'not a zip')
+    (tmp_path / 'd_upload.txt.part').write_bytes(b'ISA*')
+
+    summary = DropFolderIngestor(db, str(tmp_path), workers=1, batch_size=1).run()
+
+    assert summary['files'] == 3
+    assert (summary['done'], summary['failed'], summary['claims_created']) == (2, 1, 2)
+    assert summary['claims_per_s'] > 0
+    assert sorted(os.listdir(tmp_path / 'done')) == ['a_837i.txt', 'b_837p.x12']
+    assert os.listdir(tmp_path / 'failed') == ['c_broken.zip']
+    assert sorted(os.listdir(tmp_path)) == ['d_upload.txt.part', 'done', 'failed']
+    assert db.query(Claim).count() == 2
+
+def test_drop_folder_resumes_from_checkpoint(db, tmp_path):
+    """Test that a file committed before a crash is moved without being parsed again"""
+    path = tmp_path / '837P.txt'
+    shutil.copy(os.path.join(SAMPLE_DIR, '837P_sample.txt'), path)
+    stat = os.stat(path)
+    record = {'file': '837P.txt', 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+              'status': 'done', 'claims_created': 1, 'errors': []}
+    (tmp_path / CHECKPOINT_NAME).write_text(json.dumps(record) + '\n{"file": "torn')
+
+    summary = DropFolderIngestor(db, str(tmp_path), workers=1).run()
+
+    assert (summary['resumed'], summary['files']) == (1, 0)
+    assert os.listdir(tmp_path / 'done') == ['837P.txt']
+    assert not os.path.exists(tmp_path / CHECKPOINT_NAME)
+    assert db.query(Claim).count() == 0
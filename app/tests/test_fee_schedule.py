@@ -0,0 +1,135 @@
+import copy
+import os
+from app.models.fee_schedule import FeeScheduleVersion, FeeScheduleEntry
+from app.services.claim_processor import ClaimProcessor
+from app.services.fee_schedule import FeeSchedule, FeeScheduleCache
+from app.services.x12_parser import X12Parser
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _store_sample(db, name):
+    with open(os.path.join(SAMPLE_DIR, name), encoding='utf-8') as f:
+        content = f.read()
+    return ClaimProcessor(db).create_claim(X12Parser().parse_837(content), content)
+
+def test_fee_schedule_prices_lines_by_most_specific_entry():
+    """Test entry precedence, unit rates capped at the charge, and the default for unlisted codes"""
+    schedule = FeeSchedule(3, [
+        ('99213', '', '', 90.0),
+        ('99213', '25', '', 80.0),
+        ('99213', '', 'PRV1', 100.0),
+        ('99213', '25', 'PRV1', 70.0),
+        ('90471', '', '', 10.0),
+    ])
+    assert schedule.rate('99213', '25', 'PRV1') == 70.0
+    assert schedule.rate('99213', '25', 'PRV2') == 80.0
+    assert schedule.rate('99213', '59', 'PRV1') == 100.0
+    assert schedule.rate('99213', '', 'PRV2') == 90.0
+    assert schedule.rate('99999') is None
+
+    claims = [
+        ([{'procedure_code': '99213', 'modifiers': ['25'], 'charge_amount': 150.0, 'units': 1.0},
+          {'procedure_code': '90471', 'charge_amount': 25.0, 'units': 3.0},
+          {'procedure_code': '99999', 'charge_amount': 40.0, 'units': 1.0}], 'PRV1'),
+        ([], 'PRV1'),
+        # Unnormalized parser output: amounts as strings, units missing
+        ([{'procedure_code': '99213', 'charge_amount': '95', 'units': ''}], 'PRV2'),
+    ]
+    priced = schedule.price(claims, default_percentage=0.5)
+
+    assert priced[0]['allowed_amount'] == 70.0 + 25.0 + 20.0
+    assert [line['allowed_amount'] for line in priced[0]['line_pricing']] == [70.0, 25.0, 20.0]
+    assert [line['source'] for line in priced[0]['line_pricing']] == ['fee_schedule', 'fee_schedule', 'default']
+    assert priced[1] == {'allowed_amount': 0.0, 'line_pricing': []}
+    assert priced[2]['allowed_amount'] == 90.0
+
+def test_published_schedule_reprices_adjudication(client, db):
+    """Test that publishing a schedule takes effect on the next adjudication, single and batch"""
+    claim = _store_sample(db, '837P_sample.txt')
+    assert client.get("/api/v1/fee-schedule").status_code == 404
+
+    response = client.post("/api/v1/fee-schedule", json={
+        "description": "2026 physician schedule",
+        "entries": [
+            {"procedure_code": "99213", "allowed_amount": 92.5},
+            {"procedure_code": "90715", "allowed_amount": 30.0},
+            {"procedure_code": "90715", "provider_id": claim.provider_id, "allowed_amount": 35.0},
+        ]
+    })
+    assert response.status_code == 201
+    assert response.json()["version"] == 1
+    assert client.get("/api/v1/fee-schedule").json()["entry_count"] == 3
+
+    data = client.post(f"/api/v1/claims/{claim.claim_id}/adjudicate", json={"approve": True}).json()
+    # 99213 and the provider's 90715 rate from the schedule, 90471 at 80% of its charge
+    assert data["allowed_amount"] == 92.5 + 25.0 * 0.8 + 35.0
+    assert data["adjudication_result"]["fee_schedule_version"] == 1
+    assert [line["source"] for line in data["adjudication_result"]["line_pricing"]] == ['fee_schedule', 'default', 'fee_schedule']
+
+    # A new version replaces the old one for batch repricing
+    client.post("/api/v1/fee-schedule", json={"entries": [{"procedure_code": "99213", "allowed_amount": 50.0}]})
+    data = client.post("/api/v1/claims/adjudicate", json={
+        "claim_ids": [claim.claim_id],
+        "status": "ADJUDICATED",
+        "allowed_percentage": 0.5,
+        "use_fee_schedule": True
+    }).json()
+    assert data["fee_schedule_version"] == 2
+    assert data["claims_adjudicated"] == 1
+
+    claim = client.get(f"/api/v1/claims/{claim.claim_id}").json()
+    assert claim["allowed_amount"] == claim["paid_amount"] == 50.0 + 12.5 + 87.5
+    assert claim["adjudication_result"]["batch_id"] == data["batch_id"]
+    assert len(claim["adjudication_result"]["line_pricing"]) == 3
+
+def test_cache_reloads_only_when_version_changes(db):
+    """Test that the cache serves its copy between checks and reloads on a new version"""
+    cache = FeeScheduleCache(check_interval=0)
+    assert cache.get(db) is None
+
+    db.add(FeeScheduleVersion(version=1, entry_count=1))
+    db.flush()
+    db.add(FeeScheduleEntry(version=1, procedure_code='99213', allowed_amount=90.0))
+    db.commit()
+    schedule = cache.get(db)
+    assert schedule.version == 1 and schedule.rate('99213') == 90.0
+    assert cache.get(db) is schedule
+
+    db.add(FeeScheduleVersion(version=2, entry_count=1))
+    db.flush()
+    db.add(FeeScheduleEntry(version=2, procedure_code='99213', allowed_amount=95.0))
+    db.commit()
+    assert cache.get(db).rate('99213') == 95.0
+
+    # Within the check interval the cached schedule is served without a query
+    cache.check_interval = 3600
+    db.add(FeeScheduleVersion(version=3, entry_count=0))
+    db.commit()
+    assert cache.get(db).version == 2
+    cache.invalidate()
+    assert cache.get(db).version == 3
+
+def test_batch_and_single_adjudication_price_alike(client, db):
+    """Test that a claim gets the same allowed_amount from batch and single adjudication by default"""
+    with open(os.path.join(SAMPLE_DIR, '837P_sample.txt'), encoding='utf-8') as f:
+        template = X12Parser().parse_837(f.read())
+    claims_data = []
+    for claim_id in ('SINGLE1', 'BATCH1', 'SINGLE2', 'BATCH2'):
+        claim_data = copy.deepcopy(template)
+        claim_data['claim']['claim_id'] = claim_id
+        claims_data.append(claim_data)
+    ClaimProcessor(db).create_claims_bulk(claims_data)
+
+    def allowed(single, batch):
+        client.post(f"/api/v1/claims/{single}/adjudicate", json={"approve": True})
+        client.post("/api/v1/claims/adjudicate", json={"claim_ids": [batch]})
+        return [client.get(f"/api/v1/claims/{claim_id}").json()["allowed_amount"] for claim_id in (single, batch)]
+
+    # No schedule published: both allow DEFAULT_ALLOWED_PERCENTAGE of charges
+    single, batch = allowed('SINGLE1', 'BATCH1')
+    assert single == batch
+
+    client.post("/api/v1/fee-schedule", json={"entries": [{"procedure_code": "99213", "allowed_amount": 61.0}]})
+    single, batch = allowed('SINGLE2', 'BATCH2')
+    assert single == batch
+    assert client.get("/api/v1/claims/BATCH2").json()["adjudication_result"]["fee_schedule_version"] == 1
@@ -0,0 +1,49 @@
+import os
+from app.services.ingest_cache import X12ContentHasher, ParseCache, content_hash
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _read_sample(name):
+    with open(os.path.join(SAMPLE_DIR, name), 'rb') as f:
+        return f.read()
+
+def test_content_hash_ignores_line_endings():
+    """Test that CRLF, LF and unbroken copies of a file hash the same"""
+    content = _read_sample('837I_sample.txt')
+    unbroken = content.replace(b'\n', b'')
+    
+    assert content_hash(content) == content_hash(unbroken)
+    assert content_hash(content.replace(b'\n', b'\r\n')) == content_hash(unbroken)
+    assert content_hash(content) != content_hash(_read_sample('837P_sample.txt'))
+
+def test_content_hasher_chunked():
+    """Test that the incremental hash does not depend on chunk boundaries"""
+    content = _read_sample('837P_sample.txt')
+    for chunk_size in (1, 50, 106, 4096):
+        hasher = X12ContentHasher()
+        for start in range(0, len(content), chunk_size):
+            hasher.update(content[start:start + chunk_size])
+        assert hasher.hexdigest() == content_hash(content), chunk_size
+        assert hasher.size == len(content)
+
+def test_content_hash_newline_terminator_kept():
+    """Test that line breaks are hashed when they are the segment terminator"""
+    content = _read_sample('837P_sample.txt').replace(b'~\n', b'\n')
+    isa = content[:106]
+    assert isa.endswith(b'\n')
+    assert content_hash(content) != content_hash(content.replace(b'\n', b'\r\n'))
+
+def test_parse_cache_lru():
+    """Test LRU eviction and the per-file claim limit"""
+    cache = ParseCache(maxsize=2, max_claims=2)
+    cache.put('a', [{}])
+    cache.put('b', [{}])
+    assert cache.get('a') == [{}]
+    cache.put('c', [{}, {}])
+    
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    
+    cache.put('d', [{}, {}, {}])
+    assert cache.get('d') is None
+    assert len(cache) == 2
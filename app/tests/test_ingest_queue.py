@@ -0,0 +1,104 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from app.models.claim import Claim
+from app.models.ingest_job import IngestJob, IngestJobStatus
+from app.services.ingest_queue import IngestQueue
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _queued_job(db, job_id, status=IngestJobStatus.QUEUED):
+    db.add(IngestJob(job_id=job_id, status=status, files=[], files_processed=0, files_failed=0, claims_created=0))
+    db.commit()
+
+def test_job_is_claimed_by_one_worker_only(db, session_factory, tmp_path):
+    """Test that QUEUED -> RUNNING succeeds once, so a job is never run twice"""
+    _queued_job(db, 'JOB-1')
+    first = IngestQueue(session_factory, upload_dir=str(tmp_path))
+    second = IngestQueue(session_factory, upload_dir=str(tmp_path))
+
+    with session_factory() as session:
+        assert first._claim(session, 'JOB-1')
+        assert not second._claim(session, 'JOB-1')
+
+    # A job another worker is running is left alone
+    second.run('JOB-1')
+    db.expire_all()
+    job = db.query(IngestJob).filter(IngestJob.job_id == 'JOB-1').one()
+    assert job.status == IngestJobStatus.RUNNING and job.finished_at is None
+
+def test_resume_requeues_only_stale_jobs(db, session_factory, tmp_path):
+    """Test that startup leaves jobs of a live owner running and takes over those without a heartbeat"""
+    live = IngestQueue(session_factory, upload_dir=str(tmp_path), stale_after=60)
+    dead = IngestQueue(session_factory, upload_dir=str(tmp_path), stale_after=60)
+    _queued_job(db, 'JOB-LIVE')
+    _queued_job(db, 'JOB-DEAD')
+    with session_factory() as session:
+        assert live._claim(session, 'JOB-LIVE')
+        assert dead._claim(session, 'JOB-DEAD')
+    # Both were claimed five minutes ago; only the live owner has beaten since
+    db.query(IngestJob).update({IngestJob.heartbeat_at: datetime.now(timezone.utc) - timedelta(minutes=5)})
+    db.commit()
+    live.heartbeat()
+
+    restarted = IngestQueue(session_factory, upload_dir=str(tmp_path), stale_after=60)
+    restarted.submit = lambda job_id: None
+    assert restarted.resume() == 1
+    restarted.shutdown()
+
+    db.expire_all()
+    statuses = {job.job_id: (job.status, job.owner) for job in db.query(IngestJob).all()}
+    assert statuses == {'JOB-LIVE': (IngestJobStatus.RUNNING, live.owner), 'JOB-DEAD': (IngestJobStatus.QUEUED, None)}
+
+def test_progress_is_saved_only_after_commits(db, session_factory, tmp_path):
+    """Test that job progress is written through its own session once a batch is committed"""
+    with open(os.path.join(SAMPLE_DIR, '837P_sample.txt'), 'rb') as f:
+        content = f.read()
+    path = tmp_path / 'claims.txt'
+    path.write_bytes(content)
+    db.add(IngestJob(job_id='JOB-2', status=IngestJobStatus.QUEUED, files=[{'filename': 'claims.txt', 'path': str(path)}],
+                     files_processed=0, files_failed=0, claims_created=0))
+    db.commit()
+
+    queue = IngestQueue(session_factory, upload_dir=str(tmp_path))
+    queue.PROGRESS_INTERVAL = 0
+    saved = []
+    save_progress = queue._save_progress
+    def record(job_id, counts):
+        # The claims are already committed when progress is saved
+        with session_factory() as session:
+            saved.append((dict(counts), session.query(Claim).count()))
+        save_progress(job_id, counts)
+    queue._save_progress = record
+    queue.run('JOB-2')
+
+    assert saved == [({'files_processed': 1, 'files_failed': 0, 'claims_created': 1}, 1)]
+    db.expire_all()
+    job = db.query(IngestJob).filter(IngestJob.job_id == 'JOB-2').one()
+    assert (job.status, job.files_processed, job.claims_created) == (IngestJobStatus.COMPLETED, 1, 1)
+
+def test_heartbeat_sweeps_jobs_that_go_stale_later(db, session_factory, tmp_path):
+    """Test that a job of a process restarted inside the stale window is requeued once its heartbeat ages"""
+    previous = IngestQueue(session_factory, upload_dir=str(tmp_path), stale_after=60)
+    _queued_job(db, 'JOB-3')
+    with session_factory() as session:
+        assert previous._claim(session, 'JOB-3')
+
+    restarted = IngestQueue(session_factory, upload_dir=str(tmp_path), heartbeat_interval=0.01, stale_after=60)
+    submitted = []
+    restarted.submit = submitted.append
+    try:
+        # Still fresh at startup, so resume() leaves it RUNNING
+        assert restarted.resume() == 0
+        db.query(IngestJob).update({IngestJob.heartbeat_at: datetime.now(timezone.utc) - timedelta(minutes=5)})
+        db.commit()
+        deadline = time.monotonic() + 5
+        while not submitted and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        restarted.shutdown()
+
+    assert submitted == ['JOB-3']
+    db.expire_all()
+    job = db.query(IngestJob).filter(IngestJob.job_id == 'JOB-3').one()
+    assert (job.status, job.owner) == (IngestJobStatus.QUEUED, None)
@@ -1,3 +1,7 @@
+import os
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "sample_files")
+
 def test_root(client):
     """Test root endpoint"""
     response = client.get("/")
@@ -17,3 +21,284 @@ def test_api_health(client):
     data = response.json()
     assert "status" in data
     assert "app" in data
+
+def test_upload_persists_every_claim(client):
+    """Test that a file with several CLM loops creates one claim per loop"""
+    content = ''
+    for name in ('837I_sample.txt', '837P_sample.txt'):
+        with open(os.path.join(SAMPLE_DIR, name), encoding='utf-8') as f:
+            content += f.read()
+    
+    response = client.post(
+        "/api/v1/claims/upload",
+        files={"file": ("batch.txt", content, "text/plain")}
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["claim_id"] == "CLM001"
+    assert data["claims_created"] == 2
+    assert data["claim_ids"] == ["CLM001", "CLM002"]
+    
+    response = client.get("/api/v1/claims")
+    assert response.json()["total"] == 2
+
+def test_upload_duplicate_file_returns_existing_claims(client):
+    """Test that resending the same file, even with other line endings, creates nothing"""
+    with open(os.path.join(SAMPLE_DIR, "837P_sample.txt"), encoding="utf-8") as f:
+        content = f.read()
+    
+    first = client.post("/api/v1/claims/upload", files={"file": ("claims.txt", content, "text/plain")})
+    assert first.status_code == 201
+    assert first.json()["duplicate"] is False
+    
+    resent = content.replace("~\n", "~\r\n")
+    second = client.post("/api/v1/claims/upload", files={"file": ("retry.txt", resent, "text/plain")})
+    assert second.status_code == 200
+    data = second.json()
+    assert data["duplicate"] is True
+    assert data["claims_created"] == 0
+    assert data["claim_ids"] == first.json()["claim_ids"]
+    assert data["id"] == first.json()["id"]
+    
+    response = client.get("/api/v1/claims")
+    assert response.json()["total"] == 1
+
+def test_upload_parses_off_the_event_loop(client, monkeypatch):
+    """Test that a non-background upload is parsed and compressed in worker threads, not on the event loop"""
+    import threading
+    from app.models.raw_payload import RawPayload
+    from app.services.claim_processor import AsyncClaimProcessor
+    from app.services.x12_parser import X12StreamParser
+    
+    threads = {}
+    find_ingested_claims = AsyncClaimProcessor.find_ingested_claims
+    feed = X12StreamParser.feed
+    compress_chunks = RawPayload.compress_chunks
+    
+    async def recording_find(self, content_hash):
+        threads['loop'] = threading.current_thread()
+        return await find_ingested_claims(self, content_hash)
+    
+    def recording_feed(self, chunk):
+        threads['parse'] = threading.current_thread()
+        return feed(self, chunk)
+    
+    def recording_compress(chunks, level):
+        threads['compress'] = threading.current_thread()
+        return compress_chunks(chunks, level)
+    
+    monkeypatch.setattr(AsyncClaimProcessor, 'find_ingested_claims', recording_find)
+    monkeypatch.setattr(X12StreamParser, 'feed', recording_feed)
+    monkeypatch.setattr(RawPayload, 'compress_chunks', staticmethod(recording_compress))
+    
+    with open(os.path.join(SAMPLE_DIR, "837P_sample.txt"), encoding="utf-8") as f:
+        response = client.post("/api/v1/claims/upload", files={"file": ("claims.txt", f.read(), "text/plain")})
+    assert response.status_code == 201
+    assert threads['parse'] is not threads['loop']
+    assert threads['compress'] is not threads['loop']
+
+def test_large_upload_parses_across_the_pool(client, monkeypatch):
+    """Test that an upload over PARSE_PARALLEL_THRESHOLD is split across the parse pool"""
+    from app.core.config import settings
+    from app.services.parallel_parser import ParallelX12Parser
+    
+    calls = []
+    original_map = ParallelX12Parser._map
+    
+    def recording_map(self, worker, *args):
+        calls.append(worker.__name__)
+        return original_map(self, worker, *args)
+    
+    monkeypatch.setattr(ParallelX12Parser, '_map', recording_map)
+    monkeypatch.setattr(settings, 'PARSE_PARALLEL_THRESHOLD', 1)
+    monkeypatch.setattr(settings, 'PARSE_WORKERS', 2)
+    
+    with open(os.path.join(SAMPLE_DIR, "837P_sample.txt"), encoding="utf-8") as f:
+        response = client.post("/api/v1/claims/upload", files={"file": ("claims.txt", f.read(), "text/plain")})
+    assert response.status_code == 201
+    assert calls == ['_parse_bytes_range']
+    assert client.get("/api/v1/claims/CLM002").status_code == 200
+
+def test_bulk_upload_archive_manifest(client):
+    """Test a bulk upload of a file plus a zip with a duplicate and an unsupported member"""
+    import io
+    import zipfile
+    
+    samples = {}
+    for name in ("837I_sample.txt", "837P_sample.txt"):
+        with open(os.path.join(SAMPLE_DIR, name), "rb") as f:
+            samples[name] = f.read()
+    
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("batch/837P_sample.txt", samples["837P_sample.txt"])
+        zf.writestr("batch/again.x12", samples["837P_sample.txt"].replace(b"\n", b"\r\n"))
+        zf.writestr("batch/notes.pdf", b"%PDF")
+    
+    response = client.post(
+        "/api/v1/claims/upload/bulk",
+        files=[
+            ("files", ("837I_sample.txt", samples["837I_sample.txt"], "text/plain")),
+            ("files", ("batch.zip", archive.getvalue(), "application/zip")),
+        ]
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["files_received"] == 4
+    assert data["files_created"] == 2
+    assert data["claims_created"] == 2
+    
+    files = {result["filename"]: result for result in data["files"]}
+    assert files["837I_sample.txt"]["claim_ids"] == ["CLM001"]
+    assert files["batch.zip/batch/837P_sample.txt"]["status"] == "created"
+    assert files["batch.zip/batch/again.x12"]["status"] == "duplicate"
+    assert files["batch.zip/batch/again.x12"]["claim_ids"] == ["CLM002"]
+    assert files["batch.zip/batch/notes.pdf"]["status"] == "failed"
+    
+    # The sample files declare a wrong SE01 segment count
+    assert files["837I_sample.txt"]["validation_errors"][0]["segment_id"] == "SE"
+    
+    response = client.get("/api/v1/claims")
+    assert response.json()["total"] == 2
+
+def test_bulk_upload_reject_invalid(client):
+    """Test that reject_invalid skips files with validation errors"""
+    with open(os.path.join(SAMPLE_DIR, "837I_sample.txt"), "rb") as f:
+        content = f.read()
+    
+    response = client.post(
+        "/api/v1/claims/upload/bulk?reject_invalid=true",
+        files=[("files", ("837I_sample.txt", content, "text/plain"))]
+    )
+    assert response.status_code == 201
+    assert response.json()["files"][0]["status"] == "rejected"
+    assert client.get("/api/v1/claims").json()["total"] == 0
+
+def _wait_for_job(client, job_id, timeout=30):
+    import time
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        if job["status"] in ("COMPLETED", "FAILED") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+def test_background_upload_job(client, ingest_queue):
+    """Test that a background upload returns 202 and the job reports its results"""
+    with open(os.path.join(SAMPLE_DIR, "837P_sample.txt"), "rb") as f:
+        response = client.post(
+            "/api/v1/claims/upload?background=true",
+            files={"file": ("claims.txt", f.read(), "text/plain")}
+        )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] in ("QUEUED", "RUNNING", "COMPLETED")
+    assert response.headers["location"] == f"/api/v1/jobs/{job['job_id']}"
+    
+    job = _wait_for_job(client, job["job_id"])
+    assert job["status"] == "COMPLETED"
+    assert job["files_received"] == 1
+    assert job["files_processed"] == 1
+    assert job["claims_created"] == 1
+    assert job["results"][0]["claim_ids"] == ["CLM002"]
+    assert not os.listdir(ingest_queue.upload_dir)
+    
+    assert client.get("/api/v1/claims/CLM002").status_code == 200
+    assert client.get("/api/v1/jobs/JOB-MISSING").status_code == 404
+
+def test_upload_rejects_non_x12(client):
+    """Test that an upload without an ISA header is refused while streaming"""
+    response = client.post(
+        "/api/v1/claims/upload",
+        files={"file": ("claims.txt", b"not an interchange", "text/plain")}
+    )
+    assert response.status_code == 400
+    assert "ISA" in response.json()["detail"]
+
+def test_claim_lifecycle_async_endpoints(client):
+    """Test upload, adjudication, 835 remittance and delete through the async session"""
+    with open(os.path.join(SAMPLE_DIR, "837P_sample.txt"), encoding="utf-8") as f:
+        content = f.read()
+    claim_id = client.post(
+        "/api/v1/claims/upload", files={"file": ("claims.txt", content, "text/plain")}
+    ).json()["claim_id"]
+    
+    response = client.post(f"/api/v1/claims/{claim_id}/adjudicate", json={"approve": True})
+    assert response.status_code == 200
+    assert response.json()["status"] == "ADJUDICATED"
+    
+    response = client.get(f"/api/v1/remittance/{claim_id}")
+    assert response.status_code == 200
+    assert response.json()["total_paid"] == response.json()["total_allowed"]
+    assert client.get(f"/api/v1/remittance/{claim_id}/835").json()["raw_835"].startswith("ISA*")
+    
+    response = client.get("/api/v1/claims", params={"status": "ADJUDICATED"})
+    assert response.json()["total"] == 1
+    assert client.get(f"/api/v1/claims/{claim_id}").json()["paid_amount"] > 0
+    
+    assert client.delete(f"/api/v1/claims/{claim_id}").status_code == 204
+    assert client.get(f"/api/v1/claims/{claim_id}").status_code == 404
+
+def test_async_database_url():
+    """Test that the sync DATABASE_URL maps to the async driver of its backend"""
+    from app.db.session import async_database_url
+    
+    assert async_database_url("postgresql://u:p@db:5432/fastval") == "postgresql+asyncpg://u:p@db:5432/fastval"
+    assert async_database_url("postgresql+psycopg2://u@db/fastval") == "postgresql+asyncpg://u@db/fastval"
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+def test_upload_conflicting_claim_ids_returns_409(client):
+    """Test that a different file reusing stored claim IDs is rejected without storing anything"""
+    with open(os.path.join(SAMPLE_DIR, "837P_sample.txt"), encoding="utf-8") as f:
+        content = f.read()
+    assert client.post("/api/v1/claims/upload", files={"file": ("a.txt", content, "text/plain")}).status_code == 201
+    
+    changed = content.replace("000000002", "000000009")
+    response = client.post("/api/v1/claims/upload", files={"file": ("b.txt", changed, "text/plain")})
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Claim IDs already exist: CLM002"
+    assert client.get("/api/v1/claims").json()["total"] == 1
+
+def test_claims_cursor_pagination(client, db):
+    """Test walking claims by next_cursor, count modes and the skip/limit contract"""
+    import copy
+    from app.services.claim_processor import ClaimProcessor
+    from app.services.x12_parser import X12Parser
+    
+    with open(os.path.join(SAMPLE_DIR, "837P_sample.txt"), encoding="utf-8") as f:
+        template = X12Parser().parse_837(f.read())
+    claims_data = []
+    for number in range(5):
+        claim_data = copy.deepcopy(template)
+        claim_data['claim']['claim_id'] = f"PAGE{number}"
+        claims_data.append(claim_data)
+    ClaimProcessor(db).create_claims_bulk(claims_data)
+    
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "count": "none"}
+        if cursor:
+            params["cursor"] = cursor
+        data = client.get("/api/v1/claims", params=params).json()
+        assert data["total"] is None
+        seen += [claim["claim_id"] for claim in data["claims"]]
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"PAGE{number}" for number in range(5)]
+    
+    data = client.get("/api/v1/claims", params={"skip": 4, "limit": 2}).json()
+    assert (data["total"], data["page"], data["next_cursor"]) == (5, 3, None)
+    assert [claim["claim_id"] for claim in data["claims"]] == ["PAGE4"]
+    
+    service_date = data["claims"][0]["service_date"]
+    assert client.get("/api/v1/claims", params={"service_date_from": service_date,
+                                                "service_date_to": service_date}).json()["total"] == 5
+    assert client.get("/api/v1/claims", params={"service_date_from": "2100-01-01"}).json()["total"] == 0
+    
+    # Falls back to an exact count where the database has no planner estimate
+    data = client.get("/api/v1/claims", params={"count": "estimate", "provider_id": "nobody"}).json()
+    assert (data["total"], data["total_is_estimate"]) == (0, False)
+    
+    assert client.get("/api/v1/claims", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/v1/claims", params={"cursor": "eyJpZCI6MX0", "skip": 1}).status_code == 400
@@ -0,0 +1,41 @@
+import os
+from app.services.x12_parser import X12Parser
+from app.services.parallel_parser import ParallelX12Parser
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _corpus(copies):
+    content = ''
+    for name in ('837I_sample.txt', '837P_sample.txt'):
+        with open(os.path.join(SAMPLE_DIR, name), encoding='utf-8') as f:
+            content += f.read()
+    return content * copies
+
+def test_parallel_matches_sequential(tmp_path):
+    """Test that claims parsed across workers come back complete and in order"""
+    content = _corpus(20)
+    path = tmp_path / 'interchange.txt'
+    path.write_text(content, encoding='utf-8')
+    expected = list(X12Parser().iter_claims(content))
+    
+    parser = ParallelX12Parser(workers=2, threshold=0)
+    assert list(parser.iter_claims_from_file(str(path))) == expected
+    assert list(parser.iter_claims(content.encode('utf-8'))) == expected
+
+def test_parallel_index_ranges():
+    """Test that ST/SE ranges carry their functional group's claim type"""
+    content = _corpus(1).replace('GS*HP', 'GS*HC', 1).encode('utf-8')
+    parser = ParallelX12Parser(workers=2, threshold=0)
+    delimiters, ranges = parser._index(content)
+    
+    assert delimiters == ('~', '*')
+    assert [claim_type for _, _, claim_type in ranges] == ['837I', '837P']
+    assert content[ranges[0][0]:].startswith(b'ST*837*0001')
+    assert ranges[-1][1] == len(content)
+
+def test_small_input_stays_in_process():
+    """Test the size threshold fallback"""
+    content = _corpus(1)
+    parser = ParallelX12Parser(workers=4, threshold=len(content) + 1)
+    claims = list(parser.iter_claims(content))
+    assert [c['claim']['claim_id'] for c in claims] == ['CLM001', 'CLM002']
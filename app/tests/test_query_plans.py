@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from sqlalchemy import select
+from app.api.v1.endpoints.claims import claims_query
+from app.models.claim import Claim, ClaimStatus
+from app.models.remittance import Remittance
+
+def _plan(db, query):
+    """SQLite's EXPLAIN QUERY PLAN for a statement, as one string"""
+    compiled = query.compile(db.get_bind(), compile_kwargs={'literal_binds': True})
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+    return ' | '.join(row[-1] for row in rows)
+
+def test_list_filters_use_indexes(db):
+    """Test that each claim list filter is answered from its index rather than a table scan"""
+    cases = [
+        (claims_query(status=ClaimStatus.VALIDATED, created_from=datetime(2026, 1, 1)),
+         'ix_claims_status_created_at'),
+        (claims_query(status=ClaimStatus.VALIDATED, provider_id='PRV1'), 'ix_claims_provider_id_status'),
+        (claims_query(service_date_from=date(2026, 1, 1), service_date_to=date(2026, 1, 31)),
+         'ix_claims_service_date'),
+        (claims_query(patient_id='PAT1'), 'ix_claims_patient_id'),
+        (claims_query(procedure_code='99213', min_line_charge=500.0), 'ix_claim_service_lines_procedure_code'),
+        (claims_query(provider_id='PRV1', min_line_charge=500.0), 'ix_claim_service_lines_charge_amount'),
+        (claims_query(diagnosis_code='J20.9'), 'ix_claim_diagnoses_code'),
+    ]
+    for query, index in cases:
+        plan = _plan(db, query.order_by(Claim.id).limit(100))
+        assert f'INDEX {index} ' in plan, plan
+
+def test_work_queue_and_remittance_lookups_use_indexes(db):
+    """Test the partial index on open claims and the index on remittances.claim_id"""
+    plan = _plan(db, select(Claim.id).where(Claim.id > 0, Claim.is_open()).order_by(Claim.id).limit(5000))
+    assert 'USING INDEX ix_claims_open_id' in plan, plan
+    
+    plan = _plan(db, select(Remittance).where(Remittance.claim_id == 'CLM001'))
+    assert 'USING INDEX ix_remittances_claim_id' in plan, plan
+    
+    # The partial index only serves queries whose filter implies it
+    plan = _plan(db, select(Claim.id).where(Claim.id > 0, Claim.status != ClaimStatus.PAID).order_by(Claim.id))
+    assert 'ix_claims_open_id' not in plan, plan
@@ -0,0 +1,65 @@
+import os
+from sqlalchemy import event
+from app.models.claim import Claim
+from app.models.raw_payload import RawPayload
+from app.services.claim_processor import ClaimProcessor
+from app.services.x12_parser import X12Parser
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _read_sample(name):
+    with open(os.path.join(SAMPLE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+def test_claims_share_one_compressed_payload(db):
+    """Test that every claim of a file references one compressed copy of it"""
+    content = _read_sample('837I_sample.txt') + _read_sample('837P_sample.txt')
+    processor = ClaimProcessor(db)
+    for claim_data in X12Parser().iter_claims(content):
+        processor.create_claim(claim_data, content, commit=False)
+    db.commit()
+
+    payload = db.query(RawPayload).one()
+    assert payload.size_bytes == len(content.encode('utf-8'))
+    assert len(payload.data) < payload.size_bytes
+    claims = db.query(Claim).order_by(Claim.id).all()
+    assert {claim.raw_x12_hash for claim in claims} == {payload.content_hash}
+    assert claims[1].raw_x12_data == content
+
+    # The same content arriving as another string object is not stored again
+    ClaimProcessor(db).payloads.put(content[:1] + content[1:])
+    db.commit()
+    assert db.query(RawPayload).count() == 1
+
+def test_claim_queries_skip_payload(db):
+    """Test that loading claims does not read raw payloads until one is accessed"""
+    content = _read_sample('837P_sample.txt')
+    ClaimProcessor(db).create_claim(X12Parser().parse_837(content), content)
+    db.expunge_all()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind(), 'before_cursor_execute', listener)
+    try:
+        claim = db.query(Claim).one()
+        assert 'raw_payloads' not in statements[-1]
+        assert claim.raw_x12_data == content
+        assert 'raw_payloads' in statements[-1]
+    finally:
+        event.remove(db.get_bind(), 'before_cursor_execute', listener)
+
+def test_put_stream_matches_put(db):
+    """Test that a payload streamed in chunks is stored and hashed exactly like the whole string"""
+    content = _read_sample('837P_sample.txt')
+    data = content.encode('utf-8')
+    processor = ClaimProcessor(db)
+    content_hash = processor.payloads.put_stream(data[i:i + 100] for i in range(0, len(data), 100))
+    db.commit()
+
+    payload = db.query(RawPayload).one()
+    assert payload.content_hash == content_hash == RawPayload.hash_bytes(data)
+    assert payload.size_bytes == len(data)
+    assert RawPayload.decode(payload.data) == content
+    assert processor.payloads.put(content) == content_hash
+    db.commit()
+    assert db.query(RawPayload).count() == 1
@@ -0,0 +1,84 @@
+import os
+import time
+import pytest
+from app.services.claim_processor import ClaimProcessor
+from app.services.response_cache import CacheBackend, ResponseCache, MemoryCacheBackend, SQLiteCacheBackend, response_cache
+from app.services.x12_parser import X12Parser
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _store_sample(db):
+    with open(os.path.join(SAMPLE_DIR, '837P_sample.txt'), encoding='utf-8') as f:
+        content = f.read()
+    return ClaimProcessor(db).create_claim(X12Parser().parse_837(content), content).claim_id
+
+def test_backends_expire_evict_and_share(tmp_path):
+    """Test TTL expiry and LRU eviction in memory, and one SQLite file seen by two processes' backends"""
+    memory = MemoryCacheBackend(maxsize=2)
+    memory.set('a', b'1', 60)
+    memory.set('b', b'2', 60)
+    memory.get('a')
+    memory.set('c', b'3', 60)
+    assert (memory.get('a'), memory.get('b'), memory.get('c')) == (b'1', None, b'3')
+    memory.set('d', b'4', 0.01)
+    time.sleep(0.02)
+    assert memory.get('d') is None
+
+    path = str(tmp_path / 'cache.db')
+    first, second = SQLiteCacheBackend(path), SQLiteCacheBackend(path)
+    first.set('claim:C1', b'{}', 60)
+    assert second.get('claim:C1') == b'{}'
+    second.delete(['claim:C1'])
+    assert first.get('claim:C1') is None
+    first.set('claim:C2', b'{}', -1)
+    assert second.get('claim:C2') is None
+
+    cache = ResponseCache(SQLiteCacheBackend(path), ttl=60)
+    cache.set('claim', 'C3', b'claim')
+    cache.set('remittance', 'C3', b'remittance')
+    cache.invalidate(['C3'])
+    assert cache.get('claim', 'C3') is None and cache.get('remittance', 'C3') is None
+    assert ResponseCache(None).get('claim', 'C3') is None
+
+def test_incomplete_backend_fails_on_creation():
+    """Test that a backend missing any storage method cannot be instantiated"""
+    class GetOnlyBackend(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyBackend()
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+def test_claim_and_remittance_reads_are_cached_until_written(client, db):
+    """Test hits after the first read and invalidation on PATCH, adjudication, remittance, batch and delete"""
+    claim_id = _store_sample(db)
+
+    first = client.get(f"/api/v1/claims/{claim_id}")
+    assert first.status_code == 200
+    assert client.get(f"/api/v1/claims/{claim_id}").json() == first.json()
+    assert response_cache.report()['namespaces']['claim'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+    client.patch(f"/api/v1/claims/{claim_id}/status", json={"status": "PENDING"})
+    assert client.get(f"/api/v1/claims/{claim_id}").json()["status"] == "PENDING"
+
+    assert client.get(f"/api/v1/remittance/{claim_id}").status_code == 400
+    client.post(f"/api/v1/claims/{claim_id}/adjudicate", json={"approve": True})
+    assert client.get(f"/api/v1/claims/{claim_id}").json()["status"] == "ADJUDICATED"
+
+    summary = client.get(f"/api/v1/remittance/{claim_id}").json()
+    assert client.get(f"/api/v1/remittance/{claim_id}").json() == summary
+    assert response_cache.report()['namespaces']['remittance']['hits'] == 1
+
+    client.post("/api/v1/claims/adjudicate", json={"claim_ids": [claim_id], "status": "ADJUDICATED", "approve": False})
+    assert client.get(f"/api/v1/claims/{claim_id}").json()["status"] == "DENIED"
+    assert client.get(f"/api/v1/remittance/{claim_id}").json()["total_paid"] == 0.0
+
+    client.delete(f"/api/v1/claims/{claim_id}")
+    assert client.get(f"/api/v1/claims/{claim_id}").status_code == 404
+
+    stats = client.get("/api/v1/health/cache", params={"reset": True}).json()
+    assert stats['backend'] == 'MemoryCacheBackend'
+    assert stats['invalidations'] == 5
+    assert client.get("/api/v1/health/cache").json()['namespaces']['claim']['hits'] == 0
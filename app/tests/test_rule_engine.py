@@ -0,0 +1,109 @@
+import pytest
+from datetime import date
+from app.models.claim import Claim, ClaimStatus
+from app.services.claim_processor import ClaimProcessor
+from app.services.rule_engine import RuleEngine, RuleError, DEFAULT_RULES
+
+def _claim(**values):
+    claim = {
+        'claim_id': 'C1',
+        'claim_type': '837P',
+        'patient_id': 'PAT1',
+        'patient_name': 'DOE JOHN',
+        'provider_id': 'PRV1',
+        'total_charges': 100.0,
+        'service_lines': [{'procedure_code': '99213'}],
+        'diagnosis_codes': ['J20.9'],
+        'procedure_codes': ['99213'],
+    }
+    claim.update(values)
+    return claim
+
+def test_default_rules_keep_validation_output():
+    """Test that the built-in rules report the same errors and warnings, in order, per claim"""
+    results = RuleEngine().evaluate([
+        _claim(),
+        _claim(patient_id='', diagnosis_codes=[], total_charges=0.0, patient_name='JO'),
+        _claim(patient_name='', diagnosis_codes=[f'D{i}' for i in range(13)], provider_id=None),
+    ])
+    assert results[0] == {'valid': True, 'errors': [], 'warnings': []}
+    assert results[1] == {
+        'valid': False,
+        'errors': ['Missing patient ID', 'Missing diagnosis codes', 'Total charges must be greater than zero'],
+        'warnings': ['Patient name seems incomplete'],
+    }
+    assert results[2] == {
+        'valid': False,
+        'errors': ['Missing provider ID'],
+        'warnings': ['Unusual number of diagnosis codes (>12)'],
+    }
+
+def test_scoped_rules_and_per_rule_stats():
+    """Test payer-style scoped rules, code rules, hit counts and rejection of bad definitions"""
+    engine = RuleEngine(DEFAULT_RULES + [
+        {'id': 'prv2-no-99215', 'message': 'PRV2 does not cover 99215',
+         'when': [{'field': 'provider_id', 'op': 'in', 'value': ['PRV2']}],
+         'field': 'procedure_codes', 'op': 'any_in', 'value': ['99215']},
+        {'id': 'prv2-claim-id-format', 'message': 'PRV2 claim IDs start with P', 'severity': 'warning',
+         'when': [{'field': 'provider_id', 'op': 'in', 'value': ['PRV2']}],
+         'field': 'claim_id', 'op': 'not_matches', 'value': r'P\w+'},
+        {'id': 'high-charge-per-line', 'message': 'Charges above 1000 per line', 'severity': 'warning',
+         'check': lambda claim: claim['total_charges'] > 1000 * len(claim['service_lines'])},
+    ])
+    results = engine.evaluate([
+        _claim(procedure_codes=['99215']),
+        _claim(provider_id='PRV2', procedure_codes=['99213', '99215'], claim_id='P100'),
+        _claim(provider_id='PRV2', total_charges=5000.0),
+    ])
+    assert results[0]['valid']
+    assert results[1]['errors'] == ['PRV2 does not cover 99215']
+    assert results[2]['warnings'] == ['PRV2 claim IDs start with P', 'Charges above 1000 per line']
+
+    stats = {stat['rule_id']: stat for stat in engine.report()}
+    assert stats['prv2-no-99215']['hits'] == 1
+    assert stats['high-charge-per-line']['hits'] == 1
+    assert stats['missing-patient-id']['claims_evaluated'] == 3
+    engine.reset_stats()
+    assert all(stat['hits'] == 0 for stat in engine.report())
+
+    with pytest.raises(RuleError):
+        RuleEngine([{'id': 'x', 'message': 'x', 'field': 'total_charges', 'op': 'between'}])
+    with pytest.raises(RuleError):
+        RuleEngine([DEFAULT_RULES[0], DEFAULT_RULES[0]])
+
+def test_bulk_insert_validates_in_batches(client, db):
+    """Test that bulk-created claims get their status from the engine and stats are exposed"""
+    engine = RuleEngine()
+    claims_data = [
+        {'claim': {'claim_id': 'V1', 'total_charges': 50.0}, 'patient': {'patient_id': 'P1'},
+         'provider': {'provider_id': 'PRV1'}, 'diagnosis_codes': ['J20.9'],
+         'service_lines': [{'procedure_code': '99213'}]},
+        {'claim': {'claim_id': 'V2', 'total_charges': 50.0}, 'patient': {'patient_id': 'P1'},
+         'provider': {'provider_id': ''}, 'diagnosis_codes': ['J20.9'], 'service_lines': []},
+    ]
+    ClaimProcessor(db, engine).create_claims_bulk(claims_data)
+
+    statuses = {claim.claim_id: claim.status for claim in db.query(Claim).all()}
+    assert statuses == {'V1': ClaimStatus.VALIDATED, 'V2': ClaimStatus.RECEIVED}
+    assert {stat['rule_id']: stat['hits'] for stat in engine.report()}['missing-service-lines'] == 1
+
+    response = client.get("/api/v1/claims/validation/rules")
+    assert response.status_code == 200
+    assert {stat['rule_id'] for stat in response.json()} >= {'missing-patient-id', 'many-diagnosis-codes'}
+
+def test_presence_rules_on_date_and_number_fields():
+    """Test missing/present on date and float fields, and length rules rejected on them"""
+    engine = RuleEngine([
+        {'id': 'missing-service-date', 'message': 'Missing service date', 'field': 'service_date', 'op': 'missing'},
+        {'id': 'has-charges', 'message': 'Charges present', 'severity': 'warning',
+         'field': 'total_charges', 'op': 'present'},
+    ])
+    results = engine.evaluate([
+        _claim(service_date=date(2024, 1, 15), total_charges=0.0),
+        _claim(service_date=None, total_charges=None),
+    ])
+    assert results[0] == {'valid': True, 'errors': [], 'warnings': ['Charges present']}
+    assert results[1] == {'valid': False, 'errors': ['Missing service date'], 'warnings': []}
+
+    with pytest.raises(RuleError):
+        RuleEngine([{'id': 'x', 'message': 'x', 'field': 'service_date', 'op': 'length_gt', 'value': 1}])
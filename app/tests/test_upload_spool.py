@@ -0,0 +1,66 @@
+import os
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from app.core.middleware import UploadSizeLimitMiddleware
+from app.services.ingest_cache import content_hash
+from app.services.upload_spool import UploadSpool, UploadTooLargeError, NotX12Error
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
+
+def _read_sample(name):
+    with open(os.path.join(SAMPLE_DIR, name), 'rb') as f:
+        return f.read()
+
+def test_spool_hashes_and_sniffs_while_copying(tmp_path):
+    """Test that the spool hashes, sniffs delimiters and rolls over to UPLOAD_DIR"""
+    content = _read_sample('837P_sample.txt').replace(b'*', b'|').replace(b'ISA|', b'ISA|', 1)
+    spool = UploadSpool(max_size=len(content), spool_size=256, directory=str(tmp_path))
+    try:
+        for start in range(0, len(content), 50):
+            spool.write(content[start:start + 50])
+        spool.finish()
+        
+        assert spool.delimiters == ('~', '|')
+        assert spool.content_hash == content_hash(content)
+        assert b''.join(spool.iter_chunks(100)) == content
+        assert spool.file._rolled  # past spool_size the copy lives on disk
+    finally:
+        spool.close()
+
+def test_spool_limit_and_header_enforced_early(tmp_path):
+    """Test that the limit and a missing ISA header stop the copy as soon as they are seen"""
+    spool = UploadSpool(max_size=100, directory=str(tmp_path))
+    spool.write(b'ISA*' + b' ' * 90)
+    with pytest.raises(UploadTooLargeError):
+        spool.write(b' ' * 10)
+    spool.close()
+    
+    spool = UploadSpool(directory=str(tmp_path))
+    with pytest.raises(NotX12Error):
+        spool.write(b'%PDF-1.4')
+    spool.close()
+
+def test_size_limit_middleware():
+    """Test 413 from a declared Content-Length and from a chunked body crossing the limit"""
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, limits={"/upload": 1000})
+    
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+    
+    client = TestClient(app)
+    assert client.post("/upload", files={"file": ("a.txt", b"x" * 100)}).json() == {"size": 100}
+    assert client.post("/upload", files={"file": ("a.txt", b"x" * 5000)}).status_code == 413
+    
+    def chunked_body():
+        # No Content-Length: the limit is only crossed while the body arrives
+        yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.txt"\r\n\r\n'
+        for _ in range(10):
+            yield b"x" * 500
+        yield b"\r\n--b--\r\n"
+    
+    response = client.post("/upload", content=chunked_body(),
+                           headers={"content-type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
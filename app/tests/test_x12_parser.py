@@ -1,4 +1,9 @@
-from app.services.x12_parser import X12Parser
+import asyncio
+import io
+import os
+from app.services.x12_parser import X12Parser, X12StreamParser, X12Validator
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sample_files')
 
 def test_parser_initialization():
     """Test X12Parser initialization"""
@@ -32,3 +37,186 @@ def test_format_date():
     
     # Test invalid format
     assert parser._format_date('') == ''
+
+def _read_sample(name):
+    with open(os.path.join(SAMPLE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+def test_parse_837_professional_sample():
+    """Test single-pass parse of the 837P sample file"""
+    parser = X12Parser()
+    claim_data = parser.parse_837(_read_sample('837P_sample.txt'))
+    
+    assert claim_data['claim_type'] == '837P'
+    assert claim_data['patient'] == {
+        'patient_id': 'MEM987654321',
+        'patient_name': 'SMITH JANE',
+        'patient_dob': '1975-03-20',
+        'patient_gender': 'F'
+    }
+    assert claim_data['provider']['provider_npi'] == '9876543210'
+    assert claim_data['claim']['claim_id'] == 'CLM002'
+    assert claim_data['claim']['total_charges'] == 350.0
+    assert claim_data['diagnosis_codes'] == ['Z00.00', 'Z23']
+    assert [line['procedure_code'] for line in claim_data['service_lines']] == ['99213', '90471', '90715']
+    assert [line['charge_amount'] for line in claim_data['service_lines']] == [150.0, 25.0, 175.0]
+
+def test_parse_837_institutional_sample():
+    """Test admission/discharge dates and SV2 lines from the 837I sample file"""
+    parser = X12Parser()
+    claim_data = parser.parse_837(_read_sample('837I_sample.txt'))
+    
+    assert claim_data['claim']['claim_id'] == 'CLM001'
+    assert claim_data['claim']['admission_date'] == '2023-11-01'
+    assert claim_data['claim']['discharge_date'] == '2023-11-03'
+    assert claim_data['diagnosis_codes'] == ['I10', 'E119', 'I509', 'R0682']
+    assert len(claim_data['service_lines']) == 3
+
+MULTI_CLAIM_837 = (
+    "ISA*00*          *00*          *ZZ*SUBMITTER      *ZZ*RECEIVER       *231110*1430*U*00401*000000003*0*P*:~"
+    "GS*HP*SUBMITTER*RECEIVER*20231110*1430*3*X*004010X098A1~"
+    "ST*837*0003~"
+    "HL*1**20*1~"
+    "NM1*85*2*FIRST GROUP*****XX*1111111111~"
+    "HL*2*1*22*0~"
+    "NM1*IL*1*DOE*JOHN****MI*MEM1~"
+    "DMG*D8*19800515*M~"
+    "CLM*A1*100***11:B:1*Y*A*Y*Y~"
+    "HI*ABK:I10~"
+    "LX*1~"
+    "SV1*HC:99213*100*UN*1***1~"
+    "CLM*A2*200***11:B:1*Y*A*Y*Y~"
+    "HI*ABK:E119~"
+    "LX*1~"
+    "SV1*HC:99214*200*UN*1***1~"
+    "HL*3**20*1~"
+    "NM1*85*2*SECOND GROUP*****XX*2222222222~"
+    "HL*4*3*22*0~"
+    "NM1*IL*1*ROE*JANE****MI*MEM2~"
+    "CLM*B1*300***11:B:1*Y*A*Y*Y~"
+    "LX*1~"
+    "SV1*HC:99215*300*UN*1***1~"
+    "SE*22*0003~"
+    "GE*1*3~"
+    "IEA*1*000000003~"
+)
+
+def test_iter_claims_multiple_clm_loops():
+    """Test one claim per CLM loop with inherited HL provider/subscriber context"""
+    parser = X12Parser()
+    claims = list(parser.iter_claims(MULTI_CLAIM_837))
+    
+    assert [c['claim']['claim_id'] for c in claims] == ['A1', 'A2', 'B1']
+    assert [c['provider']['provider_npi'] for c in claims] == ['1111111111', '1111111111', '2222222222']
+    assert [c['patient']['patient_id'] for c in claims] == ['MEM1', 'MEM1', 'MEM2']
+    
+    # Subscriber context does not leak into the next subscriber
+    assert claims[1]['patient']['patient_dob'] == '1980-05-15'
+    assert claims[2]['patient']['patient_dob'] == ''
+    
+    # Claim-level loops are scoped to their CLM
+    assert [c['diagnosis_codes'] for c in claims] == [['I10'], ['E119'], []]
+    assert [len(c['service_lines']) for c in claims] == [1, 1, 1]
+    assert claims[1]['service_lines'][0]['procedure_code'] == '99214'
+
+def test_stream_parser_chunk_boundaries():
+    """Test that feeding arbitrary chunk sizes yields the same claims as iter_claims"""
+    content = MULTI_CLAIM_837 + _read_sample('837P_sample.txt')
+    expected = list(X12Parser().iter_claims(content))
+    data = content.encode('utf-8')
+    
+    for chunk_size in (1, 7, 64, 105, 4096):
+        stream_parser = X12StreamParser()
+        claims = []
+        for start in range(0, len(data), chunk_size):
+            claims.extend(stream_parser.feed(data[start:start + chunk_size]))
+        claims.extend(stream_parser.close())
+        assert claims == expected, chunk_size
+
+def test_stream_parser_async_reader():
+    """Test reading claims from an async file-like object"""
+    class AsyncReader:
+        def __init__(self, data):
+            self.stream = io.BytesIO(data)
+        
+        async def read(self, size=-1):
+            return self.stream.read(size)
+    
+    async def collect():
+        reader = AsyncReader(MULTI_CLAIM_837.encode('utf-8'))
+        return [c async for c in X12StreamParser().aiter_claims(reader, chunk_size=32)]
+    
+    claims = asyncio.run(collect())
+    assert [c['claim']['claim_id'] for c in claims] == ['A1', 'A2', 'B1']
+
+def test_parse_from_file_matches_string_parse(tmp_path):
+    """Test that the memory-mapped file path yields identical claims"""
+    content = MULTI_CLAIM_837 + _read_sample('837I_sample.txt').replace('~', '~\r\n')
+    path = tmp_path / 'batch.txt'
+    path.write_bytes(content.encode('utf-8'))
+    
+    parser = X12Parser()
+    assert list(parser.iter_claims_from_file(str(path))) == list(X12Parser().iter_claims(content))
+    assert parser.parse_837_file(str(path)) == X12Parser().parse_837(content)
+
+def test_validate_837_envelope():
+    """Test envelope validation of a well-formed interchange"""
+    result = X12Parser().validate_837(MULTI_CLAIM_837)
+    assert result == {'valid': True, 'errors': [], 'warnings': [], 'error_details': [], 'warning_details': []}
+
+def test_validate_837_reports_segment_positions():
+    """Test SE01 count, control number and HL parent errors with their positions"""
+    content = (MULTI_CLAIM_837
+               .replace('SE*22*0003', 'SE*21*0003')
+               .replace('HL*4*3*22', 'HL*4*9*22')
+               .replace('GE*1*3', 'GE*1*4'))
+    result = X12Parser().validate_837(content)
+    
+    assert not result['valid']
+    assert [(e['position'], e['segment_id']) for e in result['error_details']] == [
+        (19, 'HL'), (24, 'SE'), (25, 'GE')
+    ]
+    assert result['errors'] == [e['message'] for e in result['error_details']]
+    assert 'SE01' in result['errors'][1]
+    
+    # Substring matches inside data values do not count as segments
+    assert not X12Parser().validate_837('ISA*NOTE CLM SE GE IEA~')['valid']
+
+def test_validate_837_unpaired_envelopes():
+    """Test ST/SE pairing and unclosed envelopes"""
+    content = MULTI_CLAIM_837.replace('SE*22*0003~', '').replace('IEA*1*000000003~', '')
+    messages = X12Parser().validate_837(content)['errors']
+    assert messages == ["ST at segment 3 has no SE", "ISA has no matching IEA"]
+
+def test_validator_in_stream_and_file_passes(tmp_path):
+    """Test that validation fused into the stream and mmap passes sees the same positions"""
+    content = MULTI_CLAIM_837.replace('~', '~\n').replace('SE*22', 'SE*2')
+    expected = X12Parser().validate_837(content)
+    
+    path = tmp_path / 'batch.txt'
+    path.write_text(content, encoding='utf-8')
+    validator = X12Validator()
+    assert len(list(X12Parser().iter_claims_from_file(str(path), validator=validator))) == 3
+    assert validator.result() == expected
+    
+    validator = X12Validator()
+    stream_parser = X12StreamParser(validator=validator)
+    data = content.encode('utf-8')
+    for start in range(0, len(data), 10):
+        stream_parser.feed(data[start:start + 10])
+    stream_parser.close()
+    assert validator.result() == expected
+    assert expected['error_details'][0]['position'] == 24
+    assert X12Parser().validate_837_file(str(path)) == expected
+
+def test_validate_837_builds_no_claims(monkeypatch):
+    """Test that the validation-only pass never opens a claim or enters HL context"""
+    def fail(*args):
+        raise AssertionError("claim handler called")
+    monkeypatch.setattr(X12Parser, '_handle_clm', fail)
+    monkeypatch.setattr(X12Parser, '_handle_hl', fail)
+    monkeypatch.setattr(X12Parser, '_build_claim', fail)
+    
+    result = X12Parser().validate_837(MULTI_CLAIM_837)
+    assert result['valid']
+    assert X12Parser().validate_837('ISA*00~')['errors'][-1] == "Missing required segment: CLM"
@@ -0,0 +1,200 @@
+"""
+X12 parser benchmark suite - throughput and peak memory of every parse mode
+
+Each size is generated with the deterministic synthetic 837 generator
+(benchmarks/synthetic.py), written to a temp file and parsed by every
+selected mode. Timing and tracemalloc runs are separate so tracing does not
+skew throughput. One JSON line per (size, mode) is appended to --output,
+tagged with the git commit, so results can be compared across commits.
+
+Usage:
+    python benchmarks/bench_x12_parser.py [--sizes 1,100,10000] [--modes iter_claims,mmap]
+        [--claim-type 837P] [--delimiters standard] [--repeat 3] [--output PATH]
+
+    python benchmarks/bench_x12_parser.py --sizes 1000000 --modes mmap,parallel
+    python benchmarks/bench_x12_parser.py --sizes 4000 --modes iter_claims,scan
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Add the project root to the path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.x12_parser import X12Parser, X12StreamParser, _ParseState
+from app.services.parallel_parser import ParallelX12Parser
+from app.services.claim_normalizer import ClaimNormalizer
+from benchmarks.synthetic import SyntheticInterchange, DELIMITERS
+
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, 'benchmarks', 'results', 'x12_parser.jsonl')
+CHUNK_SIZE = 65536
+
+
+def _read_text(path: str) -> str:
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def run_parse_837(path: str) -> int:
+    """Read the file and parse the first claim (single-claim API)"""
+    X12Parser().parse_837(_read_text(path))
+    return 1
+
+
+def run_iter_claims(path: str) -> int:
+    """Read the file and parse every claim from the decoded string"""
+    return sum(1 for _ in X12Parser().iter_claims(_read_text(path)))
+
+
+def run_scan(path: str) -> int:
+    """
+    iter_claims with the decoded string scanned in place, as the mmap and
+    stream paths do, instead of split into segments: the before/after of
+    moving str input back to splitting
+    """
+    parser = X12Parser()
+    text = _read_text(path)
+    parser._detect_delimiters(text)
+    return sum(1 for _ in parser._iter_buffer_claims(text, _ParseState(), in_place=True))
+
+
+def run_stream(path: str) -> int:
+    """Feed the file to the push parser in upload-sized chunks"""
+    stream_parser = X12StreamParser()
+    claims = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            claims += len(stream_parser.feed(chunk))
+    return claims + len(stream_parser.close())
+
+
+def run_mmap(path: str) -> int:
+    """Parse every claim straight from the memory-mapped file"""
+    return sum(1 for _ in X12Parser().iter_claims_from_file(path))
+
+
+def run_batch_normalize(path: str) -> int:
+    """Memory-mapped parse with raw values, converted by ClaimNormalizer in batches"""
+    claims = X12Parser(normalize=False).iter_claims_from_file(path)
+    return sum(1 for _ in ClaimNormalizer().iter_normalized(claims))
+
+
+def run_parallel(path: str) -> int:
+    """Parse every claim across the process pool (tracemalloc sees the parent only)"""
+    return sum(1 for _ in ParallelX12Parser(threshold=0).iter_claims_from_file(path))
+
+
+MODES = {
+    'parse_837': run_parse_837,
+    'iter_claims': run_iter_claims,
+    'scan': run_scan,
+    'stream': run_stream,
+    'mmap': run_mmap,
+    'batch_normalize': run_batch_normalize,
+    'parallel': run_parallel,
+}
+
+
+def time_mode(run, path: str, repeat: int):
+    """Best wall-clock time of `repeat` runs, and the claim count"""
+    best = float('inf')
+    claims = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        claims = run(path)
+        best = min(best, time.perf_counter() - start)
+    return best, claims
+
+
+def peak_memory(run, path: str) -> int:
+    """tracemalloc peak in bytes during one run"""
+    tracemalloc.start()
+    try:
+        run(path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--sizes', default='1,100,10000',
+                            help='comma-separated claim counts (1 to 1000000)')
+    arg_parser.add_argument('--modes', default=','.join(MODES), help='comma-separated parse modes')
+    arg_parser.add_argument('--claim-type', default='837P', choices=['837P', '837I'])
+    arg_parser.add_argument('--delimiters', default='standard', choices=sorted(DELIMITERS))
+    arg_parser.add_argument('--seed', type=int, default=837)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc runs')
+    arg_parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON Lines results file')
+    args = arg_parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    modes = args.modes.split(',')
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        arg_parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    run_info = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'claim_type': args.claim_type,
+        'delimiters': args.delimiters,
+        'seed': args.seed,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'a', encoding='utf-8') as results:
+        for size in sizes:
+            with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+                SyntheticInterchange(size, claim_type=args.claim_type, seed=args.seed,
+                                     delimiters=args.delimiters).write(f)
+            file_bytes = os.path.getsize(f.name)
+            print(f"{size} claims, {file_bytes / 1e6:.2f} MB")
+
+            try:
+                for mode in modes:
+                    elapsed, claims = time_mode(MODES[mode], f.name, args.repeat)
+                    peak = None if args.no_memory else peak_memory(MODES[mode], f.name)
+                    record = dict(
+                        run_info,
+                        mode=mode,
+                        claims=claims,
+                        bytes=file_bytes,
+                        seconds=round(elapsed, 6),
+                        claims_per_s=round(claims / elapsed, 1),
+                        mb_per_s=round(file_bytes / elapsed / 1e6, 3),
+                        peak_kib=None if peak is None else round(peak / 1024, 1),
+                    )
+                    results.write(json.dumps(record) + '\n')
+                    memory = '' if peak is None else f"  peak {record['peak_kib']:10.1f} KiB"
+                    print(f"  {mode:>15}: {elapsed * 1000:10.1f} ms  {record['claims_per_s']:12.0f} claims/s  "
+                          f"{record['mb_per_s']:7.2f} MB/s{memory}")
+            finally:
+                os.unlink(f.name)
+
+    print(f"results appended to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Synthetic 837 generator - deterministic 837I/837P interchanges for benchmarks
+
+Claims follow the shapes of sample_files/837I_sample.txt and 837P_sample.txt
+(billing provider HL 20 -> subscriber HL 22 [-> patient HL 23] -> CLM) with
+a seeded spread of service lines, diagnosis codes and delimiters. Output is
+written segment by segment, so interchanges of a million claims can go
+straight to disk. Envelope counts and control numbers are consistent.
+"""
+from typing import Dict, TextIO
+import io
+import random
+
+# name -> (element delimiter, segment terminator written after each segment)
+# The segment delimiter seen by the parser is the first character of the
+# terminator; anything after it is whitespace between segments.
+DELIMITERS: Dict[str, tuple] = {
+    'standard': ('*', '~'),
+    'newline': ('*', '~\n'),
+    'pipe': ('|', '~'),
+    'caret': ('^', '\''),
+}
+
+PROCEDURES_837P = ['99213', '99214', '99215', '90471', '90715', '36415', '81002', '93000']
+PROCEDURES_837I = ['99223', '99232', '99233', '85025', '80053', '71046', '93005', '36415']
+REVENUE_CODES = ['0450', '0360', '0300', '0320', '0250', '0730']
+DIAGNOSES = ['I10', 'E119', 'I509', 'R0682', 'Z0000', 'Z23', 'J449', 'N179', 'E785', 'M545', 'K219', 'F329']
+LAST_NAMES = ['DOE', 'SMITH', 'JOHNSON', 'WILLIAMS', 'BROWN', 'JONES', 'GARCIA', 'MILLER']
+FIRST_NAMES = ['JOHN', 'JANE', 'MARY', 'JAMES', 'LINDA', 'ROBERT', 'PATRICIA', 'MICHAEL']
+
+
+class SyntheticInterchange:
+    """Write a seeded 837 interchange of `claims` claims"""
+
+    def __init__(self, claims: int, claim_type: str = '837P', seed: int = 837,
+                 delimiters: str = 'standard', claims_per_transaction: int = 1000,
+                 claims_per_subscriber: int = 2, subscribers_per_provider: int = 50,
+                 max_service_lines: int = 6, max_diagnoses: int = 12):
+        self.claims = claims
+        self.claim_type = claim_type
+        self.seed = seed
+        self.element_delimiter, self.terminator = DELIMITERS[delimiters]
+        self.claims_per_transaction = claims_per_transaction
+        self.claims_per_subscriber = claims_per_subscriber
+        self.subscribers_per_provider = subscribers_per_provider
+        self.max_service_lines = max_service_lines
+        self.max_diagnoses = max_diagnoses
+
+    def to_string(self) -> str:
+        buffer = io.StringIO()
+        self.write(buffer)
+        return buffer.getvalue()
+
+    def write(self, out: TextIO) -> None:
+        rng = random.Random(self.seed)
+        e = self.element_delimiter
+        institutional = self.claim_type == '837I'
+
+        def segment(*elements):
+            out.write(e.join(elements) + self.terminator)
+
+        # ISA is fixed width: ISA03 carries the element delimiter and the
+        # terminator follows ISA16 at position 105
+        segment('ISA', '00', ' ' * 10, '00', ' ' * 10, 'ZZ', 'SUBMITTER'.ljust(15), 'ZZ',
+                'RECEIVER'.ljust(15), '231110', '1430', 'U', '00401', '000000001', '0', 'P', ':')
+        segment('GS', 'HC' if institutional else 'HP', 'SUBMITTER', 'RECEIVER', '20231110', '1430',
+                '1', 'X', '004010X096A1' if institutional else '004010X098A1')
+
+        claim_number = 0
+        transaction_sets = 0
+        while claim_number < self.claims:
+            transaction_sets += 1
+            control = f"{transaction_sets:04d}"
+            count = 0
+
+            def counted(*elements):
+                nonlocal count
+                count += 1
+                segment(*elements)
+
+            counted('ST', '837', control)
+            counted('BHT', '0019', '00', control, '20231110', '1430', 'CH')
+            counted('NM1', '41', '2', 'SUBMITTER', '', '', '', '', '46', '123456789')
+            counted('NM1', '40', '2', 'SAMPLE INSURANCE CO', '', '', '', '', '46', '987654321')
+
+            hl_id = 0
+            in_transaction = 0
+            while claim_number < self.claims and in_transaction < self.claims_per_transaction:
+                # Billing provider
+                hl_id += 1
+                provider_hl = hl_id
+                npi = f"{rng.randrange(10 ** 9, 10 ** 10)}"
+                counted('HL', str(provider_hl), '', '20', '1')
+                counted('PRV', 'BI', 'PXC', '207Q00000X')
+                counted('NM1', '85', '2', f"PROVIDER {npi[-4:]}", '', '', '', '', 'XX', npi)
+                counted('N3', '123 HOSPITAL DRIVE')
+                counted('N4', 'CITY', 'PA', '12345')
+                counted('REF', 'EI', '123456789')
+
+                for _ in range(self.subscribers_per_provider):
+                    if claim_number >= self.claims or in_transaction >= self.claims_per_transaction:
+                        break
+
+                    # Subscriber, with a patient level on some professional claims
+                    hl_id += 1
+                    subscriber_hl = hl_id
+                    has_patient = not institutional and rng.random() < 0.25
+                    member_id = f"MEM{rng.randrange(10 ** 9):09d}"
+                    counted('HL', str(subscriber_hl), str(provider_hl), '22', '1' if has_patient else '0')
+                    counted('SBR', 'P', '18', '', '', '', '', '', '', 'CI')
+                    counted('NM1', 'IL', '1', rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES),
+                            '', '', '', 'MI', member_id)
+                    counted('N3', '456 PATIENT STREET')
+                    counted('N4', 'CITY', 'PA', '12345')
+                    counted('DMG', 'D8', f"{rng.randrange(1930, 2020)}{rng.randrange(1, 13):02d}{rng.randrange(1, 29):02d}",
+                            rng.choice('MF'))
+                    counted('NM1', 'PR', '2', 'SAMPLE INSURANCE CO', '', '', '', '', 'PI', 'PAYER123')
+                    if has_patient:
+                        hl_id += 1
+                        counted('HL', str(hl_id), str(subscriber_hl), '23', '0')
+                        counted('PAT', '01')
+                        counted('NM1', 'QC', '1', rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES),
+                                '', '', '', 'MI', member_id)
+
+                    for _ in range(self.claims_per_subscriber):
+                        if claim_number >= self.claims or in_transaction >= self.claims_per_transaction:
+                            break
+                        claim_number += 1
+                        in_transaction += 1
+                        self._write_claim(counted, rng, claim_number, institutional)
+
+            counted('SE', str(count + 1), control)
+
+        segment('GE', str(transaction_sets), '1')
+        segment('IEA', '1', '000000001')
+
+    def _write_claim(self, counted, rng: random.Random, claim_number: int, institutional: bool) -> None:
+        """Write one CLM loop through the `counted` segment writer"""
+        day = rng.randrange(1, 28)
+        service_date = f"202311{day:02d}"
+        lines = []
+        for _ in range(rng.randint(1, self.max_service_lines)):
+            charge = rng.randrange(25, 2500)
+            lines.append((charge, rng.randint(1, 4)))
+        total = sum(charge for charge, _ in lines)
+
+        counted('CLM', f"SYN{claim_number:09d}", str(total), '', '', '11:B:1', 'Y', 'A', 'Y', 'Y')
+        if institutional:
+            counted('DTP', '434', 'RD8', f"{service_date}-202311{day + 1:02d}")
+            counted('DTP', '435', 'D8', service_date)
+            counted('DTP', '096', 'D8', f"202311{day + 1:02d}")
+            counted('CL1', '1', '1', '01')
+        else:
+            counted('DTP', '431', 'D8', service_date)
+
+        diagnoses = rng.sample(DIAGNOSES, rng.randint(1, self.max_diagnoses))
+        counted('HI', *[f"{'ABK' if i == 0 else 'ABF'}:{code}" for i, code in enumerate(diagnoses)])
+
+        for line_number, (charge, units) in enumerate(lines, start=1):
+            counted('LX', str(line_number))
+            if institutional:
+                counted('SV2', rng.choice(REVENUE_CODES), f"HC:{rng.choice(PROCEDURES_837I)}",
+                        str(charge), 'UN', str(units))
+            else:
+                modifiers = ':25' if rng.random() < 0.1 else ''
+                counted('SV1', f"HC:{rng.choice(PROCEDURES_837P)}{modifiers}", str(charge), 'UN',
+                        str(units), '', '', '1')
+            counted('DTP', '472', 'D8', service_date)
+
+
+def generate_837(claims: int, **options) -> str:
+    """Return a synthetic interchange as a string"""
+    return SyntheticInterchange(claims, **options).to_string()
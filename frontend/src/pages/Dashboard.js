@@ -33,16 +33,17 @@ function Dashboard() {
 
   const loadDashboardData = async () => {
     try {
-      const response = await claimService.getClaims({ limit: 1000 });
-      const claims = response.claims || [];
+      const response = await claimService.getClaimStats();
+      const byStatus = response.by_status || {};
+      const count = (status) => (byStatus[status] ? byStatus[status].claims : 0);
 
       const stats = {
-        total: claims.length,
-        adjudicated: claims.filter((c) => c.status === 'ADJUDICATED').length,
-        paid: claims.filter((c) => c.status === 'PAID').length,
-        denied: claims.filter((c) => c.status === 'DENIED').length,
-        totalCharges: claims.reduce((sum, c) => sum + (c.total_charges || 0), 0),
-        totalPaid: claims.reduce((sum, c) => sum + (c.paid_amount || 0), 0),
+        total: response.total_claims,
+        adjudicated: count('ADJUDICATED'),
+        paid: count('PAID'),
+        denied: count('DENIED'),
+        totalCharges: response.total_charges,
+        totalPaid: response.total_paid,
       };
 
       setStats(stats);
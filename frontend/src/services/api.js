@@ -28,6 +28,12 @@ export const claimService = {
     return response.data;
   },
 
+  // Claim counts and totals by status
+  getClaimStats: async (params = {}) => {
+    const response = await api.get('/claims/stats', { params });
+    return response.data;
+  },
+
   // Get single claim
   getClaim: async (claimId) => {
     const response = await api.get(`/claims/${claimId}`);